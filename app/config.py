@@ -21,8 +21,19 @@ class Settings(BaseSettings):
     PAYME_MERCHANT_ID: Optional[str] = None
     PAYME_SECRET_KEY: Optional[str] = None
     
+    # Payment webhook consumer
+    PAYMENT_CONSUMER_BATCH_SIZE: int = 500  # Inbox events applied per transaction
+    PAYMENT_CONSUMER_POLL_SECONDS: int = 2
+    
     # Telegram
     TELEGRAM_BOT_TOKEN: Optional[str] = None
+    TELEGRAM_API_URL: str = "https://api.telegram.org"
+    
+    # Activity reminder dispatcher
+    REMINDER_BATCH_SIZE: int = 1000  # Reminders claimed per transaction
+    REMINDER_POLL_SECONDS: int = 30
+    REMINDER_SEND_CONCURRENCY: int = 16  # Messages in flight per batch
+    REMINDER_SEND_TIMEOUT: int = 10  # Seconds per Telegram request or SMTP operation
     
     # Email (for future use)
     SMTP_HOST: Optional[str] = None
@@ -34,6 +45,28 @@ class Settings(BaseSettings):
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
     ALLOWED_FILE_TYPES: list = [".pdf", ".doc", ".docx", ".xls", ".xlsx", ".jpg", ".jpeg", ".png"]
     
+    # Invoice PDF rendering
+    PDF_RENDER_WORKERS: int = 2  # Processes converting HTML to PDF
+    PDF_RENDER_TIMEOUT: int = 60  # Seconds per document
+    PDF_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    PDF_BATCH_CONCURRENCY: int = 4  # Documents in flight per batch export
+    PDF_BATCH_MAX_INVOICES: int = 500
+    
+    # Recurring template scheduler
+    SCHEDULER_BATCH_SIZE: int = 500  # Schedules claimed per transaction
+    SCHEDULER_POLL_SECONDS: int = 60
+    SCHEDULER_MAX_CATCH_UP: int = 366  # Missed executions replayed per schedule and batch
+    
+    # Global search typeahead cache
+    SEARCH_CACHE_TTL_SECONDS: int = 30  # Index changes show up in typeahead after at most this long
+    SEARCH_CACHE_MAX_ENTRIES: int = 10000
+    
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_LEVELS: dict = {}  # Per-logger overrides, e.g. {"app.routes.invoices": "DEBUG"}
+    LOG_JSON: bool = True
+    LOG_SAMPLE_RATE: float = 0.01  # Share of high-volume debug events that are kept
+    
     # Uzbekistan Tax Settings
     VAT_RATE: float = 0.12  # 12% VAT
     INCOME_TAX_RATE: float = 0.15  # 15% income tax for SMEs
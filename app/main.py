@@ -3,6 +3,7 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
 from fastapi.security import HTTPBearer
 from sqlalchemy.orm import Session
+import uuid
 import uvicorn
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
@@ -24,8 +25,15 @@ from app.routes.kpi_population import router as kpi_population
 from app.routes.email_verification import router as email_verification
 from app.routes.drafts import router as drafts
 from app.routes.usage import router as usage
+from app.routes.exports import router as exports
+from app.routes.payments import router as payments
+from app.routes.search import router as search
 
 from app.config import settings
+from app.logging_config import setup_logging, request_id_var
+
+# Structured JSON logging through a background queue
+setup_logging()
 
 # Initialize rate limiter
 limiter = Limiter(key_func=get_remote_address)
@@ -56,6 +64,18 @@ app.add_middleware(
     ]
 )
 
+# Request ID middleware - Correlates log lines of one request
+@app.middleware("http")
+async def add_request_id(request: Request, call_next):
+    request_id = request.headers.get("X-Request-ID") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    try:
+        response = await call_next(request)
+    finally:
+        request_id_var.reset(token)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
 # Security Headers middleware
 @app.middleware("http")
 async def add_security_headers(request: Request, call_next):
@@ -124,6 +144,7 @@ app.add_middleware(
         "Origin",
         "Access-Control-Request-Method",
         "Access-Control-Request-Headers",
+        "X-Request-ID",
     ],
     expose_headers=["*"],
 )
@@ -144,6 +165,9 @@ app.include_router(kpi_population, prefix="/api/kpi", tags=["KPI Population"])
 app.include_router(email_verification, prefix="/api/email", tags=["Email Verification"])
 app.include_router(drafts, prefix="/api/drafts", tags=["Drafts"])
 app.include_router(usage, prefix="/api/usage", tags=["Usage"])
+app.include_router(exports, prefix="/api/export", tags=["Export"])
+app.include_router(payments, prefix="/api/payments", tags=["Payments"])
+app.include_router(search, prefix="/api/search", tags=["Search"])
 
 @app.get("/")
 async def root():
@@ -2,26 +2,34 @@ from .base import Base
 from .user import User, UserRole
 from .company import Company
 from .transaction import Transaction, TransactionType, TransactionCategory
-from .invoice import Invoice, InvoiceStatus, InvoiceItem
+from .invoice import Invoice, InvoiceStatus, InvoiceItem, InvoiceNumberCounter, InvoiceVersion, InvoicePayment
 from .contact import Contact
 from .lead import Lead, LeadStatus
-from .deal import Deal, DealStatus
+from .deal import Deal, DealStatus, DealStageHistory, PipelineEntityType
 from .kpi import KPI, KPICategory, KPIPeriod, KPITrend, KPIAlert
 from .tenant import Tenant
 from .template import Template, RecurringSchedule, TemplateType, RecurringInterval
 from .task import Task, TaskStatus, TaskPriority, TaskComment
+from .payment_event import PaymentEvent, PaymentProvider, PaymentEventStatus
+from .search_index import SearchIndexEntry, SearchEntityType
+from .crm_version import CRMVersion
+from .accounting_rollup import TransactionDailyRollup, AccountingRollupState, LedgerCheckpoint
 
 __all__ = [
     "Base",
     "User", "UserRole",
     "Company", 
     "Transaction", "TransactionType", "TransactionCategory",
-    "Invoice", "InvoiceStatus", "InvoiceItem",
+    "Invoice", "InvoiceStatus", "InvoiceItem", "InvoiceNumberCounter", "InvoiceVersion", "InvoicePayment",
     "Contact",
     "Lead", "LeadStatus", 
-    "Deal", "DealStatus",
+    "Deal", "DealStatus", "DealStageHistory", "PipelineEntityType",
     "KPI", "KPICategory", "KPIPeriod", "KPITrend", "KPIAlert",
     "Tenant",
     "Template", "RecurringSchedule", "TemplateType", "RecurringInterval",
-    "Task", "TaskStatus", "TaskPriority", "TaskComment"
+    "Task", "TaskStatus", "TaskPriority", "TaskComment",
+    "PaymentEvent", "PaymentProvider", "PaymentEventStatus",
+    "SearchIndexEntry", "SearchEntityType",
+    "CRMVersion",
+    "TransactionDailyRollup", "AccountingRollupState", "LedgerCheckpoint"
 ]
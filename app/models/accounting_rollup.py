@@ -0,0 +1,56 @@
+from sqlalchemy import Column, Integer, Date, DateTime, Numeric, ForeignKey, Enum, UniqueConstraint
+from sqlalchemy.sql import func
+from app.models.base import Base
+from app.models.transaction import TransactionType, TransactionCategory
+
+class TransactionDailyRollup(Base):
+    """Pre-aggregated transaction totals per company, day, type and category"""
+    __tablename__ = "transaction_daily_rollups"
+    __table_args__ = (
+        UniqueConstraint("company_id", "day", "type", "category", name="uq_transaction_daily_rollup"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    type = Column(Enum(TransactionType), nullable=False)
+    category = Column(Enum(TransactionCategory), nullable=False)
+    transaction_count = Column(Integer, nullable=False, default=0)
+    amount_total = Column(Numeric(15, 2), nullable=False, default=0)
+    vat_total = Column(Numeric(15, 2), nullable=False, default=0)
+    tax_total = Column(Numeric(15, 2), nullable=False, default=0)
+
+    # Foreign keys
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class AccountingRollupState(Base):
+    """Watermark: rollups are complete for every day up to and including rolled_up_through"""
+    __tablename__ = "accounting_rollup_states"
+
+    company_id = Column(Integer, ForeignKey("companies.id"), primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    rolled_up_through = Column(Date, nullable=True)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class LedgerCheckpoint(Base):
+    """Running balance of all transactions dated before the first day of `month`"""
+    __tablename__ = "ledger_checkpoints"
+    __table_args__ = (
+        UniqueConstraint("company_id", "month", name="uq_ledger_checkpoint"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    month = Column(Date, nullable=False)
+    opening_balance = Column(Numeric(18, 2), nullable=False, default=0)
+
+    # Foreign keys
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -50,6 +50,7 @@ class Activity(Base):
     # Foreign keys (polymorphic relationships)
     user_id = Column(Integer, ForeignKey("app_users.id"), nullable=False)
     company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)  # Multi-tenant support
     
     # Related entities (can be null)
     contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=True)
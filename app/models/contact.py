@@ -34,6 +34,10 @@ class Contact(Base):
     facebook = Column(String, nullable=True)
     linkedin = Column(String, nullable=True)
     
+    # Search fields, maintained by the contacts_search_fields trigger
+    search_text = Column(Text, nullable=True)  # lower(name, company_name, email, phone digits)
+    phone_digits = Column(String, nullable=True)
+    
     # Foreign keys
     assigned_user_id = Column(Integer, ForeignKey("app_users.id"), nullable=False)
     company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, BigInteger, DateTime, ForeignKey
+from sqlalchemy.sql import func
+from app.models.base import Base
+
+class CRMVersion(Base):
+    """Per-company counter bumped on every contact, lead, deal and activity write; cache key for CRM aggregates"""
+    __tablename__ = "crm_versions"
+    
+    company_id = Column(Integer, ForeignKey("companies.id"), primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    version = Column(BigInteger, nullable=False, default=0)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -12,6 +12,10 @@ class DealStatus(enum.Enum):
     CLOSED_WON = "closed_won"
     CLOSED_LOST = "closed_lost"
 
+class PipelineEntityType(enum.Enum):
+    DEAL = "deal"
+    LEAD = "lead"
+
 class DealPriority(enum.Enum):
     LOW = "low"
     MEDIUM = "medium"
@@ -70,3 +74,25 @@ class Deal(Base):
     tenant = relationship("Tenant", back_populates="deals")
     contact = relationship("Contact", back_populates="deals")
     lead = relationship("Lead", back_populates="deals")
+
+class DealStageHistory(Base):
+    """Append-only record of a deal or lead entering a pipeline stage"""
+    __tablename__ = "deal_stage_history"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(String(20), nullable=False)  # deal, lead
+    entity_id = Column(Integer, nullable=False)
+    from_status = Column(String(30), nullable=True)  # None when the record was created
+    to_status = Column(String(30), nullable=False)
+    
+    # Value and probability when the stage was entered
+    value = Column(Numeric(15, 2), nullable=True)
+    probability = Column(Numeric(5, 2), nullable=True)
+    
+    # Foreign keys
+    changed_by_id = Column(Integer, ForeignKey("app_users.id"), nullable=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    
+    # Timestamps
+    changed_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, Enum, Numeric, Boolean
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Text, ForeignKey, Enum, Numeric, Boolean
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from sqlalchemy.types import TypeDecorator, VARCHAR
@@ -15,6 +16,15 @@ class InvoiceStatus(enum.Enum):
 class InvoiceStatusEnum(TypeDecorator):
     """Custom enum type that handles both uppercase names and lowercase values"""
     impl = VARCHAR(20)
+    cache_ok = True  # Stateless, so compiled statements can be cached
+    
+    def load_dialect_impl(self, dialect):
+        if dialect.name == "postgresql":
+            # The column is the invoice_status enum there; typed binds and casts must target it, not VARCHAR
+            return dialect.type_descriptor(postgresql.ENUM(
+                *[status.value for status in InvoiceStatus], name="invoice_status", create_type=False
+            ))
+        return dialect.type_descriptor(self.impl)
     
     def process_bind_param(self, value, dialect):
         if value is None:
@@ -93,6 +103,7 @@ class Invoice(Base):
     tenant = relationship("Tenant", back_populates="invoices")
     contact = relationship("Contact", back_populates="invoices")
     items = relationship("InvoiceItem", back_populates="invoice", cascade="all, delete-orphan")
+    payments = relationship("InvoicePayment", back_populates="invoice", cascade="all, delete-orphan")
     transactions = relationship("Transaction", back_populates="invoice")
 
 class InvoiceItem(Base):
@@ -116,3 +127,49 @@ class InvoiceItem(Base):
     
     # Relationships
     invoice = relationship("Invoice", back_populates="items")
+
+class InvoicePayment(Base):
+    """One payment received against an invoice"""
+    __tablename__ = "invoice_payments"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    amount = Column(Numeric(15, 2), nullable=False)
+    paid_at = Column(DateTime(timezone=True), nullable=False, server_default=func.now())
+    method = Column(String, nullable=True)  # cash, click, payme, bank_transfer
+    reference = Column(String, nullable=True)  # Bank statement line, provider transaction id
+    source = Column(String(20), nullable=False, default="manual")  # manual, bank_statement, click, payme
+    
+    # Foreign keys
+    invoice_id = Column(Integer, ForeignKey("invoices.id"), nullable=False, index=True)
+    created_by_id = Column(Integer, ForeignKey("app_users.id"), nullable=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    
+    # Timestamps
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    # Relationships
+    invoice = relationship("Invoice", back_populates="payments")
+
+class InvoiceNumberCounter(Base):
+    """Last issued invoice number per tenant, company and year"""
+    __tablename__ = "invoice_number_counters"
+    
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), primary_key=True)
+    company_id = Column(Integer, ForeignKey("companies.id"), primary_key=True)
+    year = Column(Integer, primary_key=True)
+    last_number = Column(Integer, nullable=False, default=0)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class InvoiceVersion(Base):
+    """Per-company counter bumped on every invoice write; cache key for invoice aggregates"""
+    __tablename__ = "invoice_versions"
+    
+    company_id = Column(Integer, ForeignKey("companies.id"), primary_key=True)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+    version = Column(BigInteger, nullable=False, default=0)
+    
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
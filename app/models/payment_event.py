@@ -0,0 +1,48 @@
+"""
+Payment event inbox for BiznesAssistant
+Raw Click/Payme webhook events, written once by the webhook and applied later by the consumer
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Numeric, Text, JSON, UniqueConstraint
+from sqlalchemy.sql import func
+from app.models.base import Base
+import enum
+
+class PaymentProvider(enum.Enum):
+    CLICK = "click"
+    PAYME = "payme"
+
+class PaymentEventStatus(enum.Enum):
+    RESERVED = "reserved"  # Created at the provider, money not taken yet (Payme CreateTransaction)
+    PENDING = "pending"  # Paid, waiting for the consumer
+    APPLIED = "applied"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+class PaymentEvent(Base):
+    """One settled provider transaction; the unique key makes webhook retries no-ops"""
+    __tablename__ = "payment_events"
+    __table_args__ = (
+        UniqueConstraint("provider", "provider_transaction_id", name="uq_payment_events_provider_transaction"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    provider = Column(String(20), nullable=False)  # 'click' or 'payme'
+    provider_transaction_id = Column(String(64), nullable=False)
+
+    # Parsed from the payload; the invoice is resolved by the consumer, not the webhook
+    invoice_id = Column(Integer, nullable=True)
+    amount = Column(Numeric(15, 2), nullable=False)
+    paid_at = Column(DateTime(timezone=True), nullable=True)
+    payload = Column(JSON, nullable=False)
+
+    # Processing state; the raw payload is never rewritten
+    status = Column(String(20), nullable=False, default=PaymentEventStatus.PENDING.value)
+    error = Column(Text, nullable=True)
+
+    # Timestamps
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<PaymentEvent(id={self.id}, provider='{self.provider}', transaction='{self.provider_transaction_id}', status='{self.status}')>"
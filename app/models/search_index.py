@@ -0,0 +1,40 @@
+"""
+Global search index for BiznesAssistant
+One denormalized row per contact, lead, deal, invoice and task, kept in sync by database triggers
+"""
+
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, UniqueConstraint
+from sqlalchemy.sql import func
+from app.models.base import Base
+import enum
+
+class SearchEntityType(enum.Enum):
+    CONTACT = "contact"
+    LEAD = "lead"
+    DEAL = "deal"
+    INVOICE = "invoice"
+    TASK = "task"
+
+class SearchIndexEntry(Base):
+    """Searchable projection of one CRM/invoicing record; written only by the search_index_sync trigger"""
+    __tablename__ = "search_index"
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", name="uq_search_index_entity"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    entity_type = Column(String(20), nullable=False)
+    entity_id = Column(Integer, nullable=False)
+    title = Column(String, nullable=False)
+    subtitle = Column(String, nullable=True)
+    search_text = Column(Text, nullable=False)  # Lowercased, single-spaced, phone numbers as digits
+
+    # Foreign keys
+    company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
+    tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
+
+    # Timestamps
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<SearchIndexEntry(entity_type='{self.entity_type}', entity_id={self.entity_id}, title='{self.title}')>"
@@ -45,6 +45,11 @@ class Task(Base):
     tenant_id = Column(Integer, ForeignKey("tenants.id"), nullable=False)
     company_id = Column(Integer, ForeignKey("companies.id"), nullable=False)
     
+    # Related CRM entities (can be null)
+    contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=True)
+    lead_id = Column(Integer, ForeignKey("leads.id"), nullable=True)
+    deal_id = Column(Integer, ForeignKey("deals.id"), nullable=True)
+    
     # Timestamps
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -47,8 +47,9 @@ class Transaction(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     amount = Column(Numeric(15, 2), nullable=False)
-    type = Column(Enum(TransactionType), nullable=False)
-    category = Column(Enum(TransactionCategory), nullable=False)
+    # Plain VARCHAR columns in the database (see supabase_migration.sql), not native enums
+    type = Column(Enum(TransactionType, native_enum=False), nullable=False)
+    category = Column(Enum(TransactionCategory, native_enum=False), nullable=False)
     description = Column(Text, nullable=True)
     date = Column(DateTime(timezone=True), nullable=False)
     vat_included = Column(Boolean, default=True)
@@ -25,6 +25,7 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     is_verified = Column(Boolean, default=False)
     language = Column(String, default="uz")  # uz, ru, en
+    telegram_chat_id = Column(String, nullable=True)  # Bot chat for reminders; email is used when unset
     email_verification_token = Column(String, nullable=True)
     email_verification_expires = Column(DateTime(timezone=True), nullable=True)
     password_reset_token = Column(String, nullable=True)
@@ -1,17 +1,28 @@
 from typing import List, Optional
-from datetime import datetime, date
-from fastapi import APIRouter, Depends, Query, HTTPException
+from datetime import datetime, date, timedelta
+from fastapi import APIRouter, Depends, Query, HTTPException, status, UploadFile, File
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
+from sqlalchemy import func, and_, insert
 
 from app.database import get_db
 from app.models.user import User
+from app.models.tenant import Tenant
 from app.models.transaction import Transaction, TransactionType, TransactionCategory
-from app.schemas.transaction import TransactionCreate, TransactionUpdate, TransactionResponse
+from app.schemas.transaction import (
+    TransactionCreate, TransactionUpdate, TransactionResponse, TransactionBatchCreate, TransactionBatchUpdate
+)
+from app.services.accounting_rollup import AccountingRollupService, mark_rollups_stale
+from app.services.ledger_service import LedgerService
+from app.services.tax_service import calculate_transaction_taxes, calculate_transaction_taxes_many
+from app.services.transaction_import import TransactionImportService, ImportFormatError
+from app.services.usage_service import UsageService
 from app.utils.auth import get_current_active_user, get_current_tenant
 
 router = APIRouter()
 
+# Fields that feed the VAT and income tax calculation
+TAX_INPUT_FIELDS = {"amount", "vat_included", "type"}
+
 @router.post("/transactions", response_model=TransactionResponse)
 async def create_transaction(
     transaction: TransactionCreate,
@@ -34,25 +45,165 @@ async def create_transaction(
     )
     
     # Calculate VAT and tax amounts
-    if db_transaction.vat_included:
-        db_transaction.vat_amount = float(db_transaction.amount) * 0.12  # 12% VAT
-        net_amount = float(db_transaction.amount) - db_transaction.vat_amount
-    else:
-        db_transaction.vat_amount = 0
-        net_amount = float(db_transaction.amount)
-    
-    # Calculate tax amount (simplified for SMEs)
-    if db_transaction.type == TransactionType.INCOME:
-        db_transaction.tax_amount = net_amount * 0.15  # 15% income tax
-    else:
-        db_transaction.tax_amount = 0
+    db_transaction.vat_amount, db_transaction.tax_amount = calculate_transaction_taxes(
+        db_transaction.amount, db_transaction.vat_included, db_transaction.type
+    )
     
     db.add(db_transaction)
+    mark_rollups_stale(db, current_user.company_id, [db_transaction.date])
     db.commit()
     db.refresh(db_transaction)
     
     return db_transaction
 
+@router.post("/transactions/batch", response_model=List[TransactionResponse])
+def create_transactions_batch(
+    batch: TransactionBatchCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Create many transactions with a single insert and commit."""
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User not associated with any company"
+        )
+    
+    # The monthly plan limit applies to the whole batch, as for imports
+    tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+    remaining_quota = UsageService(db).get_remaining_quota(
+        current_user.company_id,
+        tenant.subscription_tier if tenant else "freemium",
+        "transactions"
+    )
+    if remaining_quota is not None and len(batch.items) > remaining_quota:
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Monthly transaction limit exceeded: {remaining_quota} remaining, {len(batch.items)} requested"
+        )
+    
+    taxes = calculate_transaction_taxes_many(
+        [(item.amount, item.vat_included, item.type) for item in batch.items]
+    )
+    
+    records = []
+    for item, (vat_amount, tax_amount) in zip(batch.items, taxes):
+        records.append({
+            **item.dict(),
+            "vat_amount": vat_amount,
+            "tax_amount": tax_amount,
+            "user_id": current_user.id,
+            "company_id": current_user.company_id,
+            "tenant_id": tenant_id
+        })
+    
+    created = db.scalars(insert(Transaction).returning(Transaction), records).all()
+    mark_rollups_stale(db, current_user.company_id, [item.date for item in batch.items])
+    
+    # Serialize before commit expires the returned rows
+    response = [TransactionResponse.model_validate(transaction) for transaction in created]
+    db.commit()
+    return response
+
+@router.patch("/transactions/batch", response_model=List[TransactionResponse])
+def update_transactions_batch(
+    batch: TransactionBatchUpdate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Update many transactions in one transaction."""
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User not associated with any company"
+        )
+    
+    ids = [item.id for item in batch.items]
+    if len(set(ids)) != len(ids):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Each transaction may appear only once per batch"
+        )
+    
+    transactions = {
+        transaction.id: transaction
+        for transaction in db.query(Transaction).filter(
+            and_(
+                Transaction.id.in_(ids),
+                Transaction.company_id == current_user.company_id,
+                Transaction.tenant_id == tenant_id
+            )
+        ).all()
+    }
+    
+    missing = [transaction_id for transaction_id in ids if transaction_id not in transactions]
+    if missing:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Transactions not found: {missing}"
+        )
+    
+    recalculate = []
+    touched_dates = []
+    for item in batch.items:
+        transaction = transactions[item.id]
+        update_data = item.dict(exclude_unset=True, exclude={"id"})
+        touched_dates += [transaction.date, update_data.get("date")]
+        for field, value in update_data.items():
+            setattr(transaction, field, value)
+        if TAX_INPUT_FIELDS.intersection(update_data):
+            recalculate.append(transaction)
+    
+    taxes = calculate_transaction_taxes_many(
+        [(t.amount, t.vat_included, t.type) for t in recalculate]
+    )
+    for transaction, (vat_amount, tax_amount) in zip(recalculate, taxes):
+        transaction.vat_amount = vat_amount
+        transaction.tax_amount = tax_amount
+    
+    mark_rollups_stale(db, current_user.company_id, touched_dates)
+    db.commit()
+    
+    # Reload all rows in one query instead of refreshing them one by one
+    updated = db.query(Transaction).filter(Transaction.id.in_(ids)).all()
+    order = {transaction_id: position for position, transaction_id in enumerate(ids)}
+    return sorted(updated, key=lambda transaction: order[transaction.id])
+
+@router.post("/transactions/import")
+def import_transactions(
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Bulk import transactions from a CSV or XLSX file."""
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User not associated with any company"
+        )
+    
+    # Respect the monthly plan limit for the whole file
+    tenant = db.query(Tenant).filter(Tenant.id == tenant_id).first()
+    remaining_quota = UsageService(db).get_remaining_quota(
+        current_user.company_id,
+        tenant.subscription_tier if tenant else "freemium",
+        "transactions"
+    )
+    
+    importer = TransactionImportService(db, tenant_id, current_user.company_id, current_user.id)
+    try:
+        return importer.import_file(file.file, file.filename, remaining_quota=remaining_quota, dry_run=dry_run)
+    except ImportFormatError as e:
+        db.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=str(e)
+        )
+
 @router.get("/transactions", response_model=List[TransactionResponse])
 async def get_transactions(
     skip: int = 0,
@@ -89,7 +240,8 @@ async def get_transactions(
         query = query.filter(Transaction.date >= start_date)
     
     if end_date:
-        query = query.filter(Transaction.date <= end_date)
+        # Whole end day, same as the summary and ledger
+        query = query.filter(Transaction.date < end_date + timedelta(days=1))
     
     transactions = query.order_by(Transaction.date.desc()).offset(skip).limit(limit).all()
     return transactions
@@ -154,31 +306,53 @@ async def update_transaction(
         )
     
     update_data = transaction_update.dict(exclude_unset=True)
+    touched_dates = [transaction.date, update_data.get("date")]
     for field, value in update_data.items():
         setattr(transaction, field, value)
     
-    # Recalculate VAT and tax amounts if amount changed
-    if 'amount' in update_data:
-        if transaction.vat_included:
-            transaction.vat_amount = float(transaction.amount) * 0.12
-            net_amount = float(transaction.amount) - transaction.vat_amount
-        else:
-            transaction.vat_amount = 0
-            net_amount = float(transaction.amount)
-        
-        if transaction.type == TransactionType.INCOME:
-            transaction.tax_amount = net_amount * 0.15
-        else:
-            transaction.tax_amount = 0
+    # Recalculate VAT and tax amounts if any of their inputs changed
+    if TAX_INPUT_FIELDS.intersection(update_data):
+        transaction.vat_amount, transaction.tax_amount = calculate_transaction_taxes(
+            transaction.amount, transaction.vat_included, transaction.type
+        )
     
+    mark_rollups_stale(db, current_user.company_id, touched_dates)
     db.commit()
     db.refresh(transaction)
     return transaction
 
+@router.get("/ledger")
+def get_ledger(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    after_date: Optional[datetime] = None,
+    after_id: Optional[int] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Get ledger entries with running balances, paged by (date, id) cursor."""
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User not associated with any company"
+        )
+    
+    if (after_date is None) != (after_id is None):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="after_date and after_id must be given together"
+        )
+    
+    ledger = LedgerService(db, tenant_id, current_user.company_id)
+    return ledger.get_page(start_date, end_date, after_date, after_id, limit)
+
 @router.get("/summary")
 async def get_accounting_summary(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    use_rollup: bool = False,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
     tenant_id: int = Depends(get_current_tenant)
@@ -190,43 +364,73 @@ async def get_accounting_summary(
             detail="User not associated with any company"
         )
     
-    query = db.query(Transaction).filter(
-        and_(
-            Transaction.company_id == current_user.company_id,
-            Transaction.tenant_id == tenant_id
+    if use_rollup:
+        # Whole-day range served from daily rollups plus a live tail after the watermark
+        rows = AccountingRollupService(db, tenant_id, current_user.company_id).grouped_totals(start_date, end_date)
+    else:
+        query = db.query(Transaction).filter(
+            and_(
+                Transaction.company_id == current_user.company_id,
+                Transaction.tenant_id == tenant_id
+            )
         )
-    )
-    
-    if start_date:
-        query = query.filter(Transaction.date >= start_date)
-    
-    if end_date:
-        query = query.filter(Transaction.date <= end_date)
-    
-    # Calculate totals
-    income_total = query.filter(Transaction.type == TransactionType.INCOME).with_entities(
-        func.sum(Transaction.amount)
-    ).scalar() or 0
+        
+        if start_date:
+            query = query.filter(Transaction.date >= start_date)
+        
+        if end_date:
+            # Whole end day, same as the rollup path
+            query = query.filter(Transaction.date < end_date + timedelta(days=1))
+        
+        # One pass over the filtered set; every total is derived from these groups
+        rows = query.with_entities(
+            Transaction.type,
+            Transaction.category,
+            func.count(Transaction.id),
+            func.sum(Transaction.amount),
+            func.sum(Transaction.vat_amount),
+            func.sum(Transaction.tax_amount)
+        ).group_by(Transaction.type, Transaction.category).all()
     
-    expense_total = query.filter(Transaction.type == TransactionType.EXPENSE).with_entities(
-        func.sum(Transaction.amount)
-    ).scalar() or 0
+    return _build_summary(rows)
+
+@router.post("/rollups/rebuild")
+def rebuild_accounting_rollups(
+    through: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Bring daily rollups up to date (defaults to yesterday)."""
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User not associated with any company"
+        )
     
-    vat_total = query.with_entities(func.sum(Transaction.vat_amount)).scalar() or 0
-    tax_total = query.with_entities(func.sum(Transaction.tax_amount)).scalar() or 0
+    return AccountingRollupService(db, tenant_id, current_user.company_id).rebuild(through)
+
+def _build_summary(rows) -> dict:
+    """Turn (type, category, count, amount, vat, tax) groups into the summary payload."""
+    totals = {TransactionType.INCOME: 0, TransactionType.EXPENSE: 0}
+    by_category = {TransactionType.INCOME: [], TransactionType.EXPENSE: []}
+    vat_total = 0
+    tax_total = 0
     
-    # Transaction counts by category
-    income_by_category = query.filter(Transaction.type == TransactionType.INCOME).with_entities(
-        Transaction.category,
-        func.count(Transaction.id),
-        func.sum(Transaction.amount)
-    ).group_by(Transaction.category).all()
+    for type_, category, count, amount, vat, tax in rows:
+        amount = amount or 0
+        vat_total += vat or 0
+        tax_total += tax or 0
+        if type_ in totals:
+            totals[type_] += amount
+            by_category[type_].append({
+                "category": category.value if hasattr(category, 'value') else str(category),
+                "count": count,
+                "total": float(amount)
+            })
     
-    expense_by_category = query.filter(Transaction.type == TransactionType.EXPENSE).with_entities(
-        Transaction.category,
-        func.count(Transaction.id),
-        func.sum(Transaction.amount)
-    ).group_by(Transaction.category).all()
+    income_total = totals[TransactionType.INCOME]
+    expense_total = totals[TransactionType.EXPENSE]
     
     return {
         "total_income": float(income_total),
@@ -234,18 +438,6 @@ async def get_accounting_summary(
         "net_profit": float(income_total - expense_total),
         "total_vat": float(vat_total),
         "total_tax": float(tax_total),
-        "income_by_category": [
-            {
-                "category": cat[0].value if hasattr(cat[0], 'value') else str(cat[0]),
-                "count": cat[1],
-                "total": float(cat[2])
-            } for cat in income_by_category
-        ],
-        "expense_by_category": [
-            {
-                "category": cat[0].value if hasattr(cat[0], 'value') else str(cat[0]),
-                "count": cat[1],
-                "total": float(cat[2])
-            } for cat in expense_by_category
-        ]
+        "income_by_category": by_category[TransactionType.INCOME],
+        "expense_by_category": by_category[TransactionType.EXPENSE]
     }
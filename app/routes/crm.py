@@ -1,6 +1,6 @@
 from typing import List, Optional
 from datetime import date, datetime
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, status, UploadFile, File
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
@@ -8,12 +8,20 @@ from app.database import get_db
 from app.models.user import User
 from app.models.contact import Contact, ContactType
 from app.models.lead import Lead, LeadStatus, LeadSource
-from app.models.deal import Deal, DealStatus, DealPriority
+from app.models.deal import Deal, DealStatus, DealPriority, PipelineEntityType
 from app.models.activity import Activity, ActivityType
-from app.schemas.contact import ContactCreate, ContactUpdate, ContactResponse
+from app.schemas.contact import ContactCreate, ContactUpdate, ContactResponse, ContactMergeRequest
 from app.schemas.lead import LeadCreate, LeadUpdate, LeadResponse
 from app.schemas.deal import DealCreate, DealUpdate, DealResponse
 from app.schemas.activity import ActivityCreate, ActivityUpdate, ActivityResponse
+from app.services.contact_dedup import DEFAULT_MIN_SCORE, find_duplicate_contacts, merge_contacts
+from app.services.contact_search import search_contacts
+from app.services.crm_import import IMPORTERS
+from app.services.crm_summary import get_cached_crm_summary
+from app.services.crm_timeline import DEFAULT_TIMELINE_LIMIT, get_timeline
+from app.services.crm_versions import bump_crm_version
+from app.services.pipeline_analytics import get_cached_pipeline_analytics, record_stage_change
+from app.services.spreadsheet_import import ImportFormatError
 from app.utils.auth import get_current_active_user, get_current_tenant
 
 router = APIRouter()
@@ -40,6 +48,7 @@ async def create_contact(
         assigned_user_id=current_user.id
     )
     db.add(db_contact)
+    bump_crm_version(db, tenant_id, current_user.company_id)
     db.commit()
     db.refresh(db_contact)
     return db_contact
@@ -61,6 +70,9 @@ async def get_contacts(
             detail="User not associated with any company"
         )
     
+    if search:
+        return search_contacts(db, tenant_id, current_user.company_id, search, contact_type, skip, limit)
+    
     query = db.query(Contact).filter(
         and_(
             Contact.company_id == current_user.company_id,
@@ -71,17 +83,59 @@ async def get_contacts(
     if contact_type:
         query = query.filter(Contact.type == contact_type)
     
-    if search:
-        query = query.filter(
-            Contact.name.ilike(f"%{search}%") |
-            Contact.email.ilike(f"%{search}%") |
-            Contact.phone.ilike(f"%{search}%") |
-            Contact.company_name.ilike(f"%{search}%")
-        )
-    
     contacts = query.offset(skip).limit(limit).all()
     return contacts
 
+@router.post("/import/{entity}")
+def import_crm_records(
+    entity: str,
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Bulk import contacts or leads from a CSV or XLSX file, skipping invalid and duplicate rows."""
+    importer_class = IMPORTERS.get(entity)
+    if importer_class is None:
+        raise HTTPException(status_code=404, detail=f"Import target must be one of: {', '.join(IMPORTERS)}")
+    
+    importer = importer_class(db, tenant_id, current_user.company_id or 1, current_user.id)
+    try:
+        return importer.import_file(file.file, file.filename, dry_run=dry_run)
+    except ImportFormatError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/contacts/duplicates")
+async def get_duplicate_contacts(
+    min_score: float = DEFAULT_MIN_SCORE,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Groups of contacts sharing an INN, phone or email with similar names."""
+    groups = find_duplicate_contacts(db, tenant_id, current_user.company_id or 1, min_score)
+    return {"groups": groups, "total": len(groups)}
+
+@router.post("/contacts/{contact_id}/merge")
+async def merge_duplicate_contacts(
+    contact_id: int,
+    merge: ContactMergeRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Merge duplicates into this contact, moving their invoices, transactions, leads, deals, activities and tasks."""
+    result = merge_contacts(db, tenant_id, current_user.company_id or 1, contact_id, merge.duplicate_ids)
+    if result is None:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Contact not found")
+    
+    bump_crm_version(db, tenant_id, current_user.company_id or 1)
+    db.commit()
+    return {"message": "Contacts merged successfully", **result}
+
 @router.get("/contacts/{contact_id}", response_model=ContactResponse)
 async def get_contact(
     contact_id: int,
@@ -139,6 +193,7 @@ async def update_contact(
     for field, value in update_data.items():
         setattr(contact, field, value)
     
+    bump_crm_version(db, tenant_id, current_user.company_id)
     db.commit()
     db.refresh(contact)
     return contact
@@ -165,6 +220,9 @@ async def create_lead(
         assigned_user_id=current_user.id
     )
     db.add(db_lead)
+    db.flush()
+    record_stage_change(db, PipelineEntityType.LEAD, db_lead, user_id=current_user.id)
+    bump_crm_version(db, tenant_id, current_user.company_id)
     db.commit()
     db.refresh(db_lead)
     return db_lead
@@ -255,6 +313,7 @@ async def update_lead(
     if lead is None:
         raise HTTPException(status_code=404, detail="Lead not found")
     
+    previous_status = lead.status
     update_data = lead_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(lead, field, value)
@@ -263,6 +322,8 @@ async def update_lead(
     if lead.status == LeadStatus.CONVERTED and not lead.converted_date:
         lead.converted_date = datetime.utcnow()
     
+    record_stage_change(db, PipelineEntityType.LEAD, lead, previous_status, current_user.id)
+    bump_crm_version(db, tenant_id, current_user.company_id)
     db.commit()
     db.refresh(lead)
     return lead
@@ -289,6 +350,9 @@ async def create_deal(
         assigned_user_id=current_user.id
     )
     db.add(db_deal)
+    db.flush()
+    record_stage_change(db, PipelineEntityType.DEAL, db_deal, user_id=current_user.id)
+    bump_crm_version(db, tenant_id, current_user.company_id)
     db.commit()
     db.refresh(db_deal)
     return db_deal
@@ -379,6 +443,7 @@ async def update_deal(
     if deal is None:
         raise HTTPException(status_code=404, detail="Deal not found")
     
+    previous_status = deal.status
     update_data = deal_update.dict(exclude_unset=True)
     for field, value in update_data.items():
         setattr(deal, field, value)
@@ -387,6 +452,8 @@ async def update_deal(
     if deal.status in [DealStatus.CLOSED_WON, DealStatus.CLOSED_LOST] and not deal.actual_close_date:
         deal.actual_close_date = datetime.utcnow()
     
+    record_stage_change(db, PipelineEntityType.DEAL, deal, previous_status, current_user.id)
+    bump_crm_version(db, tenant_id, current_user.company_id)
     db.commit()
     db.refresh(deal)
     return deal
@@ -409,9 +476,11 @@ async def create_activity(
     db_activity = Activity(
         **activity.dict(),
         user_id=current_user.id,
-        company_id=current_user.company_id
+        company_id=current_user.company_id,
+        tenant_id=tenant_id
     )
     db.add(db_activity)
+    bump_crm_version(db, tenant_id, current_user.company_id)
     db.commit()
     db.refresh(db_activity)
     return db_activity
@@ -435,7 +504,7 @@ async def get_activities(
     query = db.query(Activity).filter(
         and_(
             Activity.company_id == current_user.company_id,
-            # Note: Activity model doesn't have tenant_id, only company_id
+            Activity.tenant_id == tenant_id
         )
     )
     
@@ -445,6 +514,50 @@ async def get_activities(
     activities = query.order_by(Activity.created_at.desc()).offset(skip).limit(limit).all()
     return activities
 
+# Timeline endpoints
+def _timeline_or_404(db: Session, tenant_id: int, company_id: int, entity_type: str, entity_id: int,
+                     limit: int, before: Optional[datetime]):
+    timeline = get_timeline(db, tenant_id, company_id, entity_type, entity_id, limit, before)
+    if timeline is None:
+        raise HTTPException(status_code=404, detail=f"{entity_type.capitalize()} not found")
+    return timeline
+
+@router.get("/contacts/{contact_id}/timeline")
+async def get_contact_timeline(
+    contact_id: int,
+    limit: int = Query(DEFAULT_TIMELINE_LIMIT, ge=1, le=200),
+    before: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Contact with its activities, tasks, invoices, leads and deals."""
+    return _timeline_or_404(db, tenant_id, current_user.company_id or 1, "contact", contact_id, limit, before)
+
+@router.get("/leads/{lead_id}/timeline")
+async def get_lead_timeline(
+    lead_id: int,
+    limit: int = Query(DEFAULT_TIMELINE_LIMIT, ge=1, le=200),
+    before: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Lead with its activities, tasks and its contact's invoices."""
+    return _timeline_or_404(db, tenant_id, current_user.company_id or 1, "lead", lead_id, limit, before)
+
+@router.get("/deals/{deal_id}/timeline")
+async def get_deal_timeline(
+    deal_id: int,
+    limit: int = Query(DEFAULT_TIMELINE_LIMIT, ge=1, le=200),
+    before: Optional[datetime] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Deal with its activities, tasks and its contact's invoices."""
+    return _timeline_or_404(db, tenant_id, current_user.company_id or 1, "deal", deal_id, limit, before)
+
 @router.get("/crm-summary")
 async def get_crm_summary(
     db: Session = Depends(get_db),
@@ -458,57 +571,22 @@ async def get_crm_summary(
             detail="User not associated with any company"
         )
     
-    # Count contacts by type
-    contacts_by_type = db.query(Contact.type, db.func.count(Contact.id)).filter(
-        and_(
-            Contact.company_id == current_user.company_id,
-            Contact.tenant_id == tenant_id
-        )
-    ).group_by(Contact.type).all()
-    
-    # Count leads by status
-    leads_by_status = db.query(Lead.status, db.func.count(Lead.id)).filter(
-        and_(
-            Lead.company_id == current_user.company_id,
-            Lead.tenant_id == tenant_id
-        )
-    ).group_by(Lead.status).all()
-    
-    # Count deals by status
-    deals_by_status = db.query(Deal.status, db.func.count(Deal.id)).filter(
-        and_(
-            Deal.company_id == current_user.company_id,
-            Deal.tenant_id == tenant_id
-        )
-    ).group_by(Deal.status).all()
-    
-    # Calculate total deal value
-    total_deal_value = db.query(db.func.sum(Deal.deal_value)).filter(
-        and_(
-            Deal.company_id == current_user.company_id,
-            Deal.tenant_id == tenant_id,
-            Deal.deal_value.isnot(None)
+    return get_cached_crm_summary(db, tenant_id, current_user.company_id)
+
+@router.get("/pipeline/analytics")
+async def get_pipeline_analytics(
+    entity_type: PipelineEntityType = PipelineEntityType.DEAL,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Funnel conversion, average time in stage and probability-weighted pipeline value."""
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User not associated with any company"
         )
-    ).scalar() or 0
     
-    # Recent activities count
-    recent_activities = db.query(db.func.count(Activity.id)).filter(
-        and_(
-            Activity.company_id == current_user.company_id,
-            Activity.created_at >= datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-        )
-    ).scalar() or 0
-    
-    return {
-        "contacts_by_type": [
-            {"type": ct[0].value, "count": ct[1]} for ct in contacts_by_type
-        ],
-        "leads_by_status": [
-            {"status": ls[0].value, "count": ls[1]} for ls in leads_by_status
-        ],
-        "deals_by_status": [
-            {"status": ds[0].value, "count": ds[1]} for ds in deals_by_status
-        ],
-        "total_deal_value": float(total_deal_value),
-        "recent_activities": recent_activities
-    }
+    return get_cached_pipeline_analytics(db, tenant_id, current_user.company_id, entity_type, start_date, end_date)
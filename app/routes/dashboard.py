@@ -13,6 +13,7 @@ from app.models.deal import Deal, DealStatus
 from app.models.kpi import KPICategory, KPIPeriod
 from app.utils.auth import get_current_active_user
 from app.services.kpi_service import KPIService
+from app.services.invoice_aging import overdue_filter
 from app.schemas.kpi import (
     KPIResponse, KPITrendResponse, ForecastRequest, ForecastResponse,
     RoleBasedDashboardResponse
@@ -71,8 +72,7 @@ async def get_dashboard_overview(
     overdue_invoices = db.query(func.count(Invoice.id)).filter(
         and_(
             Invoice.company_id == company_id,
-            Invoice.due_date < today,
-            Invoice.status != InvoiceStatus.PAID
+            overdue_filter(today)
         )
     ).scalar() or 0
     
@@ -181,14 +181,19 @@ async def get_top_clients(
     """Get top clients by total invoice amount."""
     company_id = current_user.company_id or 1
     
+    # Linked invoices group by contact, so spelling variants of a name count as one client
+    customer_name = func.coalesce(Contact.name, Invoice.customer_name)
     top_clients = db.query(
-        Invoice.customer_name,
+        Invoice.contact_id,
+        customer_name,
         func.count(Invoice.id).label('invoice_count'),
         func.sum(Invoice.total_amount).label('total_amount')
+    ).outerjoin(
+        Contact, Contact.id == Invoice.contact_id
     ).filter(
         Invoice.company_id == company_id
     ).group_by(
-        Invoice.customer_name
+        Invoice.contact_id, customer_name
     ).order_by(
         func.sum(Invoice.total_amount).desc()
     ).limit(limit).all()
@@ -196,9 +201,10 @@ async def get_top_clients(
     return {
         "top_clients": [
             {
-                "customer_name": client[0],
-                "invoice_count": client[1],
-                "total_amount": float(client[2])
+                "contact_id": client[0],
+                "customer_name": client[1],
+                "invoice_count": client[2],
+                "total_amount": float(client[3])
             }
             for client in top_clients
         ]
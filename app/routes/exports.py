@@ -0,0 +1,211 @@
+"""
+Data export routes for BiznesAssistant
+Streams transactions, invoices and contacts as CSV or XLSX
+"""
+
+from datetime import date, datetime, timedelta
+from enum import Enum
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session
+from sqlalchemy import and_
+
+from app.database import get_db
+from app.models.user import User
+from app.models.transaction import Transaction, TransactionType, TransactionCategory
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.contact import Contact, ContactType
+from app.services.export_service import (
+    EXPORT_BATCH_SIZE, CSV_MEDIA_TYPE, GZIP_MEDIA_TYPE, XLSX_MEDIA_TYPE, stream_export
+)
+from app.utils.auth import get_current_active_user, get_current_tenant
+
+router = APIRouter()
+
+class ExportFormat(str, Enum):
+    CSV = "csv"
+    XLSX = "xlsx"
+
+TRANSACTION_COLUMNS = [
+    ("id", Transaction.id),
+    ("date", Transaction.date),
+    ("type", Transaction.type),
+    ("category", Transaction.category),
+    ("amount", Transaction.amount),
+    ("vat_included", Transaction.vat_included),
+    ("vat_amount", Transaction.vat_amount),
+    ("tax_amount", Transaction.tax_amount),
+    ("description", Transaction.description),
+    ("reference_number", Transaction.reference_number),
+    ("is_reconciled", Transaction.is_reconciled),
+    ("contact_id", Transaction.contact_id),
+    ("invoice_id", Transaction.invoice_id),
+    ("created_at", Transaction.created_at),
+]
+
+INVOICE_COLUMNS = [
+    ("id", Invoice.id),
+    ("invoice_number", Invoice.invoice_number),
+    ("status", Invoice.status),
+    ("customer_name", Invoice.customer_name),
+    ("customer_tax_id", Invoice.customer_tax_id),
+    ("customer_phone", Invoice.customer_phone),
+    ("customer_email", Invoice.customer_email),
+    ("issue_date", Invoice.issue_date),
+    ("due_date", Invoice.due_date),
+    ("subtotal", Invoice.subtotal),
+    ("vat_amount", Invoice.vat_amount),
+    ("total_amount", Invoice.total_amount),
+    ("paid_amount", Invoice.paid_amount),
+    ("remaining_amount", Invoice.remaining_amount),
+    ("paid_date", Invoice.paid_date),
+    ("payment_method", Invoice.payment_method),
+    ("contact_id", Invoice.contact_id),
+    ("created_at", Invoice.created_at),
+]
+
+CONTACT_COLUMNS = [
+    ("id", Contact.id),
+    ("name", Contact.name),
+    ("company_name", Contact.company_name),
+    ("type", Contact.type),
+    ("email", Contact.email),
+    ("phone", Contact.phone),
+    ("tax_id", Contact.tax_id),
+    ("address", Contact.address),
+    ("bank_name", Contact.bank_name),
+    ("bank_account", Contact.bank_account),
+    ("mfo", Contact.mfo),
+    ("telegram", Contact.telegram),
+    ("is_active", Contact.is_active),
+    ("created_at", Contact.created_at),
+]
+
+def _require_company(current_user: User) -> int:
+    if not current_user.company_id:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User not associated with any company"
+        )
+    return current_user.company_id
+
+def _export_response(query, columns, name: str, export_format: ExportFormat, compress: bool) -> StreamingResponse:
+    """Stream a projected query through a server-side cursor."""
+    headers = [header for header, _ in columns]
+    rows = query.with_entities(*[column for _, column in columns]).yield_per(EXPORT_BATCH_SIZE)
+
+    body = stream_export(headers, rows, export_format.value, sheet_title=name.capitalize(), compress=compress)
+
+    filename = f"{name}-{datetime.utcnow().strftime('%Y%m%d')}.{export_format.value}"
+    if export_format == ExportFormat.XLSX:
+        media_type = XLSX_MEDIA_TYPE
+    elif compress:
+        media_type = GZIP_MEDIA_TYPE
+        filename += ".gz"
+    else:
+        media_type = CSV_MEDIA_TYPE
+
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/transactions")
+def export_transactions(
+    export_format: ExportFormat = ExportFormat.CSV,
+    compress: bool = False,
+    transaction_type: Optional[TransactionType] = None,
+    category: Optional[TransactionCategory] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Export transactions as CSV or XLSX."""
+    company_id = _require_company(current_user)
+
+    query = db.query(Transaction).filter(
+        and_(
+            Transaction.company_id == company_id,
+            Transaction.tenant_id == tenant_id
+        )
+    )
+
+    if transaction_type:
+        query = query.filter(Transaction.type == transaction_type)
+
+    if category:
+        query = query.filter(Transaction.category == category)
+
+    if start_date:
+        query = query.filter(Transaction.date >= start_date)
+
+    if end_date:
+        # Whole end day, same as the transaction list and summary
+        query = query.filter(Transaction.date < end_date + timedelta(days=1))
+
+    query = query.order_by(Transaction.date, Transaction.id)
+    return _export_response(query, TRANSACTION_COLUMNS, "transactions", export_format, compress)
+
+@router.get("/invoices")
+def export_invoices(
+    export_format: ExportFormat = ExportFormat.CSV,
+    compress: bool = False,
+    status: Optional[InvoiceStatus] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Export invoices as CSV or XLSX."""
+    company_id = _require_company(current_user)
+
+    query = db.query(Invoice).filter(
+        and_(
+            Invoice.company_id == company_id,
+            Invoice.tenant_id == tenant_id
+        )
+    )
+
+    if status:
+        query = query.filter(Invoice.status == status)
+
+    if start_date:
+        query = query.filter(Invoice.issue_date >= start_date)
+
+    if end_date:
+        # Whole end day, same as the invoice list and summary
+        query = query.filter(Invoice.issue_date < end_date + timedelta(days=1))
+
+    query = query.order_by(Invoice.issue_date, Invoice.id)
+    return _export_response(query, INVOICE_COLUMNS, "invoices", export_format, compress)
+
+@router.get("/contacts")
+def export_contacts(
+    export_format: ExportFormat = ExportFormat.CSV,
+    compress: bool = False,
+    contact_type: Optional[ContactType] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Export contacts as CSV or XLSX."""
+    company_id = _require_company(current_user)
+
+    query = db.query(Contact).filter(
+        and_(
+            Contact.company_id == company_id,
+            Contact.tenant_id == tenant_id
+        )
+    )
+
+    if contact_type:
+        query = query.filter(Contact.type == contact_type)
+
+    query = query.order_by(Contact.id)
+    return _export_response(query, CONTACT_COLUMNS, "contacts", export_format, compress)
@@ -1,44 +1,62 @@
-from typing import List, Optional
-from datetime import datetime, date
+import enum
+import logging
+from typing import List, Optional, Union
+from datetime import datetime, date, timedelta
 from decimal import Decimal
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, func
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import and_, func, insert, update
 
+from app.config import settings
 from app.database import get_db
 from app.models.user import User
-from app.models.invoice import Invoice, InvoiceItem, InvoiceStatus
-from app.schemas.invoice import InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoiceItemCreate
+from app.models.company import Company
+from app.models.invoice import Invoice, InvoiceItem, InvoicePayment, InvoiceStatus
+from app.schemas.invoice import (
+    InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoiceSummaryResponse, InvoiceItemCreate, InvoiceItemUpsert,
+    InvoicePaymentResponse, BulkPaymentRequest
+)
 from app.utils.auth import get_current_active_user, get_current_tenant
+from app.services.contact_dedup import resolve_contact_id
+from app.services.invoice_numbering import allocate_invoice_number
+from app.services.invoice_payments import (
+    InvoicePaymentError, InvoicesNotFoundError, apply_payments, resolve_invoice_numbers
+)
+from app.services.invoice_aging import get_aging_report
+from app.services.invoice_pricing import price_invoice
+from app.services.invoice_summary import compute_invoice_summary, get_cached_invoice_summary
+from app.services.invoice_versions import bump_invoice_version
+from app.services.invoice_pdf import (
+    PDF_MEDIA_TYPE, ZIP_MEDIA_TYPE, PDFRenderError, iter_invoice_zip, prepare_batch, render_invoice_pdf
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+class InvoiceView(str, enum.Enum):
+    SUMMARY = "summary"
+    FULL = "full"
+
+# Columns loaded for the summary view; mirrors InvoiceSummaryResponse
+SUMMARY_COLUMNS = [
+    Invoice.id,
+    Invoice.invoice_number,
+    Invoice.status,
+    Invoice.customer_name,
+    Invoice.issue_date,
+    Invoice.due_date,
+    Invoice.total_amount,
+    Invoice.paid_amount,
+    Invoice.remaining_amount,
+    Invoice.contact_id,
+    Invoice.created_at
+]
+
 def generate_invoice_number(db: Session, company_id: int, tenant_id: int) -> str:
-    """Generate unique invoice number with tenant ID for guaranteed uniqueness."""
-    current_year = datetime.now().year
-    # New format: INV-TENANT{tenant_id}-YEAR-{6-digit number}
-    prefix = f"INV-T{tenant_id}-{current_year}-"
-    
-    # Get last invoice number for this specific tenant and year
-    last_invoice = db.query(Invoice).filter(
-        and_(
-            Invoice.company_id == company_id,
-            Invoice.tenant_id == tenant_id,
-            Invoice.invoice_number.like(f"{prefix}%")
-        )
-    ).order_by(Invoice.invoice_number.desc()).first()
-    
-    if last_invoice:
-        # Extract number part and increment
-        try:
-            last_num = int(last_invoice.invoice_number.split("-")[-1])
-            new_num = last_num + 1
-        except (ValueError, IndexError):
-            new_num = 1
-    else:
-        new_num = 1
-    
-    return f"{prefix}{new_num:06d}"
+    """Reserve the next invoice number; the counter row stays locked until commit/rollback."""
+    return allocate_invoice_number(db, tenant_id, company_id)
 
 @router.post("/", response_model=InvoiceResponse)
 def create_invoice(
@@ -52,86 +70,57 @@ def create_invoice(
     company_id = current_user.company_id or 1
     
     try:
-        # Debug: Print incoming data
-        print(f"DEBUG: Invoice data: {invoice.dict()}")
-        print(f"DEBUG: Company ID: {company_id}, Tenant ID: {tenant_id}")
-        
-        # Generate invoice number with the correct company_id and tenant_id
-        invoice_number = generate_invoice_number(db, company_id, tenant_id)
-        print(f"DEBUG: Generated invoice number: {invoice_number}")
-        
         # Create invoice
         invoice_data = invoice.dict(exclude={"items"})
-        print(f"DEBUG: Invoice data for creation: {invoice_data}")
+        if invoice_data.get("contact_id") is None:
+            invoice_data["contact_id"] = resolve_contact_id(
+                db, tenant_id, company_id, invoice.customer_tax_id, invoice.customer_phone,
+                invoice.customer_email, invoice.customer_name
+            )
         
         db_invoice = Invoice(
             **invoice_data,
-            invoice_number=invoice_number,
             created_by_id=current_user.id,
             company_id=company_id,
             tenant_id=tenant_id
         )
-        print(f"DEBUG: Invoice object created successfully")
-        
-        # Calculate totals from items
-        subtotal = Decimal('0')
-        for item_data in invoice.items:
-            # Use provided line_total or total_price, or calculate if not provided
-            if hasattr(item_data, 'line_total') and item_data.line_total is not None:
-                line_total = Decimal(str(item_data.line_total))
-            elif hasattr(item_data, 'total_price') and item_data.total_price is not None:
-                line_total = Decimal(str(item_data.total_price))
-            else:
-                line_total = Decimal(str(item_data.quantity)) * Decimal(str(item_data.unit_price))
-                if item_data.discount:
-                    line_total *= (Decimal('1') - Decimal(str(item_data.discount)) / Decimal('100'))
-            
-            item_vat = line_total * Decimal(str(item_data.vat_rate)) / Decimal('100')
-            subtotal += line_total
         
-        db_invoice.subtotal = subtotal
-        db_invoice.vat_amount = subtotal * Decimal('0.12')  # 12% VAT
-        db_invoice.total_amount = subtotal + db_invoice.vat_amount
+        # Price all items in a single pass
+        pricing = price_invoice(invoice.items)
+        db_invoice.subtotal = pricing["subtotal"]
+        db_invoice.vat_amount = pricing["vat_amount"]
+        db_invoice.total_amount = pricing["total_amount"]
         db_invoice.remaining_amount = db_invoice.total_amount
         
+        # Allocate the number last so the counter row is locked only until commit
+        db_invoice.invoice_number = generate_invoice_number(db, company_id, tenant_id)
+        
         db.add(db_invoice)
         db.flush()  # Get the ID without committing
         
-        print(f"DEBUG: Invoice saved with ID: {db_invoice.id}")
-        
-        # Create invoice items
-        for item_data in invoice.items:
-            # Use provided line_total or total_price, or calculate if not provided
-            if hasattr(item_data, 'line_total') and item_data.line_total is not None:
-                line_total = Decimal(str(item_data.line_total))
-            elif hasattr(item_data, 'total_price') and item_data.total_price is not None:
-                line_total = Decimal(str(item_data.total_price))
-            else:
-                line_total = Decimal(str(item_data.quantity)) * Decimal(str(item_data.unit_price))
-                if item_data.discount:
-                    line_total *= (Decimal('1') - Decimal(str(item_data.discount)) / Decimal('100'))
-            
-            db_item = InvoiceItem(
-                invoice_id=db_invoice.id,
-                description=item_data.description,
-                quantity=item_data.quantity,
-                unit_price=item_data.unit_price,
-                discount=item_data.discount,
-                vat_rate=item_data.vat_rate,
-                line_total=line_total
+        # Create invoice items in one bulk insert
+        if pricing["lines"]:
+            db.execute(
+                insert(InvoiceItem),
+                [{**line, "invoice_id": db_invoice.id} for line in pricing["lines"]]
             )
-            db.add(db_item)
         
+        bump_invoice_version(db, tenant_id, company_id)
         db.commit()
         db.refresh(db_invoice)
+        logger.debug(
+            "invoice.created",
+            extra={"invoice_id": db_invoice.id, "invoice_number": db_invoice.invoice_number,
+                   "item_count": len(pricing["lines"])}
+        )
         return db_invoice
     
     except Exception as e:
         db.rollback()
-        print(f"DEBUG: Error creating invoice: {str(e)}")
-        print(f"DEBUG: Error type: {type(e)}")
-        import traceback
-        print(f"DEBUG: Full traceback: {traceback.format_exc()}")
+        logger.exception(
+            "invoice.create_failed",
+            extra={"tenant_id": tenant_id, "company_id": company_id, "item_count": len(invoice.items)}
+        )
         
         # Check if it's a duplicate key error
         if "duplicate key" in str(e) and "invoice_number" in str(e):
@@ -156,7 +145,7 @@ def create_invoice_legacy(
     """Legacy route for frontend compatibility - redirects to main create_invoice."""
     return create_invoice(invoice, db, current_user, tenant_id)
 
-@router.get("/", response_model=List[InvoiceResponse])
+@router.get("/", response_model=List[Union[InvoiceResponse, InvoiceSummaryResponse]])
 def get_invoices(
     skip: int = 0,
     limit: int = 100,
@@ -164,12 +153,16 @@ def get_invoices(
     customer_name: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    view: InvoiceView = InvoiceView.FULL,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
     tenant_id: int = Depends(get_current_tenant)
 ):
-    """Get invoices with filters."""
-    print(f"DEBUG: get_invoices called with skip={skip}, limit={limit}, status={status}")
+    """Get invoices with filters.
+
+    view=summary returns a compact projection without items; view=full loads
+    items for the whole page in one extra query.
+    """
     try:
         # Use company_id with fallback, same as in create_invoice
         company_id = current_user.company_id or 1
@@ -190,17 +183,66 @@ def get_invoices(
             query = query.filter(Invoice.issue_date >= start_date)
         
         if end_date:
-            query = query.filter(Invoice.issue_date <= end_date)
+            # Whole end day, same as the summary
+            query = query.filter(Invoice.issue_date < end_date + timedelta(days=1))
         
-        invoices = query.order_by(Invoice.created_at.desc()).offset(skip).limit(limit).all()
-        print(f"DEBUG: Found {len(invoices)} invoices")
+        query = query.order_by(Invoice.created_at.desc()).offset(skip).limit(limit)
+        if view == InvoiceView.SUMMARY:
+            invoices = [InvoiceSummaryResponse.model_validate(row) for row in query.with_entities(*SUMMARY_COLUMNS)]
+        else:
+            invoices = [InvoiceResponse.model_validate(invoice) for invoice in query.options(selectinload(Invoice.items))]
+        logger.debug(
+            "invoice.list",
+            extra={"skip": skip, "limit": limit, "view": view.value, "status": status,
+                   "count": len(invoices), "sample_rate": settings.LOG_SAMPLE_RATE}
+        )
         return invoices
-    except Exception as e:
-        print(f"DEBUG: Error in get_invoices: {str(e)}")
-        import traceback
-        print(f"DEBUG: Full traceback: {traceback.format_exc()}")
+    except Exception:
+        logger.exception("invoice.list_failed", extra={"tenant_id": tenant_id})
         raise
 
+@router.get("/summary")
+def get_invoices_summary(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    use_cache: bool = True,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Get invoices summary for dashboard.
+
+    use_cache=true reuses the last result until an invoice of the company changes.
+    """
+    company_id = current_user.company_id or 1
+    if use_cache:
+        return get_cached_invoice_summary(db, tenant_id, company_id, start_date, end_date)
+    return compute_invoice_summary(db, tenant_id, company_id, start_date, end_date)
+
+# Legacy route for frontend compatibility
+@router.get("/invoices/summary")
+def get_invoices_summary_legacy(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    use_cache: bool = True,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Legacy route for frontend compatibility - redirects to main get_invoices_summary."""
+    return get_invoices_summary(start_date, end_date, use_cache, db, current_user, tenant_id)
+
+@router.get("/aging")
+def get_invoices_aging(
+    as_of: Optional[date] = None,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Accounts receivable aging: open balances by days past due, per customer and in total."""
+    company_id = current_user.company_id or 1
+    return get_aging_report(db, tenant_id, company_id, as_of)
+
 @router.get("/{invoice_id}", response_model=InvoiceResponse)
 def get_invoice(
     invoice_id: int,
@@ -210,7 +252,7 @@ def get_invoice(
 ):
     """Get invoice by ID."""
     company_id = current_user.company_id or 1
-    invoice = db.query(Invoice).filter(
+    invoice = db.query(Invoice).options(selectinload(Invoice.items)).filter(
         and_(
             Invoice.id == invoice_id,
             Invoice.company_id == company_id,
@@ -224,7 +266,7 @@ def get_invoice(
     return invoice
 
 # Legacy route for frontend compatibility
-@router.get("/invoices", response_model=List[InvoiceResponse])
+@router.get("/invoices", response_model=List[Union[InvoiceResponse, InvoiceSummaryResponse]])
 def get_invoices_legacy(
     skip: int = 0,
     limit: int = 100,
@@ -232,12 +274,13 @@ def get_invoices_legacy(
     customer_name: Optional[str] = None,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
+    view: InvoiceView = InvoiceView.FULL,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
     tenant_id: int = Depends(get_current_tenant)
 ):
     """Legacy route for frontend compatibility - redirects to main get_invoices."""
-    return get_invoices(skip, limit, status, customer_name, start_date, end_date, db, current_user, tenant_id)
+    return get_invoices(skip, limit, status, customer_name, start_date, end_date, view, db, current_user, tenant_id)
 
 # Legacy route for frontend compatibility - MUST come after /invoices
 @router.get("/invoices/{invoice_id}", response_model=InvoiceResponse)
@@ -250,6 +293,114 @@ def get_invoice_legacy(
     """Legacy route for frontend compatibility - redirects to main get_invoice."""
     return get_invoice(invoice_id, db, current_user, tenant_id)
 
+@router.get("/pdf/batch")
+def get_invoices_pdf_batch(
+    year: int = Query(..., ge=2000, le=2100),
+    month: int = Query(..., ge=1, le=12),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Download every invoice issued in a month as PDFs in one zip archive."""
+    company_id = current_user.company_id or 1
+    start = datetime(year, month, 1)
+    end = datetime(year + month // 12, month % 12 + 1, 1)
+    
+    invoices = db.query(Invoice).options(selectinload(Invoice.items)).filter(
+        and_(
+            Invoice.company_id == company_id,
+            Invoice.tenant_id == tenant_id,
+            Invoice.issue_date >= start,
+            Invoice.issue_date < end
+        )
+    ).order_by(Invoice.issue_date, Invoice.id).limit(settings.PDF_BATCH_MAX_INVOICES + 1).all()
+    
+    if len(invoices) > settings.PDF_BATCH_MAX_INVOICES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"More than {settings.PDF_BATCH_MAX_INVOICES} invoices in this month; export them in smaller batches"
+        )
+    
+    company = db.query(Company).filter(Company.id == company_id).first()
+    jobs = prepare_batch(invoices, company)
+    filename = f"invoices_{year}_{month:02d}.zip"
+    return StreamingResponse(
+        iter_invoice_zip(jobs, settings.PDF_BATCH_CONCURRENCY),
+        media_type=ZIP_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@router.get("/{invoice_id}/pdf")
+def get_invoice_pdf(
+    invoice_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Render an invoice as PDF using its template."""
+    company_id = current_user.company_id or 1
+    invoice = db.query(Invoice).options(selectinload(Invoice.items)).filter(
+        and_(
+            Invoice.id == invoice_id,
+            Invoice.company_id == company_id,
+            Invoice.tenant_id == tenant_id
+        )
+    ).first()
+    
+    if invoice is None:
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    
+    company = db.query(Company).filter(Company.id == company_id).first()
+    try:
+        pdf = render_invoice_pdf(invoice, company)
+    except PDFRenderError as e:
+        raise HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail=str(e))
+    
+    return Response(
+        content=pdf,
+        media_type=PDF_MEDIA_TYPE,
+        headers={"Content-Disposition": f'inline; filename="{invoice.invoice_number}.pdf"'}
+    )
+
+def _sync_invoice_items(db: Session, invoice: Invoice, items: List[InvoiceItemUpsert]):
+    """Diff the submitted items against the stored ones: update kept ids, insert new, delete dropped."""
+    existing_ids = {
+        item_id for (item_id,) in db.query(InvoiceItem.id).filter(InvoiceItem.invoice_id == invoice.id).all()
+    }
+    submitted_ids = [item.id for item in items if item.id is not None]
+    unknown_ids = set(submitted_ids) - existing_ids
+    if unknown_ids:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Invoice items not found: {sorted(unknown_ids)}"
+        )
+    if len(submitted_ids) != len(set(submitted_ids)):
+        raise HTTPException(status_code=400, detail="Duplicate invoice item ids in request")
+    
+    pricing = price_invoice(items)
+    updates, inserts = [], []
+    for item, line in zip(items, pricing["lines"]):
+        if item.id is not None:
+            updates.append({**line, "id": item.id})
+        else:
+            inserts.append({**line, "invoice_id": invoice.id})
+    
+    removed_ids = existing_ids - set(submitted_ids)
+    if removed_ids:
+        db.query(InvoiceItem).filter(InvoiceItem.id.in_(removed_ids)).delete(synchronize_session=False)
+    if updates:
+        db.execute(update(InvoiceItem), updates)
+    if inserts:
+        db.execute(insert(InvoiceItem), inserts)
+    db.expire(invoice, ["items"])
+    invoice.updated_at = func.now()  # Item-only edits must still bump the version used by PDF caching
+    
+    # Update invoice totals
+    invoice.subtotal = pricing["subtotal"]
+    invoice.vat_amount = pricing["vat_amount"]
+    invoice.total_amount = pricing["total_amount"]
+    invoice.remaining_amount = invoice.total_amount - (invoice.paid_amount or 0)
+
 @router.put("/{invoice_id}", response_model=InvoiceResponse)
 def update_invoice(
     invoice_id: int,
@@ -273,49 +424,16 @@ def update_invoice(
     
     update_data = invoice_update.dict(exclude_unset=True)
     
-    # Handle items update if provided
-    if 'items' in update_data and update_data['items']:
-        # Delete existing items
-        db.query(InvoiceItem).filter(InvoiceItem.invoice_id == invoice_id).delete()
-        
-        # Recalculate totals
-        subtotal = Decimal('0')
-        
-        # Create new items
-        for item_data in update_data['items']:
-            # Use provided line_total or calculate if not provided
-            if hasattr(item_data, 'line_total') and item_data.line_total is not None:
-                line_total = Decimal(str(item_data.line_total))
-            else:
-                line_total = Decimal(str(item_data.quantity)) * Decimal(str(item_data.unit_price))
-                if item_data.discount:
-                    line_total *= (Decimal('1') - Decimal(str(item_data.discount)) / Decimal('100'))
-            
-            db_item = InvoiceItem(
-                invoice_id=invoice_id,
-                description=item_data.description,
-                quantity=item_data.quantity,
-                unit_price=item_data.unit_price,
-                discount=item_data.discount,
-                vat_rate=item_data.vat_rate,
-                line_total=line_total
-            )
-            db.add(db_item)
-            subtotal += line_total
-        
-        # Update invoice totals
-        invoice.subtotal = subtotal
-        invoice.vat_amount = subtotal * Decimal('0.12')  # 12% VAT
-        invoice.total_amount = subtotal + invoice.vat_amount
-        invoice.remaining_amount = invoice.total_amount - invoice.paid_amount
-        
-        # Remove items from update_data to avoid conflicts
-        del update_data['items']
+    # Handle items update if provided; an empty list removes every item
+    if invoice_update.items is not None:
+        _sync_invoice_items(db, invoice, invoice_update.items)
+    update_data.pop('items', None)
     
     # Update other fields
     for field, value in update_data.items():
         setattr(invoice, field, value)
     
+    bump_invoice_version(db, tenant_id, company_id)
     db.commit()
     db.refresh(invoice)
     return invoice
@@ -353,6 +471,7 @@ def send_invoice(
         raise HTTPException(status_code=404, detail="Invoice not found")
     
     invoice.status = InvoiceStatus.SENT
+    bump_invoice_version(db, tenant_id, company_id)
     db.commit()
     return {"message": "Invoice sent successfully"}
 
@@ -375,33 +494,93 @@ def mark_invoice_paid(
     current_user: User = Depends(get_current_active_user),
     tenant_id: int = Depends(get_current_tenant)
 ):
-    """Mark invoice as paid."""
+    """Record a payment against an invoice."""
+    if paid_amount <= 0:
+        raise HTTPException(status_code=400, detail="Payment amount must be positive")
+
+    try:
+        apply_payments(
+            db, tenant_id, current_user.company_id or 1,
+            [{"invoice_id": invoice_id, "amount": Decimal(str(paid_amount))}],
+            user_id=current_user.id
+        )
+    except InvoicesNotFoundError:
+        db.rollback()
+        raise HTTPException(status_code=404, detail="Invoice not found")
+    except InvoicePaymentError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    db.commit()
+    return {"message": "Payment recorded successfully"}
+
+@router.get("/{invoice_id}/payments", response_model=List[InvoicePaymentResponse])
+def get_invoice_payments(
+    invoice_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Payments recorded against an invoice, oldest first."""
     company_id = current_user.company_id or 1
-    invoice = db.query(Invoice).filter(
+    exists = db.query(Invoice.id).filter(
         and_(
             Invoice.id == invoice_id,
             Invoice.company_id == company_id,
             Invoice.tenant_id == tenant_id
         )
     ).first()
-    
-    if invoice is None:
+
+    if exists is None:
         raise HTTPException(status_code=404, detail="Invoice not found")
-    
-    # Convert float to Decimal to avoid type mismatch
-    paid_amount_decimal = Decimal(str(paid_amount))
-    invoice.paid_amount += paid_amount_decimal
-    invoice.remaining_amount = invoice.total_amount - invoice.paid_amount
-    
-    if invoice.remaining_amount <= 0:
-        invoice.status = InvoiceStatus.PAID
-        invoice.paid_date = datetime.utcnow()
-        invoice.remaining_amount = 0
-    else:
-        invoice.status = InvoiceStatus.SENT
-    
+
+    return db.query(InvoicePayment).filter(
+        InvoicePayment.invoice_id == invoice_id
+    ).order_by(InvoicePayment.paid_at, InvoicePayment.id).all()
+
+@router.post("/payments/bulk")
+def apply_bulk_payments(
+    bulk: BulkPaymentRequest,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Settle many invoices from one bank statement; all lines apply or none do."""
+    company_id = current_user.company_id or 1
+
+    unidentified = [i for i, item in enumerate(bulk.items) if not item.invoice_id and not item.invoice_number]
+    if unidentified:
+        raise HTTPException(status_code=400, detail=f"Items without invoice_id or invoice_number: {unidentified}")
+
+    numbers = [item.invoice_number for item in bulk.items if not item.invoice_id]
+    ids_by_number = resolve_invoice_numbers(db, tenant_id, company_id, numbers)
+    unknown = sorted(set(numbers) - set(ids_by_number))
+    if unknown:
+        raise HTTPException(status_code=404, detail=f"Invoices not found: {unknown}")
+
+    payments = [
+        {
+            "invoice_id": item.invoice_id or ids_by_number[item.invoice_number],
+            "amount": item.amount,
+            "method": item.method or bulk.method,
+            "reference": item.reference or bulk.statement_reference,
+            "paid_at": item.paid_at
+        }
+        for item in bulk.items
+    ]
+
+    try:
+        invoices = apply_payments(db, tenant_id, company_id, payments, source="bank_statement", user_id=current_user.id)
+    except InvoicesNotFoundError as e:
+        db.rollback()
+        raise HTTPException(status_code=404, detail=f"{e}: {e.invoice_ids}")
+    except InvoicePaymentError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"{e}: {e.invoice_ids}")
+
     db.commit()
-    return {"message": "Payment recorded successfully"}
+    logger.debug("invoices.bulk_payments", extra={"payments": len(payments), "invoices": len(invoices)})
+    return {"message": "Payments recorded successfully", "payments": len(payments), "invoices": invoices}
 
 # Legacy route for frontend compatibility
 @router.post("/invoices/{invoice_id}/mark-paid")
@@ -440,6 +619,7 @@ def delete_invoice(
     
     # Delete invoice
     db.delete(invoice)
+    bump_invoice_version(db, tenant_id, company_id)
     db.commit()
     return {"message": "Invoice deleted successfully"}
 
@@ -453,70 +633,3 @@ def delete_invoice_legacy(
 ):
     """Legacy route for frontend compatibility - redirects to main delete_invoice."""
     return delete_invoice(invoice_id, db, current_user, tenant_id)
-
-@router.get("/summary")
-def get_invoices_summary(
-    start_date: Optional[date] = None,
-    end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
-    tenant_id: int = Depends(get_current_tenant)
-):
-    """Get invoices summary for dashboard."""
-    company_id = current_user.company_id or 1
-    query = db.query(Invoice).filter(
-        and_(
-            Invoice.company_id == company_id,
-            Invoice.tenant_id == tenant_id
-        )
-    )
-    
-    if start_date:
-        query = query.filter(Invoice.issue_date >= start_date)
-    
-    if end_date:
-        query = query.filter(Invoice.issue_date <= end_date)
-    
-    # Count invoices by status
-    invoices_by_status = query.with_entities(
-        Invoice.status,
-        func.count(Invoice.id)
-    ).group_by(Invoice.status).all()
-    
-    # Calculate totals
-    total_invoiced = query.with_entities(func.sum(Invoice.total_amount)).scalar() or 0
-    total_paid = query.with_entities(func.sum(Invoice.paid_amount)).scalar() or 0
-    total_outstanding = query.filter(Invoice.status != InvoiceStatus.PAID).with_entities(
-        func.sum(Invoice.remaining_amount)
-    ).scalar() or 0
-    
-    # Overdue invoices
-    overdue_invoices = query.filter(
-        and_(
-            Invoice.due_date < datetime.utcnow().date(),
-            Invoice.status != InvoiceStatus.PAID
-        )
-    ).count()
-    
-    return {
-        "invoices_by_status": [
-            {"status": status[0].value, "count": status[1]} for status in invoices_by_status
-        ],
-        "total_invoiced": float(total_invoiced),
-        "total_paid": float(total_paid),
-        "total_outstanding": float(total_outstanding),
-        "overdue_invoices": overdue_invoices
-    }
-
-# Legacy route for frontend compatibility
-@router.get("/invoices/summary")
-def get_invoices_summary_legacy(
-    start_date: Optional[date] = None,
-    end_date: Optional[date] = None,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_active_user),
-    tenant_id: int = Depends(get_current_tenant)
-):
-    """Legacy route for frontend compatibility - redirects to main get_invoices_summary."""
-    return get_invoices_summary(start_date, end_date, db, current_user, tenant_id)
-     
\ No newline at end of file
@@ -0,0 +1,58 @@
+from typing import Optional
+from fastapi import APIRouter, Body, Depends, Form, Header
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.services.payment_webhooks import handle_click_complete, handle_click_prepare, handle_payme
+
+router = APIRouter()
+
+# Provider webhooks: no user session, requests are authenticated by signature.
+# They only validate and write to the payment_events inbox; invoices are updated by the consumer.
+
+def _click_params(
+    click_trans_id: str = Form(""),
+    service_id: str = Form(""),
+    click_paydoc_id: str = Form(""),
+    merchant_trans_id: str = Form(""),
+    merchant_prepare_id: str = Form(""),
+    amount: str = Form(""),
+    action: str = Form(""),
+    error: str = Form("0"),
+    error_note: str = Form(""),
+    sign_time: str = Form(""),
+    sign_string: str = Form("")
+) -> dict:
+    # Raw strings: the signature is computed over the values exactly as sent
+    return {
+        "click_trans_id": click_trans_id,
+        "service_id": service_id,
+        "click_paydoc_id": click_paydoc_id,
+        "merchant_trans_id": merchant_trans_id,
+        "merchant_prepare_id": merchant_prepare_id,
+        "amount": amount,
+        "action": action,
+        "error": error,
+        "error_note": error_note,
+        "sign_time": sign_time,
+        "sign_string": sign_string
+    }
+
+@router.post("/click/prepare")
+def click_prepare(params: dict = Depends(_click_params), db: Session = Depends(get_db)):
+    """Click SHOP API prepare step (action=0)."""
+    return handle_click_prepare(db, params)
+
+@router.post("/click/complete")
+def click_complete(params: dict = Depends(_click_params), db: Session = Depends(get_db)):
+    """Click SHOP API complete step (action=1)."""
+    return handle_click_complete(db, params)
+
+@router.post("/payme")
+def payme_endpoint(
+    body: dict = Body(...),
+    authorization: Optional[str] = Header(None),
+    db: Session = Depends(get_db)
+):
+    """Payme Merchant API JSON-RPC endpoint; errors are returned with HTTP 200 as Payme expects."""
+    return handle_payme(db, body, authorization)
@@ -0,0 +1,30 @@
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from app.database import get_db
+from app.models.user import User
+from app.services.global_search import MAX_RESULTS, SEARCH_ENTITY_TYPES, search
+from app.utils.auth import get_current_active_user, get_current_tenant
+
+router = APIRouter()
+
+@router.get("/")
+def global_search(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[str] = Query(None, description="Comma-separated: contact, lead, deal, invoice, task"),
+    limit: int = Query(20, ge=1, le=MAX_RESULTS),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Search contacts, leads, deals, invoices and tasks at once."""
+    entity_types = None
+    if types:
+        entity_types = [t.strip() for t in types.split(",") if t.strip()]
+        unknown = sorted(set(entity_types) - set(SEARCH_ENTITY_TYPES))
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown types {unknown}; use: {list(SEARCH_ENTITY_TYPES)}")
+
+    results = search(db, tenant_id, current_user.company_id or 1, q, entity_types, limit)
+    return {"query": q, "results": results}
@@ -3,11 +3,13 @@ Task management routes for BiznesAssistant
 Complete CRUD operations for tasks with assignment and filtering
 """
 
-from typing import List, Optional
+import base64
+import binascii
+from typing import List, Optional, Tuple
 from datetime import datetime, date
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, func
 
 from app.database import get_db
 from app.models.user import User
@@ -19,6 +21,8 @@ from pydantic import BaseModel
 
 router = APIRouter()
 
+DEFAULT_BOARD_PAGE_SIZE = 20
+
 # Pydantic models for request/response
 class TaskBase(BaseModel):
     title: str
@@ -27,6 +31,9 @@ class TaskBase(BaseModel):
     assigned_to: Optional[int] = None
     due_date: Optional[str] = None
     status: str = TaskStatus.TODO.value
+    contact_id: Optional[int] = None
+    lead_id: Optional[int] = None
+    deal_id: Optional[int] = None
 
 class TaskCreate(TaskBase):
     pass
@@ -38,6 +45,9 @@ class TaskUpdate(BaseModel):
     assigned_to: Optional[int] = None
     due_date: Optional[str] = None
     status: Optional[str] = None
+    contact_id: Optional[int] = None
+    lead_id: Optional[int] = None
+    deal_id: Optional[int] = None
 
 class TaskResponse(TaskBase):
     id: int
@@ -69,6 +79,85 @@ class TaskCommentResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class TaskBoardColumn(BaseModel):
+    status: str
+    count: Optional[int] = None  # Only on the full board
+    tasks: List[TaskResponse]
+    next_cursor: Optional[str] = None
+
+class TaskBoardResponse(BaseModel):
+    columns: List[TaskBoardColumn]
+
+def _user_name(user: Optional[User]) -> Optional[str]:
+    return (user.full_name or user.username) if user else None
+
+def _with_users(query):
+    """Load assignee and creator in the same query as the tasks."""
+    return query.options(joinedload(Task.assignee), joinedload(Task.creator))
+
+# Board and list order: by due date with undated tasks last, ties by id
+BOARD_ORDER = (Task.due_date.asc().nullslast(), Task.id.asc())
+
+def _encode_cursor(task: Task) -> str:
+    raw = f"{task.due_date.isoformat() if task.due_date else ''}|{task.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[Optional[datetime], int]:
+    try:
+        due_date, task_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return (datetime.fromisoformat(due_date) if due_date else None), int(task_id)
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+
+def _after_cursor(due_date: Optional[datetime], task_id: int):
+    """Keyset condition for rows after (due_date, id) in BOARD_ORDER."""
+    if due_date is None:
+        return and_(Task.due_date.is_(None), Task.id > task_id)
+    return or_(
+        Task.due_date > due_date,
+        and_(Task.due_date == due_date, Task.id > task_id),
+        Task.due_date.is_(None)
+    )
+
+def _board_query(db: Session, tenant_id: int, company_id: int,
+                 priority: Optional[str], assigned_to: Optional[int]):
+    query = db.query(Task).filter(
+        and_(
+            Task.tenant_id == tenant_id,
+            Task.company_id == company_id
+        )
+    )
+    if priority:
+        query = query.filter(Task.priority == priority)
+    if assigned_to:
+        query = query.filter(Task.assigned_to == assigned_to)
+    return query
+
+def _task_response(task: Task, assignee: Optional[User], creator: Optional[User]) -> TaskResponse:
+    return TaskResponse(
+        id=task.id,
+        title=task.title,
+        description=task.description,
+        priority=task.priority,
+        assigned_to=task.assigned_to,
+        due_date=task.due_date.isoformat() if task.due_date else None,
+        status=task.status,
+        created_by=task.created_by,
+        tenant_id=task.tenant_id,
+        company_id=task.company_id,
+        created_at=task.created_at,
+        updated_at=task.updated_at,
+        completed_at=task.completed_at,
+        contact_id=task.contact_id,
+        lead_id=task.lead_id,
+        deal_id=task.deal_id,
+        assignee_name=_user_name(assignee),
+        creator_name=_user_name(creator)
+    )
+
 @router.get("/", response_model=List[TaskResponse])
 async def get_tasks(
     status: Optional[str] = Query(None, description="Filter by status"),
@@ -113,45 +202,75 @@ async def get_tasks(
     if due_date_to:
         query = query.filter(Task.due_date <= due_date_to)
     
-    # Get tasks with user relationships
-    tasks = query.offset(skip).limit(limit).all()
+    # Users come from the same joined query, not one lookup per task
+    tasks = _with_users(query).order_by(*BOARD_ORDER).offset(skip).limit(limit).all()
+    return [_task_response(task, task.assignee, task.creator) for task in tasks]
+
+@router.get("/board", response_model=TaskBoardResponse)
+async def get_task_board(
+    per_column: int = Query(DEFAULT_BOARD_PAGE_SIZE, ge=1, le=100, description="Tasks returned per status column"),
+    priority: Optional[str] = Query(None, description="Filter by priority"),
+    assigned_to: Optional[int] = Query(None, description="Filter by assigned user"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Kanban board: task count and first page of every status column, in two queries."""
+    company_id = current_user.company_id or 1
+    query = _board_query(db, tenant_id, company_id, priority, assigned_to)
+    
+    counts = dict(query.with_entities(Task.status, func.count(Task.id)).group_by(Task.status).all())
     
-    # Enrich with user names
-    task_responses = []
+    # First per_column tasks of every status, ranked in one pass
+    position = func.row_number().over(partition_by=Task.status, order_by=BOARD_ORDER).label("position")
+    ranked = query.with_entities(Task.id, position).subquery()
+    tasks = _with_users(db.query(Task)).join(ranked, ranked.c.id == Task.id).filter(
+        ranked.c.position <= per_column
+    ).order_by(ranked.c.position).all()
+    
+    by_status = {}
     for task in tasks:
-        task_dict = {
-            "id": task.id,
-            "title": task.title,
-            "description": task.description,
-            "priority": task.priority,
-            "assigned_to": task.assigned_to,
-            "due_date": task.due_date.isoformat() if task.due_date else None,
-            "status": task.status,
-            "created_by": task.created_by,
-            "tenant_id": task.tenant_id,
-            "company_id": task.company_id,
-            "created_at": task.created_at,
-            "updated_at": task.updated_at,
-            "completed_at": task.completed_at,
-            "assignee_name": None,
-            "creator_name": None
-        }
-        
-        # Get assignee name
-        if task.assigned_to:
-            assignee = db.query(User).filter(User.id == task.assigned_to).first()
-            if assignee:
-                task_dict["assignee_name"] = assignee.full_name or assignee.username
-        
-        # Get creator name
-        if task.created_by:
-            creator = db.query(User).filter(User.id == task.created_by).first()
-            if creator:
-                task_dict["creator_name"] = creator.full_name or creator.username
-        
-        task_responses.append(TaskResponse(**task_dict))
-    
-    return task_responses
+        by_status.setdefault(task.status, []).append(task)
+    
+    columns = []
+    for task_status in [member.value for member in TaskStatus]:
+        column_tasks = by_status.get(task_status, [])
+        count = counts.get(task_status, 0)
+        columns.append(TaskBoardColumn(
+            status=task_status,
+            count=count,
+            tasks=[_task_response(task, task.assignee, task.creator) for task in column_tasks],
+            next_cursor=_encode_cursor(column_tasks[-1]) if count > len(column_tasks) else None
+        ))
+    
+    return TaskBoardResponse(columns=columns)
+
+@router.get("/board/{column}", response_model=TaskBoardColumn)
+async def get_task_board_column(
+    column: TaskStatus,
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page"),
+    limit: int = Query(DEFAULT_BOARD_PAGE_SIZE, ge=1, le=100),
+    priority: Optional[str] = Query(None, description="Filter by priority"),
+    assigned_to: Optional[int] = Query(None, description="Filter by assigned user"),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user),
+    tenant_id: int = Depends(get_current_tenant)
+):
+    """Next page of one board column."""
+    company_id = current_user.company_id or 1
+    query = _board_query(db, tenant_id, company_id, priority, assigned_to).filter(Task.status == column.value)
+    if cursor:
+        query = query.filter(_after_cursor(*_decode_cursor(cursor)))
+    
+    tasks = _with_users(query).order_by(*BOARD_ORDER).limit(limit + 1).all()
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+    
+    return TaskBoardColumn(
+        status=column.value,
+        tasks=[_task_response(task, task.assignee, task.creator) for task in tasks],
+        next_cursor=_encode_cursor(tasks[-1]) if has_more else None
+    )
 
 @router.post("/", response_model=TaskResponse)
 async def create_task(
@@ -164,6 +283,7 @@ async def create_task(
     company_id = current_user.company_id or 1
     
     # Validate assigned user exists and belongs to same company
+    assignee = None
     if task.assigned_to:
         assignee = db.query(User).filter(
             User.id == task.assigned_to,
@@ -193,40 +313,22 @@ async def create_task(
         assigned_to=task.assigned_to,
         due_date=due_date,
         status=task.status,
+        contact_id=task.contact_id,
+        lead_id=task.lead_id,
+        deal_id=task.deal_id,
         created_by=current_user.id,
         tenant_id=tenant_id,
         company_id=company_id
     )
     
     db.add(db_task)
-    db.commit()
+    db.flush()
     db.refresh(db_task)
     
-    # Enrich with user names
-    task_dict = {
-        "id": db_task.id,
-        "title": db_task.title,
-        "description": db_task.description,
-        "priority": db_task.priority,
-        "assigned_to": db_task.assigned_to,
-        "due_date": db_task.due_date.isoformat() if db_task.due_date else None,
-        "status": db_task.status,
-        "created_by": db_task.created_by,
-        "tenant_id": db_task.tenant_id,
-        "company_id": db_task.company_id,
-        "created_at": db_task.created_at,
-        "updated_at": db_task.updated_at,
-        "completed_at": db_task.completed_at,
-        "assignee_name": None,
-        "creator_name": current_user.full_name or current_user.username
-    }
-    
-    if db_task.assigned_to:
-        assignee = db.query(User).filter(User.id == db_task.assigned_to).first()
-        if assignee:
-            task_dict["assignee_name"] = assignee.full_name or assignee.username
-    
-    return TaskResponse(**task_dict)
+    # Built before the commit: it expires the current user and the validated assignee, reloading both
+    response = _task_response(db_task, assignee, current_user)
+    db.commit()
+    return response
 
 @router.get("/{task_id}", response_model=TaskResponse)
 async def get_task(
@@ -238,7 +340,7 @@ async def get_task(
     """Get a specific task by ID."""
     company_id = current_user.company_id or 1
     
-    task = db.query(Task).filter(
+    task = _with_users(db.query(Task)).filter(
         Task.id == task_id,
         Task.tenant_id == tenant_id,
         Task.company_id == company_id
@@ -250,38 +352,7 @@ async def get_task(
             detail="Task not found"
         )
     
-    # Enrich with user names
-    task_dict = {
-        "id": task.id,
-        "title": task.title,
-        "description": task.description,
-        "priority": task.priority,
-        "assigned_to": task.assigned_to,
-        "due_date": task.due_date.isoformat() if task.due_date else None,
-        "status": task.status,
-        "created_by": task.created_by,
-        "tenant_id": task.tenant_id,
-        "company_id": task.company_id,
-        "created_at": task.created_at,
-        "updated_at": task.updated_at,
-        "completed_at": task.completed_at,
-        "assignee_name": None,
-        "creator_name": None
-    }
-    
-    # Get assignee name
-    if task.assigned_to:
-        assignee = db.query(User).filter(User.id == task.assigned_to).first()
-        if assignee:
-            task_dict["assignee_name"] = assignee.full_name or assignee.username
-    
-    # Get creator name
-    if task.created_by:
-        creator = db.query(User).filter(User.id == task.created_by).first()
-        if creator:
-            task_dict["creator_name"] = creator.full_name or creator.username
-    
-    return TaskResponse(**task_dict)
+    return _task_response(task, task.assignee, task.creator)
 
 @router.patch("/{task_id}", response_model=TaskResponse)
 async def update_task(
@@ -339,40 +410,10 @@ async def update_task(
         setattr(task, field, value)
     
     db.commit()
-    db.refresh(task)
-    
-    # Enrich with user names
-    task_dict = {
-        "id": task.id,
-        "title": task.title,
-        "description": task.description,
-        "priority": task.priority,
-        "assigned_to": task.assigned_to,
-        "due_date": task.due_date.isoformat() if task.due_date else None,
-        "status": task.status,
-        "created_by": task.created_by,
-        "tenant_id": task.tenant_id,
-        "company_id": task.company_id,
-        "created_at": task.created_at,
-        "updated_at": task.updated_at,
-        "completed_at": task.completed_at,
-        "assignee_name": None,
-        "creator_name": None
-    }
     
-    # Get assignee name
-    if task.assigned_to:
-        assignee = db.query(User).filter(User.id == task.assigned_to).first()
-        if assignee:
-            task_dict["assignee_name"] = assignee.full_name or assignee.username
-    
-    # Get creator name
-    if task.created_by:
-        creator = db.query(User).filter(User.id == task.created_by).first()
-        if creator:
-            task_dict["creator_name"] = creator.full_name or creator.username
-    
-    return TaskResponse(**task_dict)
+    # Reload with users joined instead of refresh plus two lazy loads
+    task = _with_users(db.query(Task)).filter(Task.id == task_id).one()
+    return _task_response(task, task.assignee, task.creator)
 
 @router.delete("/{task_id}")
 async def delete_task(
@@ -424,22 +465,21 @@ async def get_task_comments(
             detail="Task not found"
         )
     
-    comments = db.query(TaskComment).filter(TaskComment.task_id == task_id).all()
-    
-    comment_responses = []
-    for comment in comments:
-        author = db.query(User).filter(User.id == comment.created_by).first()
-        comment_dict = {
-            "id": comment.id,
-            "task_id": comment.task_id,
-            "content": comment.content,
-            "created_by": comment.created_by,
-            "created_at": comment.created_at,
-            "author_name": author.full_name or author.username if author else "Unknown"
-        }
-        comment_responses.append(TaskCommentResponse(**comment_dict))
-    
-    return comment_responses
+    comments = db.query(TaskComment).options(joinedload(TaskComment.author)).filter(
+        TaskComment.task_id == task_id
+    ).all()
+    
+    return [
+        TaskCommentResponse(
+            id=comment.id,
+            task_id=comment.task_id,
+            content=comment.content,
+            created_by=comment.created_by,
+            created_at=comment.created_at,
+            author_name=_user_name(comment.author) or "Unknown"
+        )
+        for comment in comments
+    ]
 
 @router.post("/{task_id}/comments", response_model=TaskCommentResponse)
 async def create_task_comment(
@@ -1,89 +1,98 @@
 from typing import List, Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timezone
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 
 from app.database import get_db
 from app.models.user import User
-from app.models.transaction import Transaction
-from app.models.invoice import Invoice
+from app.models.template import Template, TemplateType, RecurringInterval, RecurringSchedule
 from app.schemas.template import TemplateCreate, TemplateResponse, TemplateApply
+from app.services.template_service import TemplateDataError, first_occurrence, materialize_template
 from app.utils.auth import get_current_active_user, get_current_tenant
 
 router = APIRouter()
 
+TEMPLATE_TYPES = {t.value for t in TemplateType}
+RECURRING_INTERVALS = {i.value for i in RecurringInterval}
+
+def _get_template(db: Session, template_id: int, company_id: int, tenant_id: int) -> Template:
+    template = db.query(Template).filter(
+        and_(
+            Template.id == template_id,
+            Template.company_id == company_id,
+            Template.tenant_id == tenant_id
+        )
+    ).first()
+    if template is None:
+        raise HTTPException(status_code=404, detail="Template not found")
+    return template
+
 @router.post("/", response_model=TemplateResponse)
-async def create_template(
+def create_template(
     template: TemplateCreate,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
     tenant_id: int = Depends(get_current_tenant)
 ):
-    """Create a new template."""
+    """Create a new template; recurring templates get a schedule."""
+    if template.type not in TEMPLATE_TYPES:
+        raise HTTPException(status_code=400, detail=f"Template type must be one of: {sorted(TEMPLATE_TYPES)}")
+
     # Validate template data based on type
     if template.type == "transaction":
         required_fields = ["amount", "category", "type"]
         for field in required_fields:
             if field not in template.data:
                 raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
-    
-    db_template = {
-        "name": template.name,
-        "type": template.type,
-        "description": template.description,
-        "is_recurring": template.is_recurring,
-        "recurring_interval": template.recurring_interval,
-        "recurring_day": template.recurring_day,
-        "data": template.data,
-        "created_by": current_user.id,
-        "tenant_id": tenant_id,
-        "created_at": datetime.utcnow(),
-        "updated_at": datetime.utcnow()
-    }
-    
-    # For now, store in a simple way (in production, use proper Template model)
-    # This is a placeholder implementation
-    return TemplateResponse(**db_template, id=1)
+
+    if template.is_recurring and template.recurring_interval not in RECURRING_INTERVALS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Recurring templates need recurring_interval: {sorted(RECURRING_INTERVALS)}"
+        )
+
+    db_template = Template(
+        **template.dict(),
+        created_by=current_user.id,
+        company_id=current_user.company_id or 1,
+        tenant_id=tenant_id
+    )
+    db.add(db_template)
+    db.flush()
+
+    if db_template.is_recurring:
+        db.add(RecurringSchedule(
+            template_id=db_template.id,
+            next_execution_date=first_occurrence(db_template.recurring_interval, db_template.recurring_day)
+        ))
+
+    db.commit()
+    db.refresh(db_template)
+    return db_template
 
 @router.get("/", response_model=List[TemplateResponse])
-async def get_templates(
+def get_templates(
     template_type: Optional[str] = None,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
     tenant_id: int = Depends(get_current_tenant)
 ):
     """Get templates for the current tenant."""
-    # Placeholder implementation - in production, query from database
-    templates = []
-    
-    if template_type == "transaction":
-        templates = [
-            TemplateResponse(
-                id=1,
-                name="Monthly Rent",
-                type="transaction",
-                description="Monthly rent payment",
-                is_recurring=True,
-                recurring_interval="monthly",
-                recurring_day=1,
-                data={
-                    "amount": 1000.00,
-                    "type": "expense",
-                    "category": "rent",
-                    "vat_included": True
-                },
-                created_by=current_user.id,
-                tenant_id=tenant_id,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-        ]
-    
-    return templates
+    query = db.query(Template).filter(
+        and_(
+            Template.company_id == (current_user.company_id or 1),
+            Template.tenant_id == tenant_id
+        )
+    )
+
+    if template_type:
+        query = query.filter(Template.type == template_type)
+
+    return query.order_by(Template.name).all()
 
 @router.post("/{template_id}/apply")
-async def apply_template(
+def apply_template(
     template_id: int,
     apply_data: TemplateApply,
     db: Session = Depends(get_db),
@@ -91,47 +100,36 @@ async def apply_template(
     tenant_id: int = Depends(get_current_tenant)
 ):
     """Apply a template to create a new transaction or invoice."""
-    # Get template (placeholder)
-    template = await get_templates(template_type="transaction")
-    if not template:
-        raise HTTPException(status_code=404, detail="Template not found")
-    
-    template_data = template[0].data
-    
+    template = _get_template(db, template_id, current_user.company_id or 1, tenant_id)
+
     # Merge with custom data
-    if apply_data.custom_data:
-        template_data.update(apply_data.custom_data)
-    
-    # Create transaction based on template
-    if template[0].type == "transaction":
-        transaction = Transaction(
-            amount=template_data.get("amount", 0),
-            type=template_data.get("type", "expense"),
-            category=template_data.get("category", "other"),
-            description=template_data.get("description", f"From template: {template[0].name}"),
-            date=apply_data.custom_data.get("date", datetime.utcnow().date()),
-            vat_amount=template_data.get("vat_amount", 0),
-            tax_amount=template_data.get("tax_amount", 0),
-            user_id=current_user.id,
-            company_id=current_user.company_id or 1,
-            tenant_id=tenant_id
-        )
-        
-        db.add(transaction)
-        db.commit()
-        db.refresh(transaction)
-        
-        return {"message": "Template applied successfully", "transaction_id": transaction.id}
-    
-    return {"message": "Template applied successfully"}
+    template_data = dict(template.data or {})
+    custom_data = dict(apply_data.custom_data or {})
+    when = custom_data.pop("date", None)
+    template_data.update(custom_data)
+
+    try:
+        occurrence = datetime.fromisoformat(when) if when else datetime.now(timezone.utc)
+        ids = materialize_template(db, template, [occurrence], template_data)
+    except (TemplateDataError, ValueError) as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    db.commit()
+
+    if template.type == TemplateType.TRANSACTION.value:
+        return {"message": "Template applied successfully", "transaction_id": ids[0]}
+    return {"message": "Template applied successfully", "invoice_id": ids[0]}
 
 @router.delete("/{template_id}")
-async def delete_template(
+def delete_template(
     template_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_active_user),
     tenant_id: int = Depends(get_current_tenant)
 ):
-    """Delete a template."""
-    # Placeholder implementation
+    """Delete a template and its schedules."""
+    template = _get_template(db, template_id, current_user.company_id or 1, tenant_id)
+    db.delete(template)
+    db.commit()
     return {"message": "Template deleted successfully"}
@@ -2,7 +2,7 @@ from .user import UserCreate, UserUpdate, UserResponse, UserLogin
 from .auth import Token
 from .company import CompanyCreate, CompanyUpdate, CompanyResponse
 from .transaction import TransactionCreate, TransactionUpdate, TransactionResponse
-from .invoice import InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoiceItemCreate, InvoiceItemUpdate
+from .invoice import InvoiceCreate, InvoiceUpdate, InvoiceResponse, InvoiceSummaryResponse, InvoiceItemCreate, InvoiceItemUpdate
 from .contact import ContactCreate, ContactUpdate, ContactResponse
 from .lead import LeadCreate, LeadUpdate, LeadResponse
 from .deal import DealCreate, DealUpdate, DealResponse
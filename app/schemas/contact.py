@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 from app.models.contact import ContactType
 
@@ -52,3 +52,6 @@ class ContactResponse(ContactBase):
     
     class Config:
         from_attributes = True
+
+class ContactMergeRequest(BaseModel):
+    duplicate_ids: List[int] = Field(..., min_length=1)
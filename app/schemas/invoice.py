@@ -22,6 +22,9 @@ class InvoiceItemBase(BaseModel):
 class InvoiceItemCreate(InvoiceItemBase):
     pass
 
+class InvoiceItemUpsert(InvoiceItemCreate):
+    id: Optional[int] = None  # Existing item to update; omitted for new lines
+
 class InvoiceItemUpdate(BaseModel):
     description: Optional[str] = None
     quantity: Optional[Decimal] = None
@@ -116,6 +119,7 @@ class InvoiceUpdate(BaseModel):
     due_date: Optional[datetime] = None
     paid_date: Optional[datetime] = None
     contact_id: Optional[int] = None
+    items: Optional[List[InvoiceItemUpsert]] = None  # Full item list; missing ids are deleted
     
     @validator('issue_date', 'due_date', 'recurring_end_date', pre=True)
     def parse_datetime(cls, v):
@@ -156,3 +160,55 @@ class InvoiceResponse(InvoiceBase):
             Decimal: str,
             InvoiceStatus: lambda v: v.value if hasattr(v, 'value') else str(v)
         }
+
+class InvoiceSummaryResponse(BaseModel):
+    """Compact invoice row for list views, without items"""
+    id: int
+    invoice_number: str
+    status: InvoiceStatus
+    customer_name: str
+    issue_date: datetime
+    due_date: datetime
+    total_amount: Decimal
+    paid_amount: Optional[Decimal] = None
+    remaining_amount: Decimal
+    contact_id: Optional[int] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+        json_encoders = {
+            Decimal: str,
+            InvoiceStatus: lambda v: v.value if hasattr(v, 'value') else str(v)
+        }
+
+class InvoicePaymentCreate(BaseModel):
+    amount: Decimal = Field(..., gt=0)
+    method: Optional[str] = None
+    reference: Optional[str] = None
+    paid_at: Optional[datetime] = None
+
+class InvoicePaymentResponse(InvoicePaymentCreate):
+    id: int
+    invoice_id: int
+    paid_at: datetime
+    source: str
+    created_by_id: Optional[int] = None
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+        json_encoders = {
+            Decimal: str
+        }
+
+class BulkPaymentItem(InvoicePaymentCreate):
+    invoice_id: Optional[int] = None
+    invoice_number: Optional[str] = None  # Bank statements usually quote the number, not the id
+
+MAX_PAYMENT_BATCH_SIZE = 1000
+
+class BulkPaymentRequest(BaseModel):
+    statement_reference: Optional[str] = None
+    method: str = "bank_transfer"
+    items: List[BulkPaymentItem] = Field(..., min_length=1, max_length=MAX_PAYMENT_BATCH_SIZE)
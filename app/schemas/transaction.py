@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 from decimal import Decimal
 from app.models.transaction import TransactionType, TransactionCategory
@@ -32,6 +32,17 @@ class TransactionUpdate(BaseModel):
     contact_id: Optional[int] = None
     invoice_id: Optional[int] = None
 
+class TransactionBatchUpdateItem(TransactionUpdate):
+    id: int
+
+MAX_TRANSACTION_BATCH_SIZE = 500
+
+class TransactionBatchCreate(BaseModel):
+    items: List[TransactionCreate] = Field(..., min_length=1, max_length=MAX_TRANSACTION_BATCH_SIZE)
+
+class TransactionBatchUpdate(BaseModel):
+    items: List[TransactionBatchUpdateItem] = Field(..., min_length=1, max_length=MAX_TRANSACTION_BATCH_SIZE)
+
 class TransactionResponse(TransactionBase):
     id: int
     vat_amount: Decimal
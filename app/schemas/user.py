@@ -23,12 +23,14 @@ class UserUpdate(BaseModel):
     phone: Optional[str] = None
     role: Optional[UserRole] = None
     language: Optional[str] = None
+    telegram_chat_id: Optional[str] = None
     company_id: Optional[int] = None
     tenant_id: Optional[int] = None
     is_active: Optional[bool] = None
 
 class UserResponse(UserBase):
     id: int
+    telegram_chat_id: Optional[str] = None
     is_active: bool
     is_verified: bool
     created_at: datetime
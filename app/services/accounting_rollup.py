@@ -0,0 +1,172 @@
+"""
+Accounting rollups for BiznesAssistant
+Maintains daily transaction aggregates so summaries over long ranges stay cheap
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.models.accounting_rollup import TransactionDailyRollup, AccountingRollupState, LedgerCheckpoint
+from app.models.transaction import Transaction
+
+
+def mark_rollups_stale(db: Session, company_id: int, touched: Iterable) -> None:
+    """Pull the watermark back so backdated writes are re-aggregated on the next rebuild.
+
+    Ledger checkpoints for later months are dropped too; they are rebuilt on demand.
+    `touched` holds the dates/datetimes of every written transaction (old and new).
+    Runs inside the caller's transaction; the caller commits.
+    """
+    days = [value.date() if isinstance(value, datetime) else value for value in touched if value is not None]
+    if not days:
+        return
+    day = min(days)
+
+    db.query(AccountingRollupState).filter(
+        and_(
+            AccountingRollupState.company_id == company_id,
+            AccountingRollupState.rolled_up_through >= day
+        )
+    ).update({AccountingRollupState.rolled_up_through: day - timedelta(days=1)}, synchronize_session=False)
+
+    db.query(LedgerCheckpoint).filter(
+        and_(
+            LedgerCheckpoint.company_id == company_id,
+            LedgerCheckpoint.month > day
+        )
+    ).delete(synchronize_session=False)
+
+
+class AccountingRollupService:
+    """Builds and reads daily transaction rollups for one company"""
+
+    def __init__(self, db: Session, tenant_id: int, company_id: int):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.company_id = company_id
+
+    def get_watermark(self) -> Optional[date]:
+        """Last day whose rollups are complete, or None if rollups were never built."""
+        return self.db.query(AccountingRollupState.rolled_up_through).filter(
+            AccountingRollupState.company_id == self.company_id
+        ).scalar()
+
+    def rebuild(self, through: Optional[date] = None) -> Dict:
+        """Aggregate every day after the watermark up to `through` (default: yesterday)."""
+        through = through or (datetime.utcnow().date() - timedelta(days=1))
+
+        state = self.db.query(AccountingRollupState).filter(
+            AccountingRollupState.company_id == self.company_id
+        ).with_for_update().first()
+        if state is None:
+            state = AccountingRollupState(company_id=self.company_id, tenant_id=self.tenant_id)
+            self.db.add(state)
+            self.db.flush()
+
+        start = state.rolled_up_through + timedelta(days=1) if state.rolled_up_through else None
+        if start is not None and start > through:
+            return {"rebuilt_from": None, "rolled_up_through": state.rolled_up_through}
+
+        # Drop whatever is about to be recomputed
+        stale = self.db.query(TransactionDailyRollup).filter(
+            TransactionDailyRollup.company_id == self.company_id
+        )
+        if start is not None:
+            stale = stale.filter(TransactionDailyRollup.day >= start)
+        stale.delete(synchronize_session=False)
+
+        day = func.date(Transaction.date)
+        conditions = [
+            Transaction.company_id == self.company_id,
+            Transaction.tenant_id == self.tenant_id,
+            Transaction.date < through + timedelta(days=1)
+        ]
+        if start is not None:
+            conditions.append(Transaction.date >= start)
+
+        aggregated = select(
+            day,
+            Transaction.type,
+            Transaction.category,
+            func.count(Transaction.id),
+            func.coalesce(func.sum(Transaction.amount), 0),
+            func.coalesce(func.sum(Transaction.vat_amount), 0),
+            func.coalesce(func.sum(Transaction.tax_amount), 0),
+            literal(self.company_id),
+            literal(self.tenant_id)
+        ).where(and_(*conditions)).group_by(day, Transaction.type, Transaction.category)
+
+        self.db.execute(
+            insert(TransactionDailyRollup).from_select(
+                ["day", "type", "category", "transaction_count", "amount_total",
+                 "vat_total", "tax_total", "company_id", "tenant_id"],
+                aggregated
+            )
+        )
+
+        state.rolled_up_through = through
+        self.db.commit()
+        return {"rebuilt_from": start, "rolled_up_through": through}
+
+    def grouped_totals(self, start_date: Optional[date], end_date: Optional[date]) -> List[Tuple]:
+        """(type, category, count, amount, vat, tax) rows for whole days in the range.
+
+        Days up to the watermark come from rollups; later days are aggregated live.
+        """
+        watermark = self.get_watermark()
+        totals = {}
+
+        live_start = start_date
+        if watermark is not None and (start_date is None or start_date <= watermark):
+            rollup_end = min(end_date, watermark) if end_date else watermark
+            query = self.db.query(
+                TransactionDailyRollup.type,
+                TransactionDailyRollup.category,
+                func.sum(TransactionDailyRollup.transaction_count),
+                func.sum(TransactionDailyRollup.amount_total),
+                func.sum(TransactionDailyRollup.vat_total),
+                func.sum(TransactionDailyRollup.tax_total)
+            ).filter(
+                and_(
+                    TransactionDailyRollup.company_id == self.company_id,
+                    TransactionDailyRollup.tenant_id == self.tenant_id,
+                    TransactionDailyRollup.day <= rollup_end
+                )
+            )
+            if start_date:
+                query = query.filter(TransactionDailyRollup.day >= start_date)
+            self._merge(totals, query.group_by(TransactionDailyRollup.type, TransactionDailyRollup.category).all())
+            live_start = rollup_end + timedelta(days=1)
+
+        if end_date is None or live_start is None or live_start <= end_date:
+            query = self.db.query(
+                Transaction.type,
+                Transaction.category,
+                func.count(Transaction.id),
+                func.sum(Transaction.amount),
+                func.sum(Transaction.vat_amount),
+                func.sum(Transaction.tax_amount)
+            ).filter(
+                and_(
+                    Transaction.company_id == self.company_id,
+                    Transaction.tenant_id == self.tenant_id
+                )
+            )
+            if live_start:
+                query = query.filter(Transaction.date >= live_start)
+            if end_date:
+                query = query.filter(Transaction.date < end_date + timedelta(days=1))
+            self._merge(totals, query.group_by(Transaction.type, Transaction.category).all())
+
+        return [key + tuple(values) for key, values in totals.items()]
+
+    def _merge(self, totals: Dict, rows: List[Tuple]):
+        for type_, category, count, amount, vat, tax in rows:
+            current = totals.setdefault((type_, category), [0, 0, 0, 0])
+            current[0] += count or 0
+            current[1] += amount or 0
+            current[2] += vat or 0
+            current[3] += tax or 0
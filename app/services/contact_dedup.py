@@ -0,0 +1,334 @@
+"""
+Contact deduplication and customer identity resolution for BiznesAssistant
+Blocks candidate pairs on normalized phone, INN and email, scores name similarity,
+merges duplicates and links invoices/transactions to contacts by foreign key
+
+Run the contact_id backfill with: python -m app.services.contact_dedup
+"""
+
+import logging
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import and_, delete, func, or_, tuple_, update
+from sqlalchemy.orm import Session
+
+from app.models.activity import Activity
+from app.models.contact import Contact
+from app.models.deal import Deal
+from app.models.invoice import Invoice
+from app.models.lead import Lead
+from app.models.task import Task
+from app.models.transaction import Transaction
+from app.services.contact_search import NATIONAL_NUMBER_LENGTH, normalize_phone
+from app.services.invoice_versions import bump_invoice_version
+
+logger = logging.getLogger(__name__)
+
+BACKFILL_BATCH_SIZE = 5000
+
+# Phone numbers shorter than this are extensions or typos, not identities
+MIN_PHONE_DIGITS = 7
+# Uzbek INN is 9 digits (legal entities), PINFL 14 (individuals)
+MIN_TAX_ID_DIGITS = 9
+# A blocking key shared by more contacts than this is a placeholder ("000000000"), not an identity
+MAX_BLOCK_SIZE = 50
+
+KEY_WEIGHTS = {"tax_id": 1.0, "phone": 0.7, "email": 0.7}
+DEFAULT_MIN_SCORE = 0.6
+
+# Legal-form tokens dropped before comparing names
+LEGAL_FORMS = {"ooo", "mchj", "xk", "ak", "ao", "ip", "yatt", "llc", "ltd", "inc", "ооо", "мчж", "чп", "ип", "ао"}
+
+_NON_WORD = re.compile(r"[^\w]+")
+_NON_DIGITS = re.compile(r"\D")
+
+# SQL twin of tax_id_key() for stored INNs like "123 456 789"; matches idx_contacts_tax_id_digits
+TAX_ID_DIGITS = func.regexp_replace(Contact.tax_id, r"\D", "", "g")
+
+# Contact fields copied from a duplicate when the primary has none
+_MERGE_FILL_FIELDS = (
+    "company_name", "email", "phone", "address", "tax_id", "bank_name", "bank_account", "mfo",
+    "website", "telegram", "instagram", "facebook", "linkedin"
+)
+
+
+def phone_key(value: Optional[str]) -> Optional[str]:
+    digits = normalize_phone(value)
+    if len(digits) < MIN_PHONE_DIGITS:
+        return None
+    return digits[-NATIONAL_NUMBER_LENGTH:]
+
+
+def email_key(value: Optional[str]) -> Optional[str]:
+    email = (value or "").strip().lower()
+    return email if "@" in email else None
+
+
+def tax_id_key(value: Optional[str]) -> Optional[str]:
+    digits = _NON_DIGITS.sub("", value or "")
+    return digits if len(digits) >= MIN_TAX_ID_DIGITS else None
+
+
+def name_key(value: Optional[str]) -> str:
+    """Lowercased name tokens without punctuation and legal forms, sorted so word order does not matter."""
+    tokens = [token for token in _NON_WORD.sub(" ", (value or "").lower()).split() if token not in LEGAL_FORMS]
+    return " ".join(sorted(tokens))
+
+
+def name_similarity(a: Optional[str], b: Optional[str]) -> float:
+    key_a, key_b = name_key(a), name_key(b)
+    if not key_a or not key_b:
+        return 0.0
+    return SequenceMatcher(None, key_a, key_b).ratio()
+
+
+class ContactIndex:
+    """In-memory blocking index over one company's contacts"""
+
+    def __init__(self, contacts: Iterable[Any]):
+        self.names: Dict[int, str] = {}
+        self.blocks: Dict[str, Dict[str, List[int]]] = {key: defaultdict(list) for key in ("tax_id", "phone", "email", "name")}
+        for contact in contacts:
+            self.names[contact.id] = contact.name
+            for block, value in (
+                ("tax_id", tax_id_key(contact.tax_id)),
+                ("phone", phone_key(contact.phone)),
+                ("email", email_key(contact.email)),
+                ("name", name_key(contact.name) or None)
+            ):
+                if value:
+                    self.blocks[block][value].append(contact.id)
+
+    def resolve(self, tax_id: Optional[str] = None, phone: Optional[str] = None,
+                email: Optional[str] = None, name: Optional[str] = None) -> Optional[int]:
+        """The one contact these identifiers point to, strongest identifier first; None if absent or ambiguous."""
+        for block, value in (
+            ("tax_id", tax_id_key(tax_id)),
+            ("phone", phone_key(phone)),
+            ("email", email_key(email)),
+            ("name", name_key(name) or None)
+        ):
+            candidates = self.blocks[block].get(value) if value else None
+            if candidates and len(candidates) == 1:
+                return candidates[0]
+        return None
+
+    def candidate_pairs(self) -> Dict[tuple, List[str]]:
+        """(low_id, high_id) -> blocking keys they share."""
+        pairs: Dict[tuple, List[str]] = defaultdict(list)
+        for block in KEY_WEIGHTS:
+            for ids in self.blocks[block].values():
+                if len(ids) < 2 or len(ids) > MAX_BLOCK_SIZE:
+                    continue
+                for i, first in enumerate(ids):
+                    for second in ids[i + 1:]:
+                        pairs[(min(first, second), max(first, second))].append(block)
+        return pairs
+
+
+def _company_contacts(db: Session, tenant_id: int, company_id: int):
+    return db.query(Contact.id, Contact.name, Contact.tax_id, Contact.phone, Contact.email).filter(
+        and_(
+            Contact.company_id == company_id,
+            Contact.tenant_id == tenant_id
+        )
+    ).all()
+
+
+def find_duplicate_contacts(db: Session, tenant_id: int, company_id: int,
+                            min_score: float = DEFAULT_MIN_SCORE) -> List[Dict[str, Any]]:
+    """Groups of contacts that look like the same customer, best-scored first.
+
+    score = 0.5 * strongest shared key (INN 1.0, phone/email 0.7) + 0.5 * name similarity, so a
+    shared phone or email alone (a family member, an accountant's inbox) does not reach the default.
+    Pairs above min_score are joined transitively; the oldest contact is the suggested primary.
+    """
+    index = ContactIndex(_company_contacts(db, tenant_id, company_id))
+
+    parent: Dict[int, int] = {}
+
+    def find(contact_id: int) -> int:
+        while parent.setdefault(contact_id, contact_id) != contact_id:
+            parent[contact_id] = parent[parent[contact_id]]
+            contact_id = parent[contact_id]
+        return contact_id
+
+    scored = []
+    for (first, second), keys in index.candidate_pairs().items():
+        score = 0.5 * max(KEY_WEIGHTS[key] for key in keys) + 0.5 * name_similarity(index.names[first], index.names[second])
+        if score < min_score:
+            continue
+        scored.append({"contact_ids": [first, second], "score": round(score, 3), "matched_on": sorted(keys)})
+        parent[find(second)] = find(first)
+
+    groups: Dict[int, Dict[str, Any]] = {}
+    for pair in scored:
+        root = find(pair["contact_ids"][0])
+        group = groups.setdefault(root, {"contact_ids": set(), "pairs": [], "score": 0.0})
+        group["contact_ids"].update(pair["contact_ids"])
+        group["pairs"].append(pair)
+        group["score"] = max(group["score"], pair["score"])
+
+    return sorted(
+        (
+            {
+                "primary_id": min(group["contact_ids"]),
+                "contact_ids": sorted(group["contact_ids"]),
+                "names": {contact_id: index.names[contact_id] for contact_id in sorted(group["contact_ids"])},
+                "score": group["score"],
+                "pairs": sorted(group["pairs"], key=lambda pair: pair["score"], reverse=True)
+            }
+            for group in groups.values()
+        ),
+        key=lambda group: group["score"],
+        reverse=True
+    )
+
+
+def merge_contacts(db: Session, tenant_id: int, company_id: int, primary_id: int,
+                   duplicate_ids: Sequence[int]) -> Optional[Dict[str, int]]:
+    """Repoint everything referencing the duplicates to the primary, fill its blanks and delete the duplicates.
+
+    Returns None if any contact is not in the company. Runs in the caller's transaction.
+    """
+    duplicate_ids = sorted(set(duplicate_ids) - {primary_id})
+    contacts = db.query(Contact).filter(
+        and_(
+            Contact.id.in_([primary_id, *duplicate_ids]),
+            Contact.company_id == company_id,
+            Contact.tenant_id == tenant_id
+        )
+    ).order_by(Contact.id).with_for_update().all()
+    if len(contacts) != len(duplicate_ids) + 1:
+        return None
+
+    primary = next(contact for contact in contacts if contact.id == primary_id)
+    for duplicate in contacts:
+        if duplicate is primary:
+            continue
+        for field in _MERGE_FILL_FIELDS:
+            if not getattr(primary, field) and getattr(duplicate, field):
+                setattr(primary, field, getattr(duplicate, field))
+
+    moved = {}
+    for name, model in (("invoices", Invoice), ("transactions", Transaction), ("leads", Lead),
+                        ("deals", Deal), ("activities", Activity), ("tasks", Task)):
+        moved[name] = db.execute(
+            update(model).where(model.contact_id.in_(duplicate_ids)).values(contact_id=primary_id),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+
+    # Bulk delete: every reference was just repointed, and db.delete() would load each duplicate's collections
+    db.execute(
+        delete(Contact).where(Contact.id.in_(duplicate_ids)),
+        execution_options={"synchronize_session": False}
+    )
+    for duplicate in contacts:
+        if duplicate is not primary:
+            db.expunge(duplicate)
+    if moved["invoices"]:
+        bump_invoice_version(db, tenant_id, company_id)
+    return {"merged": len(duplicate_ids), **moved}
+
+
+def resolve_contact_id(db: Session, tenant_id: int, company_id: int, tax_id: Optional[str] = None,
+                       phone: Optional[str] = None, email: Optional[str] = None,
+                       name: Optional[str] = None) -> Optional[int]:
+    """Contact for a new invoice's customer fields, from one indexed query over the candidate keys."""
+    keys = {"tax_id": tax_id_key(tax_id), "phone": phone_key(phone), "email": email_key(email)}
+    conditions = [func.lower(Contact.name) == (name or "").strip().lower()] if name and name.strip() else []
+    if keys["tax_id"]:
+        conditions.append(TAX_ID_DIGITS == keys["tax_id"])
+    if keys["phone"]:
+        conditions.append(Contact.phone_digits.endswith(keys["phone"], autoescape=True))
+    if keys["email"]:
+        conditions.append(func.lower(Contact.email) == keys["email"])
+    if not conditions:
+        return None
+
+    candidates = db.query(Contact.id, Contact.name, Contact.tax_id, Contact.phone, Contact.email).filter(
+        and_(
+            Contact.company_id == company_id,
+            Contact.tenant_id == tenant_id,
+            or_(*conditions)
+        )
+    ).order_by(Contact.id).limit(MAX_BLOCK_SIZE).all()
+    return ContactIndex(candidates).resolve(tax_id, phone, email, name)
+
+
+def backfill_invoice_contacts(db: Session, company_id: Optional[int] = None,
+                              batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Set Invoice.contact_id from customer INN/phone/email/name, one company index in memory at a time."""
+    linked = 0
+    cursor = (0, 0)
+    index_owner, index = None, None
+    while True:
+        query = db.query(
+            Invoice.id, Invoice.company_id, Invoice.tenant_id, Invoice.customer_tax_id,
+            Invoice.customer_phone, Invoice.customer_email, Invoice.customer_name
+        ).filter(
+            and_(
+                Invoice.contact_id.is_(None),
+                tuple_(Invoice.company_id, Invoice.id) > cursor
+            )
+        )
+        if company_id is not None:
+            query = query.filter(Invoice.company_id == company_id)
+        rows = query.order_by(Invoice.company_id, Invoice.id).limit(batch_size).all()
+        if not rows:
+            return linked
+
+        updates = []
+        for row in rows:
+            if index_owner != (row.tenant_id, row.company_id):
+                index_owner = (row.tenant_id, row.company_id)
+                index = ContactIndex(_company_contacts(db, row.tenant_id, row.company_id))
+            contact_id = index.resolve(row.customer_tax_id, row.customer_phone, row.customer_email, row.customer_name)
+            if contact_id is not None:
+                updates.append({"id": row.id, "contact_id": contact_id})
+
+        if updates:
+            db.execute(update(Invoice), updates)
+        db.commit()
+        linked += len(updates)
+        cursor = (rows[-1].company_id, rows[-1].id)
+        if len(rows) < batch_size:
+            return linked
+
+
+def backfill_transaction_contacts(db: Session, batch_size: int = BACKFILL_BATCH_SIZE) -> int:
+    """Copy contact_id from the linked invoice, in id ranges so each UPDATE stays short."""
+    max_id = db.query(func.max(Transaction.id)).scalar() or 0
+    linked = 0
+    for start in range(0, max_id, batch_size):
+        linked += db.execute(
+            update(Transaction).where(
+                and_(
+                    Transaction.id > start,
+                    Transaction.id <= start + batch_size,
+                    Transaction.contact_id.is_(None),
+                    Transaction.invoice_id == Invoice.id,
+                    Invoice.contact_id.isnot(None)
+                )
+            ).values(contact_id=Invoice.contact_id),
+            execution_options={"synchronize_session": False}
+        ).rowcount
+        db.commit()
+    return linked
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    from app.logging_config import setup_logging
+
+    setup_logging()
+    session = SessionLocal()
+    try:
+        invoices = backfill_invoice_contacts(session)
+        transactions = backfill_transaction_contacts(session)
+        logger.info("contacts.backfilled", extra={"invoices": invoices, "transactions": transactions})
+    finally:
+        session.close()
@@ -0,0 +1,82 @@
+"""
+Contact search for BiznesAssistant
+Matches against contacts.search_text / phone_digits, which a database trigger keeps
+normalized and which are covered by pg_trgm GIN indexes (see supabase_migration.sql)
+"""
+
+import re
+from typing import List, Optional
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session
+
+from app.models.contact import Contact, ContactType
+
+# pg_trgm needs at least three characters to use the GIN index; shorter terms are prefix-only
+MIN_TRIGRAM_LENGTH = 3
+
+# Uzbek numbers: +998 followed by a 9-digit national number
+COUNTRY_CODE = "998"
+NATIONAL_NUMBER_LENGTH = 9
+
+_NON_DIGITS = re.compile(r"\D")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_phone(value: Optional[str]) -> str:
+    """Digits only, same as the trigger's regexp_replace(phone, '\\D', '', 'g')."""
+    return _NON_DIGITS.sub("", value or "")
+
+
+def phone_query_digits(term: str) -> str:
+    """Digits to look for in phone_digits; '+998 90 123-45-67' also finds numbers stored without the country code."""
+    digits = normalize_phone(term)
+    if len(digits) > NATIONAL_NUMBER_LENGTH and digits.startswith(COUNTRY_CODE):
+        return digits[-NATIONAL_NUMBER_LENGTH:]
+    return digits
+
+
+def normalize_query(term: str) -> str:
+    """Lowercase, single-spaced, matching how the trigger builds search_text."""
+    return _WHITESPACE.sub(" ", term).strip().lower()
+
+
+def search_contacts(db: Session, tenant_id: int, company_id: int, term: str,
+                    contact_type: Optional[ContactType] = None, skip: int = 0, limit: int = 100) -> List[Contact]:
+    """Contacts matching every word of `term` (or its phone digits), best matches first.
+
+    Name prefixes rank above substring hits; ties are broken by trigram similarity.
+    """
+    query_text = normalize_query(term)
+    if not query_text:
+        return []
+
+    words = query_text.split(" ")
+    if len(query_text) < MIN_TRIGRAM_LENGTH:
+        text_match = Contact.search_text.startswith(query_text, autoescape=True)
+    else:
+        text_match = and_(*[Contact.search_text.contains(word, autoescape=True) for word in words])
+
+    digits = phone_query_digits(term)
+    matches = text_match
+    if len(digits) >= MIN_TRIGRAM_LENGTH:
+        matches = or_(text_match, Contact.phone_digits.contains(digits, autoescape=True))
+
+    rank = (
+        case((func.lower(Contact.name).startswith(query_text, autoescape=True), 2), else_=0)
+        + case((Contact.search_text.startswith(words[0], autoescape=True), 1), else_=0)
+        + func.similarity(Contact.search_text, query_text)
+    )
+
+    query = db.query(Contact).filter(
+        and_(
+            Contact.company_id == company_id,
+            Contact.tenant_id == tenant_id,
+            matches
+        )
+    )
+
+    if contact_type:
+        query = query.filter(Contact.type == contact_type)
+
+    return query.order_by(rank.desc(), Contact.id).offset(skip).limit(limit).all()
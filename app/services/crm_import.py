@@ -0,0 +1,290 @@
+"""
+Bulk contact and lead import for BiznesAssistant
+Normalizes phones, emails and INNs column-wise per chunk, rejects duplicates of existing rows
+with one set-based query per chunk and inserts valid rows with executemany
+"""
+
+from typing import Any, BinaryIO, Dict, List, Set
+
+import pandas as pd
+from sqlalchemy import and_, func, insert, or_
+from sqlalchemy.orm import Session
+
+from app.models.contact import Contact, ContactType
+from app.models.deal import PipelineEntityType
+from app.models.lead import Lead, LeadSource, LeadStatus
+from app.services.contact_dedup import MIN_PHONE_DIGITS, TAX_ID_DIGITS, email_key, phone_key, tax_id_key
+from app.services.contact_search import COUNTRY_CODE, NATIONAL_NUMBER_LENGTH
+from app.services.crm_versions import bump_crm_version
+from app.services.pipeline_analytics import record_initial_stages
+from app.services.spreadsheet_import import SpreadsheetImportService
+
+MAX_PHONE_DIGITS = 15  # E.164
+TAX_ID_LENGTHS = (9, 14)  # INN, PINFL
+EMAIL_PATTERN = r"^[^@\s]+@[^@\s]+\.[^@\s]+$"
+
+CONTACT_TYPE_BY_VALUE = {member.value: member for member in ContactType}
+LEAD_STATUS_BY_VALUE = {member.value: member for member in LeadStatus}
+LEAD_SOURCE_BY_VALUE = {member.value: member for member in LeadSource}
+
+
+def normalize_phones(values: pd.Series) -> tuple:
+    """(formatted '+998...' numbers, national-number keys, invalid mask); blanks stay None."""
+    digits = values.str.replace(r"\D", "", regex=True)
+    length = digits.str.len()
+    present = length.gt(0)
+    national = length.eq(NATIONAL_NUMBER_LENGTH)
+    formatted = ("+" + digits).where(~national, "+" + COUNTRY_CODE + digits).where(present, None)
+    invalid = present & (length.lt(MIN_PHONE_DIGITS) | length.gt(MAX_PHONE_DIGITS))
+    keys = digits.str[-NATIONAL_NUMBER_LENGTH:].where(present & ~invalid, None)
+    return formatted, keys, invalid
+
+
+def normalize_emails(values: pd.Series) -> tuple:
+    """(lowercased emails, invalid mask)."""
+    emails = values.str.lower()
+    present = emails.ne("")
+    invalid = present & ~emails.str.match(EMAIL_PATTERN)
+    return emails.where(present, None), invalid
+
+
+def normalize_tax_ids(values: pd.Series) -> tuple:
+    """(digit-only INN/PINFL, invalid mask)."""
+    digits = values.str.replace(r"\D", "", regex=True)
+    present = digits.ne("")
+    invalid = present & ~digits.str.len().isin(TAX_ID_LENGTHS)
+    return digits.where(present, None), invalid
+
+
+def _phone_variants(keys: Set[str]) -> List[str]:
+    """Stored spellings a national number may have: 901234567, 998901234567, +998901234567."""
+    return [variant for key in keys for variant in (key, COUNTRY_CODE + key, "+" + COUNTRY_CODE + key)]
+
+
+class _CRMImportService(SpreadsheetImportService):
+    """Chunked import with per-key duplicate detection; subclasses validate and look up existing keys"""
+
+    model = None
+    DEDUP_KEYS: List[str] = []
+
+    def __init__(self, db: Session, tenant_id: int, company_id: int, user_id: int):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.company_id = company_id
+        self.user_id = user_id
+
+    def import_file(self, file: BinaryIO, filename: str, dry_run: bool = False) -> Dict[str, Any]:
+        """Import every chunk of the file in one transaction and return a row-level report."""
+        report = self._new_report(dry_run)
+        seen: Dict[str, Set[str]] = {key: set() for key in self.DEDUP_KEYS}
+
+        for chunk, first_row in self._iter_chunks(file, filename):
+            report["total_rows"] += len(chunk)
+            frame, checks = self._validate_chunk(chunk)
+
+            # Duplicates are judged only among rows that are otherwise valid
+            base_invalid = pd.Series(False, index=chunk.index)
+            for mask, _ in checks:
+                base_invalid |= mask
+            keys = {key: frame[f"_{key}_key"].where(~base_invalid, None) for key in self.DEDUP_KEYS}
+            existing = self._existing_keys({key: set(column.dropna()) for key, column in keys.items()})
+            for key, column in keys.items():
+                present = column.notna()
+                checks.append((present & column.isin(existing[key]), f"{key} already exists"))
+                checks.append((present & (column.duplicated() | column.isin(seen[key])), f"{key} duplicates an earlier row"))
+
+            invalid, errors = self._row_errors(checks, chunk.index, first_row)
+            valid = frame[~invalid]
+            for key in self.DEDUP_KEYS:
+                seen[key].update(valid[f"_{key}_key"].dropna())
+
+            records = valid.drop(columns=[f"_{key}_key" for key in self.DEDUP_KEYS])
+            records = records.astype(object).where(records.notna(), None).to_dict("records")
+            for record in records:
+                record.update(
+                    company_id=self.company_id,
+                    tenant_id=self.tenant_id,
+                    assigned_user_id=self.user_id
+                )
+
+            if records and not dry_run:
+                self._insert(records)
+
+            report["imported"] += len(records)
+            report["failed"] += len(errors)
+            self._collect_errors(report, errors)
+
+        if dry_run:
+            self.db.rollback()
+        else:
+            if report["imported"]:
+                bump_crm_version(self.db, self.tenant_id, self.company_id)
+            self.db.commit()
+
+        return report
+
+    def _insert(self, records: List[Dict[str, Any]]):
+        self.db.execute(insert(self.model), records)
+
+    def _validate_chunk(self, chunk: pd.DataFrame) -> tuple:
+        raise NotImplementedError
+
+    def _existing_keys(self, keys: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+        raise NotImplementedError
+
+
+class ContactImportService(_CRMImportService):
+    """Imports contacts; duplicates are matched on INN, phone and email"""
+
+    model = Contact
+    DEDUP_KEYS = ["tax_id", "phone", "email"]
+    REQUIRED_COLUMNS = ["name"]
+    OPTIONAL_COLUMNS = [
+        "company_name", "email", "phone", "address", "tax_id", "bank_name", "bank_account", "mfo",
+        "website", "notes", "type", "telegram", "instagram", "facebook", "linkedin"
+    ]
+
+    def _validate_chunk(self, chunk: pd.DataFrame) -> tuple:
+        text = self._text_columns(chunk)
+        phone, phone_keys, phone_invalid = normalize_phones(text["phone"])
+        email, email_invalid = normalize_emails(text["email"])
+        tax_id, tax_id_invalid = normalize_tax_ids(text["tax_id"])
+        contact_type = text["type"].str.lower().replace("", ContactType.CUSTOMER.value)
+
+        checks = [
+            (text["name"].eq(""), "name is required"),
+            (phone_invalid, "phone must have 7-15 digits"),
+            (email_invalid, "email is invalid"),
+            (tax_id_invalid, "tax_id must be a 9-digit INN or 14-digit PINFL"),
+            (~contact_type.isin(CONTACT_TYPE_BY_VALUE.keys()), f"type must be one of: {', '.join(CONTACT_TYPE_BY_VALUE)}"),
+        ]
+
+        frame = pd.DataFrame({
+            column: text[column].replace("", None)
+            for column in self.REQUIRED_COLUMNS + self.OPTIONAL_COLUMNS
+            if column not in ("phone", "email", "tax_id", "type")
+        }, index=chunk.index)
+        frame["phone"] = phone
+        frame["email"] = email
+        frame["tax_id"] = tax_id
+        frame["type"] = contact_type.map(CONTACT_TYPE_BY_VALUE)
+        frame["_tax_id_key"] = tax_id
+        frame["_phone_key"] = phone_keys
+        frame["_email_key"] = email
+        return frame, checks
+
+    def _existing_keys(self, keys: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+        existing: Dict[str, Set[str]] = {key: set() for key in self.DEDUP_KEYS}
+        conditions = []
+        if keys["tax_id"]:
+            conditions.append(TAX_ID_DIGITS.in_(keys["tax_id"]))
+        if keys["phone"]:
+            conditions.append(Contact.phone_digits.in_(_phone_variants(keys["phone"])))
+            conditions.append(Contact.phone.in_(_phone_variants(keys["phone"])))
+        if keys["email"]:
+            conditions.append(func.lower(Contact.email).in_(keys["email"]))
+        if not conditions:
+            return existing
+
+        for tax_id, phone, email in self.db.query(Contact.tax_id, Contact.phone, Contact.email).filter(
+            and_(
+                Contact.company_id == self.company_id,
+                Contact.tenant_id == self.tenant_id,
+                or_(*conditions)
+            )
+        ):
+            existing["tax_id"].add(tax_id_key(tax_id))
+            existing["phone"].add(phone_key(phone))
+            existing["email"].add(email_key(email))
+        return existing
+
+
+class LeadImportService(_CRMImportService):
+    """Imports leads; duplicates are matched on the contact phone and email"""
+
+    model = Lead
+    DEDUP_KEYS = ["phone", "email"]
+    REQUIRED_COLUMNS = ["title", "contact_name"]
+    OPTIONAL_COLUMNS = [
+        "contact_email", "contact_phone", "company_name", "description", "status", "source",
+        "estimated_value", "probability", "address", "city", "region", "notes", "tags"
+    ]
+
+    def _validate_chunk(self, chunk: pd.DataFrame) -> tuple:
+        text = self._text_columns(chunk)
+        phone, phone_keys, phone_invalid = normalize_phones(text["contact_phone"])
+        email, email_invalid = normalize_emails(text["contact_email"])
+        status = text["status"].str.lower().replace("", LeadStatus.NEW.value)
+        source = text["source"].str.lower()
+        estimated_value = pd.to_numeric(
+            text["estimated_value"].str.replace(" ", "", regex=False).str.replace(",", ".", regex=False),
+            errors="coerce"
+        )
+        probability = pd.to_numeric(text["probability"].str.rstrip("%"), errors="coerce")
+
+        checks = [
+            (text["title"].eq(""), "title is required"),
+            (text["contact_name"].eq(""), "contact_name is required"),
+            (phone_invalid, "contact_phone must have 7-15 digits"),
+            (email_invalid, "contact_email is invalid"),
+            (~status.isin(LEAD_STATUS_BY_VALUE.keys()), f"status must be one of: {', '.join(LEAD_STATUS_BY_VALUE)}"),
+            (source.ne("") & ~source.isin(LEAD_SOURCE_BY_VALUE.keys()), f"source must be one of: {', '.join(LEAD_SOURCE_BY_VALUE)}"),
+            (text["estimated_value"].ne("") & (estimated_value.isna() | (estimated_value < 0)), "estimated_value must be a non-negative number"),
+            (text["probability"].ne("") & ~probability.between(0, 100), "probability must be between 0 and 100"),
+        ]
+
+        frame = pd.DataFrame({
+            column: text[column].replace("", None)
+            for column in ["title", "contact_name", "company_name", "description", "address", "city", "region", "notes", "tags"]
+        }, index=chunk.index)
+        frame["contact_phone"] = phone
+        frame["contact_email"] = email
+        frame["status"] = status.map(LEAD_STATUS_BY_VALUE)
+        frame["source"] = source.map(LEAD_SOURCE_BY_VALUE)
+        frame["estimated_value"] = estimated_value.round(2)
+        frame["probability"] = probability.fillna(0).round(2)
+        frame["_phone_key"] = phone_keys
+        frame["_email_key"] = email
+        return frame, checks
+
+    def _insert(self, records: List[Dict[str, Any]]):
+        # Every imported lead enters the pipeline history at its initial stage
+        inserted = self.db.execute(
+            insert(Lead).returning(Lead.id, Lead.status, Lead.estimated_value, Lead.probability),
+            records
+        ).all()
+        record_initial_stages(self.db, PipelineEntityType.LEAD, [
+            {
+                "id": lead_id,
+                "status": status,
+                "value": value,
+                "probability": probability,
+                "company_id": self.company_id,
+                "tenant_id": self.tenant_id
+            }
+            for lead_id, status, value, probability in inserted
+        ], self.user_id)
+
+    def _existing_keys(self, keys: Dict[str, Set[str]]) -> Dict[str, Set[str]]:
+        existing: Dict[str, Set[str]] = {key: set() for key in self.DEDUP_KEYS}
+        conditions = []
+        if keys["phone"]:
+            conditions.append(Lead.contact_phone.in_(_phone_variants(keys["phone"])))
+        if keys["email"]:
+            conditions.append(func.lower(Lead.contact_email).in_(keys["email"]))
+        if not conditions:
+            return existing
+
+        for phone, email in self.db.query(Lead.contact_phone, Lead.contact_email).filter(
+            and_(
+                Lead.company_id == self.company_id,
+                Lead.tenant_id == self.tenant_id,
+                or_(*conditions)
+            )
+        ):
+            existing["phone"].add(phone_key(phone))
+            existing["email"].add(email_key(email))
+        return existing
+
+
+IMPORTERS = {"contacts": ContactImportService, "leads": LeadImportService}
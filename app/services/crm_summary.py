@@ -0,0 +1,104 @@
+"""
+CRM summary for BiznesAssistant
+Contacts, leads, deals and today's activities aggregated in one UNION ALL round trip, cached per company CRM version
+"""
+
+from datetime import date, datetime, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Numeric, String, and_, cast, func, literal, null, select, union_all
+from sqlalchemy.orm import Session
+
+from app.models.activity import Activity
+from app.models.contact import Contact, ContactType
+from app.models.deal import Deal, DealStatus
+from app.models.lead import Lead, LeadStatus
+from app.services.crm_versions import get_crm_version
+from app.utils.cache import LRUCache
+
+_summary_cache = LRUCache(max_entries=4096)
+
+
+def _enum_lookup(enum_class) -> Dict[str, Any]:
+    # Grouping keys come back as text: enum names from SQLAlchemy writes, values from SQL defaults
+    lookup = {member.value: member for member in enum_class}
+    lookup.update({member.name: member for member in enum_class})
+    return lookup
+
+
+_KINDS = {
+    "contacts": ("type", _enum_lookup(ContactType)),
+    "leads": ("status", _enum_lookup(LeadStatus)),
+    "deals": ("status", _enum_lookup(DealStatus)),
+}
+
+
+def _grouped(kind: str, model, column, tenant_id: int, company_id: int, amount=None):
+    return select(
+        literal(kind).label("kind"),
+        cast(column, String).label("key"),
+        func.count(model.id).label("count"),
+        (func.sum(amount) if amount is not None else cast(null(), Numeric)).label("amount")
+    ).where(
+        and_(
+            model.company_id == company_id,
+            model.tenant_id == tenant_id
+        )
+    ).group_by(column)
+
+
+def compute_crm_summary(db: Session, tenant_id: int, company_id: int,
+                        today: Optional[date] = None) -> Dict[str, Any]:
+    """Counts per contact type, lead status and deal status, deal value and today's activities."""
+    today = today or datetime.now(timezone.utc).date()
+    day_start = datetime.combine(today, datetime.min.time(), tzinfo=timezone.utc)
+
+    activities = select(
+        literal("activities").label("kind"),
+        cast(null(), String).label("key"),
+        func.count(Activity.id).label("count"),
+        cast(null(), Numeric).label("amount")
+    ).where(
+        and_(
+            Activity.company_id == company_id,
+            Activity.tenant_id == tenant_id,
+            Activity.created_at >= day_start
+        )
+    )
+
+    statement = union_all(
+        _grouped("contacts", Contact, Contact.type, tenant_id, company_id),
+        _grouped("leads", Lead, Lead.status, tenant_id, company_id),
+        _grouped("deals", Deal, Deal.status, tenant_id, company_id, amount=Deal.deal_value),
+        activities
+    )
+
+    summary = {
+        "contacts_by_type": [],
+        "leads_by_status": [],
+        "deals_by_status": [],
+        "total_deal_value": 0.0,
+        "recent_activities": 0
+    }
+    for kind, key, count, amount in db.execute(statement):
+        if kind == "activities":
+            summary["recent_activities"] = count
+            continue
+        label, lookup = _KINDS[kind]
+        member = lookup.get(key)
+        summary[f"{kind}_by_{label}"].append({label: member.value if member else key, "count": count})
+        if kind == "deals":
+            summary["total_deal_value"] += float(amount or 0)
+
+    return summary
+
+
+def get_cached_crm_summary(db: Session, tenant_id: int, company_id: int) -> Dict[str, Any]:
+    """Summary reused until a CRM record of the company changes or the day rolls over."""
+    today = datetime.now(timezone.utc).date()
+    key = (tenant_id, company_id, get_crm_version(db, company_id), today)
+    summary = _summary_cache.get(key)
+    if summary is None:
+        summary = compute_crm_summary(db, tenant_id, company_id, today)
+        _summary_cache.set(key, summary)
+    return summary
@@ -0,0 +1,179 @@
+"""
+CRM timeline for BiznesAssistant
+Everything a contact, lead or deal page shows, fetched with a fixed number of indexed column queries
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_
+from sqlalchemy.orm import Session, aliased
+
+from app.models.activity import Activity
+from app.models.contact import Contact
+from app.models.deal import Deal
+from app.models.invoice import Invoice
+from app.models.lead import Lead
+from app.models.task import Task
+from app.models.user import User
+from app.schemas.contact import ContactResponse
+from app.schemas.deal import DealResponse
+from app.schemas.invoice import InvoiceSummaryResponse
+from app.schemas.lead import LeadResponse
+
+DEFAULT_TIMELINE_LIMIT = 50
+
+# entity type -> (model, response schema, foreign key column on activities and tasks)
+TIMELINE_ENTITIES = {
+    "contact": (Contact, ContactResponse, "contact_id"),
+    "lead": (Lead, LeadResponse, "lead_id"),
+    "deal": (Deal, DealResponse, "deal_id"),
+}
+
+INVOICE_COLUMNS = [getattr(Invoice, name) for name in InvoiceSummaryResponse.model_fields]
+
+
+def _user_name(full_name: Optional[str], username: Optional[str]) -> Optional[str]:
+    return full_name or username
+
+
+def _activities(db: Session, tenant_id: int, company_id: int, foreign_key: str, entity_id: int,
+                limit: int, before: Optional[datetime]) -> List[Dict[str, Any]]:
+    query = db.query(
+        Activity.id,
+        Activity.title,
+        Activity.type,
+        Activity.status,
+        Activity.priority,
+        Activity.scheduled_date,
+        Activity.completed_date,
+        Activity.outcome,
+        Activity.created_at,
+        Activity.user_id,
+        User.full_name,
+        User.username
+    ).outerjoin(User, User.id == Activity.user_id).filter(
+        and_(
+            getattr(Activity, foreign_key) == entity_id,
+            Activity.company_id == company_id,
+            Activity.tenant_id == tenant_id
+        )
+    )
+    if before:
+        query = query.filter(Activity.created_at < before)
+
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "type": row.type.value,
+            "status": row.status.value if row.status else None,
+            "priority": row.priority,
+            "scheduled_date": row.scheduled_date,
+            "completed_date": row.completed_date,
+            "outcome": row.outcome,
+            "created_at": row.created_at,
+            "user_id": row.user_id,
+            "user_name": _user_name(row.full_name, row.username)
+        }
+        for row in query.order_by(Activity.created_at.desc(), Activity.id.desc()).limit(limit)
+    ]
+
+
+def _tasks(db: Session, tenant_id: int, company_id: int, foreign_key: str, entity_id: int,
+           limit: int, before: Optional[datetime]) -> List[Dict[str, Any]]:
+    assignee = aliased(User)
+    query = db.query(
+        Task.id,
+        Task.title,
+        Task.status,
+        Task.priority,
+        Task.due_date,
+        Task.completed_at,
+        Task.created_at,
+        Task.assigned_to,
+        assignee.full_name,
+        assignee.username
+    ).outerjoin(assignee, assignee.id == Task.assigned_to).filter(
+        and_(
+            getattr(Task, foreign_key) == entity_id,
+            Task.company_id == company_id,
+            Task.tenant_id == tenant_id
+        )
+    )
+    if before:
+        query = query.filter(Task.created_at < before)
+
+    return [
+        {
+            "id": row.id,
+            "title": row.title,
+            "status": row.status,
+            "priority": row.priority,
+            "due_date": row.due_date,
+            "completed_at": row.completed_at,
+            "created_at": row.created_at,
+            "assigned_to": row.assigned_to,
+            "assignee_name": _user_name(row.full_name, row.username)
+        }
+        for row in query.order_by(Task.created_at.desc(), Task.id.desc()).limit(limit)
+    ]
+
+
+def _invoices(db: Session, tenant_id: int, company_id: int, contact_id: int,
+              limit: int, before: Optional[datetime]) -> List[InvoiceSummaryResponse]:
+    query = db.query(*INVOICE_COLUMNS).filter(
+        and_(
+            Invoice.contact_id == contact_id,
+            Invoice.company_id == company_id,
+            Invoice.tenant_id == tenant_id
+        )
+    )
+    if before:
+        query = query.filter(Invoice.created_at < before)
+
+    return [
+        InvoiceSummaryResponse.model_validate(row)
+        for row in query.order_by(Invoice.created_at.desc(), Invoice.id.desc()).limit(limit)
+    ]
+
+
+def get_timeline(db: Session, tenant_id: int, company_id: int, entity_type: str, entity_id: int,
+                 limit: int = DEFAULT_TIMELINE_LIMIT, before: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+    """The record with its latest activities, tasks and invoices; None if it is not in the company.
+
+    Invoices are linked through the contact, so a lead or deal shows its contact's invoices.
+    Pass the oldest created_at already shown as `before` to page further back.
+    """
+    model, schema, foreign_key = TIMELINE_ENTITIES[entity_type]
+    entity = db.query(model).filter(
+        and_(
+            model.id == entity_id,
+            model.company_id == company_id,
+            model.tenant_id == tenant_id
+        )
+    ).first()
+    if entity is None:
+        return None
+
+    contact_id = entity.id if entity_type == "contact" else entity.contact_id
+    timeline = {
+        entity_type: schema.model_validate(entity),
+        "activities": _activities(db, tenant_id, company_id, foreign_key, entity_id, limit, before),
+        "tasks": _tasks(db, tenant_id, company_id, foreign_key, entity_id, limit, before),
+        "invoices": _invoices(db, tenant_id, company_id, contact_id, limit, before) if contact_id else []
+    }
+
+    if entity_type == "contact":
+        # Leads and deals of the contact in two flat queries, instead of lazy relationship loads
+        for key, related, related_schema in (("leads", Lead, LeadResponse), ("deals", Deal, DealResponse)):
+            rows = db.query(related).filter(
+                and_(
+                    related.contact_id == entity_id,
+                    related.company_id == company_id,
+                    related.tenant_id == tenant_id
+                )
+            ).order_by(related.created_at.desc()).limit(limit)
+            timeline[key] = [related_schema.model_validate(row) for row in rows]
+
+    return timeline
@@ -0,0 +1,27 @@
+"""
+CRM versioning for BiznesAssistant
+A per-company counter bumped with every CRM write, used as a cache key
+"""
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.crm_version import CRMVersion
+
+
+def bump_crm_version(db: Session, tenant_id: int, company_id: int) -> None:
+    """Invalidate cached CRM aggregates of the company.
+
+    Runs inside the caller's transaction, so readers see the new version
+    together with the CRM change.
+    """
+    statement = pg_insert(CRMVersion).values(tenant_id=tenant_id, company_id=company_id, version=1)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[CRMVersion.company_id],
+        set_={"version": CRMVersion.version + 1, "updated_at": func.now()}
+    ))
+
+
+def get_crm_version(db: Session, company_id: int) -> int:
+    return db.query(CRMVersion.version).filter(CRMVersion.company_id == company_id).scalar() or 0
@@ -3,15 +3,18 @@ Email Service for BiznesAssistant
 Handles email verification and notifications
 """
 
+import logging
 import smtplib
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from typing import Optional
+from typing import Any, Dict, List, Optional
 import secrets
 from datetime import datetime, timedelta
 
 from app.config import settings
 
+logger = logging.getLogger(__name__)
+
 class EmailService:
     """Service for sending emails and managing email verification"""
     
@@ -144,22 +147,78 @@ class EmailService:
             print(f"Failed to send welcome email: {e}")
             return False
     
+    def send_activity_reminders(self, to_email: str, user_name: str, reminders: List[Dict[str, Any]],
+                                server: Optional[smtplib.SMTP] = None) -> bool:
+        """Send one digest of due activity reminders, over `server` when the caller keeps one open"""
+        try:
+            subject = f"BiznesAssistant: {len(reminders)} upcoming activit{'y' if len(reminders) == 1 else 'ies'}"
+            
+            items = "".join(
+                f"""<li><strong>{reminder['title']}</strong> ({reminder['type']})"""
+                f"""{' - ' + reminder['scheduled_date'].strftime('%d.%m.%Y %H:%M') if reminder['scheduled_date'] else ''}</li>"""
+                for reminder in reminders
+            )
+            html_body = f"""
+            <html>
+            <body style="font-family: Arial, sans-serif; max-width: 600px; margin: 0 auto;">
+                <div style="background-color: #f8f9fa; padding: 20px; border-radius: 8px;">
+                    <h3 style="color: #374151;">Hi {user_name},</h3>
+                    <p style="color: #6b7280; line-height: 1.6;">These activities are coming up:</p>
+                    <ul style="color: #374151; line-height: 1.6;">{items}</ul>
+                    <div style="text-align: center; margin: 30px 0;">
+                        <a href="{self.frontend_url}/crm" 
+                           style="background-color: #3b82f6; color: white; padding: 12px 24px; 
+                                  text-decoration: none; border-radius: 6px; display: inline-block;">
+                            Open CRM
+                        </a>
+                    </div>
+                </div>
+            </body>
+            </html>
+            """
+            
+            if server is not None:
+                server.send_message(self._message(to_email, subject, html_body))
+                return True
+            return self._send_email(to_email, subject, html_body)
+            
+        except Exception as e:
+            logger.warning("email.reminder_failed", extra={"to_email": to_email, "error": str(e)})
+            return False
+    
     def generate_verification_token(self) -> str:
         """Generate a secure verification token"""
         return secrets.token_urlsafe(32)
     
+    def open_smtp(self, timeout: Optional[float] = None) -> Optional[smtplib.SMTP]:
+        """Logged-in SMTP connection for sending many messages; None when SMTP is not configured"""
+        if not (self.smtp_username and self.smtp_password):
+            return None
+        server = smtplib.SMTP(self.smtp_server, self.smtp_port, timeout=timeout)
+        try:
+            server.starttls()
+            server.login(self.smtp_username, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        return server
+    
+    def _message(self, to_email: str, subject: str, html_body: str) -> MIMEMultipart:
+        msg = MIMEMultipart('alternative')
+        msg['Subject'] = subject
+        msg['From'] = self.from_email
+        msg['To'] = to_email
+        
+        # Attach HTML body
+        html_part = MIMEText(html_body, 'html')
+        msg.attach(html_part)
+        return msg
+    
     def _send_email(self, to_email: str, subject: str, html_body: str) -> bool:
         """Send email using SMTP"""
         try:
             # Create message
-            msg = MIMEMultipart('alternative')
-            msg['Subject'] = subject
-            msg['From'] = self.from_email
-            msg['To'] = to_email
-            
-            # Attach HTML body
-            html_part = MIMEText(html_body, 'html')
-            msg.attach(html_part)
+            msg = self._message(to_email, subject, html_body)
             
             # Send email (if SMTP credentials are configured)
             if self.smtp_username and self.smtp_password:
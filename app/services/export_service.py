@@ -0,0 +1,101 @@
+"""
+Streaming data export for BiznesAssistant
+Writes CSV (optionally gzipped) or XLSX from a server-side cursor with constant memory
+"""
+
+import csv
+import enum
+import io
+import tempfile
+import zlib
+from datetime import datetime
+from typing import Any, Iterable, Iterator, List, Sequence
+
+from openpyxl import Workbook
+
+EXPORT_BATCH_SIZE = 1000
+FILE_CHUNK_SIZE = 64 * 1024
+
+CSV_MEDIA_TYPE = "text/csv"
+GZIP_MEDIA_TYPE = "application/gzip"
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+def _xlsx_value(value: Any) -> Any:
+    if isinstance(value, enum.Enum):
+        return value.value
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        # Excel has no notion of time zones
+        return value.replace(tzinfo=None)
+    return value
+
+
+def iter_csv(headers: Sequence[str], rows: Iterable[Sequence[Any]]) -> Iterator[bytes]:
+    """Encode rows as CSV, flushing one batch of rows at a time."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    # BOM so Excel opens Cyrillic/Uzbek text correctly
+    buffer.write("\ufeff")
+    writer.writerow(headers)
+
+    pending = 0
+    for row in rows:
+        writer.writerow([_csv_value(value) for value in row])
+        pending += 1
+        if pending == EXPORT_BATCH_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate(0)
+            pending = 0
+
+    yield buffer.getvalue().encode("utf-8")
+
+
+def iter_gzip(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Gzip a byte stream on the fly."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits=31 writes a gzip header
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def iter_xlsx(headers: Sequence[str], rows: Iterable[Sequence[Any]], sheet_title: str) -> Iterator[bytes]:
+    """Write rows with openpyxl write-only mode and stream the finished file from disk."""
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_title)
+    sheet.append(list(headers))
+    for row in rows:
+        sheet.append([_xlsx_value(value) for value in row])
+
+    with tempfile.TemporaryFile() as output:
+        workbook.save(output)
+        output.seek(0)
+        while True:
+            chunk = output.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+
+
+def stream_export(headers: List[str], rows: Iterable[Sequence[Any]], export_format: str,
+                  sheet_title: str, compress: bool = False) -> Iterator[bytes]:
+    """Pick the writer for the requested format."""
+    if export_format == "xlsx":
+        # XLSX is already a zip archive, compressing it again gains nothing
+        return iter_xlsx(headers, rows, sheet_title)
+
+    stream = iter_csv(headers, rows)
+    return iter_gzip(stream) if compress else stream
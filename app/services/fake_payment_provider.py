@@ -0,0 +1,113 @@
+"""
+Fake Click and Payme clients for local testing
+Build correctly signed webhook requests, or drive a running server end to end:
+
+    python -m app.services.fake_payment_provider click 42 150000.00
+    python -m app.services.fake_payment_provider payme 42 150000.00 --base-url http://localhost:8000
+"""
+
+import argparse
+import base64
+import itertools
+import time
+import uuid
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+from app.config import settings
+from app.services.payment_webhooks import CLICK_COMPLETE, CLICK_PREPARE, PAYME_LOGIN, click_signature
+
+
+class FakeClick:
+    """Produces the form bodies Click posts to /click/prepare and /click/complete"""
+
+    # Shared by all instances, so two clients never reuse a click_trans_id
+    _ids = itertools.count(int(time.time() * 1000))
+
+    def __init__(self, secret_key: Optional[str] = None, service_id: Optional[str] = None):
+        self.secret_key = secret_key or settings.CLICK_SECRET_KEY or ""
+        self.service_id = service_id or settings.CLICK_SERVICE_ID or ""
+
+    def _signed(self, params: Dict[str, str]) -> Dict[str, str]:
+        params["sign_string"] = click_signature(params, self.secret_key)
+        return params
+
+    def prepare(self, invoice_id: int, amount: Decimal, click_trans_id: Optional[str] = None) -> Dict[str, str]:
+        click_trans_id = click_trans_id or str(next(self._ids))
+        return self._signed({
+            "click_trans_id": click_trans_id,
+            "service_id": self.service_id,
+            "click_paydoc_id": click_trans_id,
+            "merchant_trans_id": str(invoice_id),
+            "amount": f"{Decimal(amount):.2f}",
+            "action": CLICK_PREPARE,
+            "error": "0",
+            "error_note": "Success",
+            "sign_time": time.strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+    def complete(self, prepared: Dict[str, str], merchant_prepare_id: Any, error: int = 0) -> Dict[str, str]:
+        params = {key: value for key, value in prepared.items() if key != "sign_string"}
+        params.update({
+            "merchant_prepare_id": str(merchant_prepare_id),
+            "action": CLICK_COMPLETE,
+            "error": str(error),
+            "sign_time": time.strftime("%Y-%m-%d %H:%M:%S")
+        })
+        return self._signed(params)
+
+
+class FakePayme:
+    """Produces Payme JSON-RPC calls with the merchant Basic auth header"""
+
+    def __init__(self, secret_key: Optional[str] = None):
+        secret_key = secret_key or settings.PAYME_SECRET_KEY or ""
+        token = base64.b64encode(f"{PAYME_LOGIN}:{secret_key}".encode("utf-8")).decode("ascii")
+        self.headers = {"Authorization": f"Basic {token}"}
+        self._rpc_ids = itertools.count(1)
+
+    def call(self, method: str, **params) -> Tuple[Dict[str, Any], Dict[str, str]]:
+        return {"jsonrpc": "2.0", "id": next(self._rpc_ids), "method": method, "params": params}, self.headers
+
+    def create(self, invoice_id: int, amount: Decimal, transaction_id: Optional[str] = None):
+        return self.call(
+            "CreateTransaction",
+            id=transaction_id or uuid.uuid4().hex[:24],
+            time=int(time.time() * 1000),
+            amount=int(Decimal(amount) * 100),
+            account={"invoice_id": invoice_id}
+        )
+
+    def perform(self, transaction_id: str):
+        return self.call("PerformTransaction", id=transaction_id)
+
+
+def _pay(provider: str, invoice_id: int, amount: Decimal, base_url: str):
+    import httpx
+
+    with httpx.Client(base_url=f"{base_url}/api/payments") as client:
+        if provider == "click":
+            click = FakeClick()
+            prepared = click.prepare(invoice_id, amount)
+            prepare = client.post("/click/prepare", data=prepared).json()
+            print("prepare:", prepare)
+            if prepare["error"] == 0:
+                print("complete:", client.post(
+                    "/click/complete", data=click.complete(prepared, prepare["merchant_prepare_id"])
+                ).json())
+        else:
+            payme = FakePayme()
+            body, headers = payme.create(invoice_id, amount)
+            print("create:", client.post("/payme", json=body, headers=headers).json())
+            body, headers = payme.perform(body["params"]["id"])
+            print("perform:", client.post("/payme", json=body, headers=headers).json())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send a fake Click/Payme payment to a running server")
+    parser.add_argument("provider", choices=["click", "payme"])
+    parser.add_argument("invoice_id", type=int)
+    parser.add_argument("amount", type=Decimal)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    args = parser.parse_args()
+    _pay(args.provider, args.invoice_id, args.amount, args.base_url)
@@ -0,0 +1,125 @@
+"""
+Global search for BiznesAssistant
+Typed, ranked hits from the search_index table in one query, with an in-process prefix cache for typeahead
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, case, func, or_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.search_index import SearchEntityType, SearchIndexEntry
+from app.services.contact_search import MIN_TRIGRAM_LENGTH, normalize_query, phone_query_digits
+from app.utils.cache import LRUCache
+
+SEARCH_ENTITY_TYPES = tuple(entity_type.value for entity_type in SearchEntityType)
+
+# Rows fetched per query; a result shorter than this is complete and can serve longer prefixes
+MAX_RESULTS = 50
+
+_typeahead_cache = LRUCache(
+    max_entries=settings.SEARCH_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.SEARCH_CACHE_TTL_SECONDS
+)
+
+
+def _query_index(db: Session, tenant_id: int, company_id: int, query_text: str, digits: str,
+                 types: Sequence[str]) -> List[Dict[str, Any]]:
+    words = query_text.split(" ")
+    if len(query_text) < MIN_TRIGRAM_LENGTH:
+        matches = SearchIndexEntry.search_text.startswith(query_text, autoescape=True)
+    else:
+        matches = and_(*[SearchIndexEntry.search_text.contains(word, autoescape=True) for word in words])
+    if len(digits) >= MIN_TRIGRAM_LENGTH:
+        matches = or_(matches, SearchIndexEntry.search_text.contains(digits, autoescape=True))
+
+    score = (
+        case((func.lower(SearchIndexEntry.title).startswith(query_text, autoescape=True), 2), else_=0)
+        + case((SearchIndexEntry.search_text.startswith(words[0], autoescape=True), 1), else_=0)
+        + func.similarity(SearchIndexEntry.search_text, query_text)
+    ).label("score")
+
+    rows = db.query(
+        SearchIndexEntry.entity_type,
+        SearchIndexEntry.entity_id,
+        SearchIndexEntry.title,
+        SearchIndexEntry.subtitle,
+        SearchIndexEntry.search_text,
+        score
+    ).filter(
+        and_(
+            SearchIndexEntry.company_id == company_id,
+            SearchIndexEntry.tenant_id == tenant_id,
+            SearchIndexEntry.entity_type.in_(types),
+            matches
+        )
+    ).order_by(score.desc(), SearchIndexEntry.entity_type, SearchIndexEntry.entity_id).limit(MAX_RESULTS).all()
+
+    return [
+        {
+            "type": entity_type,
+            "id": entity_id,
+            "title": title,
+            "subtitle": subtitle,
+            "score": round(float(score), 4),
+            "_text": search_text
+        }
+        for entity_type, entity_id, title, subtitle, search_text, score in rows
+    ]
+
+
+def _narrow(hits: List[Dict[str, Any]], query_text: str, digits: str) -> List[Dict[str, Any]]:
+    """Apply the SQL match and prefix ranking to cached hits of a shorter query."""
+    words = query_text.split(" ")
+
+    def matches(hit: Dict[str, Any]) -> bool:
+        text = hit["_text"]
+        return all(word in text for word in words) or (len(digits) >= MIN_TRIGRAM_LENGTH and digits in text)
+
+    def prefix_rank(hit: Dict[str, Any]) -> int:
+        return 2 * hit["title"].lower().startswith(query_text) + hit["_text"].startswith(words[0])
+
+    return sorted((hit for hit in hits if matches(hit)), key=prefix_rank, reverse=True)
+
+
+def _cached_superset(key_base: Tuple, query_text: str, digits: str) -> Optional[List[Dict[str, Any]]]:
+    """Complete results of a shorter, already-cached query that must contain every hit for query_text."""
+    for length in range(len(query_text) - 1, MIN_TRIGRAM_LENGTH - 1, -1):
+        prefix = query_text[:length].rstrip()
+        if len(prefix) < MIN_TRIGRAM_LENGTH:
+            continue
+        entry = _typeahead_cache.get(key_base + (prefix,))
+        if entry is None:
+            continue
+        hits, complete, prefix_digits = entry
+        phone_ok = len(digits) < MIN_TRIGRAM_LENGTH or (len(prefix_digits) >= MIN_TRIGRAM_LENGTH and prefix_digits in digits)
+        if complete and phone_ok:
+            return hits
+    return None
+
+
+def search(db: Session, tenant_id: int, company_id: int, term: str,
+           types: Optional[Sequence[str]] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    """Ranked hits across entity types; repeated and extended typeahead queries are served from memory."""
+    query_text = normalize_query(term)
+    if not query_text:
+        return []
+    digits = phone_query_digits(term)
+    types = tuple(sorted(set(types or SEARCH_ENTITY_TYPES)))
+    key_base = (tenant_id, company_id, types)
+
+    entry = _typeahead_cache.get(key_base + (query_text,))
+    if entry is not None:
+        hits = entry[0]
+    else:
+        superset = _cached_superset(key_base, query_text, digits) if len(query_text) >= MIN_TRIGRAM_LENGTH else None
+        if superset is not None:
+            hits = _narrow(superset, query_text, digits)
+            complete = True
+        else:
+            hits = _query_index(db, tenant_id, company_id, query_text, digits, types)
+            complete = len(hits) < MAX_RESULTS
+        _typeahead_cache.set(key_base + (query_text,), (hits, complete, digits))
+
+    return [{key: value for key, value in hit.items() if key != "_text"} for hit in hits[:limit]]
@@ -0,0 +1,126 @@
+"""
+Accounts receivable aging for BiznesAssistant
+Bucketed in SQL, plus the nightly job that moves past-due invoices to OVERDUE
+
+Run the nightly job with: python -m app.services.invoice_aging
+"""
+
+import logging
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, case, func, or_, select, update
+from sqlalchemy.orm import Session
+
+from app.models.invoice import Invoice, InvoiceStatus
+from app.services.invoice_versions import bump_invoice_versions
+
+logger = logging.getLogger(__name__)
+
+# Invoices that still expect money; drafts and cancelled ones are not receivables
+OPEN_STATUSES = (InvoiceStatus.SENT, InvoiceStatus.OVERDUE)
+
+AGING_BUCKETS = ["current", "1_30", "31_60", "61_90", "over_90"]
+
+OVERDUE_BATCH_SIZE = 5000
+
+
+def _start_of_day(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def overdue_filter(today: Optional[date] = None):
+    """Invoices that are overdue, whether or not the nightly job has flagged them yet."""
+    today = today or datetime.now(timezone.utc).date()
+    return or_(
+        Invoice.status == InvoiceStatus.OVERDUE,
+        and_(Invoice.status == InvoiceStatus.SENT, Invoice.due_date < _start_of_day(today))
+    )
+
+
+def get_aging_report(db: Session, tenant_id: int, company_id: int, as_of: Optional[date] = None) -> Dict[str, Any]:
+    """Open receivables per customer and in total, bucketed by days past due."""
+    as_of = as_of or datetime.now(timezone.utc).date()
+    cutoff = _start_of_day(as_of)
+
+    bucket = case(
+        (Invoice.due_date >= cutoff, "current"),
+        (Invoice.due_date >= cutoff - timedelta(days=30), "1_30"),
+        (Invoice.due_date >= cutoff - timedelta(days=60), "31_60"),
+        (Invoice.due_date >= cutoff - timedelta(days=90), "61_90"),
+        else_="over_90"
+    ).label("bucket")
+
+    rows = db.query(
+        Invoice.contact_id,
+        Invoice.customer_name,
+        bucket,
+        func.count(Invoice.id),
+        func.sum(Invoice.remaining_amount)
+    ).filter(
+        and_(
+            Invoice.company_id == company_id,
+            Invoice.tenant_id == tenant_id,
+            Invoice.status.in_(OPEN_STATUSES),
+            Invoice.remaining_amount > 0
+        )
+    ).group_by(Invoice.contact_id, Invoice.customer_name, bucket).all()
+
+    def _empty() -> Dict[str, Any]:
+        return {**{name: 0.0 for name in AGING_BUCKETS}, "total": 0.0, "invoice_count": 0}
+
+    totals = _empty()
+    customers: Dict[tuple, Dict[str, Any]] = {}
+    for contact_id, customer_name, bucket_name, count, amount in rows:
+        customer = customers.setdefault(
+            (contact_id, customer_name),
+            {"contact_id": contact_id, "customer_name": customer_name, **_empty()}
+        )
+        amount = float(amount or 0)
+        for target in (customer, totals):
+            target[bucket_name] += amount
+            target["total"] += amount
+            target["invoice_count"] += count
+
+    return {
+        "as_of": as_of,
+        "buckets": AGING_BUCKETS,
+        "totals": totals,
+        "customers": sorted(customers.values(), key=lambda c: c["total"], reverse=True)
+    }
+
+
+def mark_overdue_invoices(db: Session, today: Optional[date] = None) -> int:
+    """Flip SENT invoices past their due date to OVERDUE, in batches to keep locks short."""
+    cutoff = _start_of_day(today or datetime.now(timezone.utc).date())
+    updated = 0
+    while True:
+        batch = select(Invoice.id).where(
+            and_(
+                Invoice.status == InvoiceStatus.SENT,
+                Invoice.due_date < cutoff
+            )
+        ).limit(OVERDUE_BATCH_SIZE).with_for_update(skip_locked=True).scalar_subquery()
+
+        companies = db.execute(
+            update(Invoice).where(Invoice.id.in_(batch)).values(status=InvoiceStatus.OVERDUE)
+            .returning(Invoice.tenant_id, Invoice.company_id),
+            execution_options={"synchronize_session": False}
+        ).all()
+        bump_invoice_versions(db, companies)
+        db.commit()
+        updated += len(companies)
+        if len(companies) < OVERDUE_BATCH_SIZE:
+            return updated
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    from app.logging_config import setup_logging
+
+    setup_logging()
+    session = SessionLocal()
+    try:
+        logger.info("invoices.marked_overdue", extra={"count": mark_overdue_invoices(session)})
+    finally:
+        session.close()
@@ -0,0 +1,70 @@
+"""
+Invoice number allocation for BiznesAssistant
+O(1), gap-free numbering from a per-(tenant, company, year) counter row
+"""
+
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import and_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.invoice import Invoice, InvoiceNumberCounter
+
+
+def invoice_number_prefix(tenant_id: int, year: int) -> str:
+    # Format: INV-T{tenant_id}-{year}-{6-digit number}
+    return f"INV-T{tenant_id}-{year}-"
+
+
+def _last_issued_number(db: Session, tenant_id: int, company_id: int, year: int) -> int:
+    """Highest number already issued for the year, used once to seed a new counter."""
+    prefix = invoice_number_prefix(tenant_id, year)
+    last_invoice = db.query(Invoice.invoice_number).filter(
+        and_(
+            Invoice.company_id == company_id,
+            Invoice.tenant_id == tenant_id,
+            Invoice.invoice_number.like(f"{prefix}%")
+        )
+    ).order_by(Invoice.invoice_number.desc()).first()
+
+    if last_invoice is None:
+        return 0
+    try:
+        return int(last_invoice[0].split("-")[-1])
+    except (ValueError, IndexError):
+        return 0
+
+
+def allocate_invoice_number(db: Session, tenant_id: int, company_id: int, year: Optional[int] = None) -> str:
+    """Reserve the next invoice number inside the caller's transaction.
+
+    The counter row stays locked until the caller commits or rolls back, so
+    concurrent creates queue on one row instead of colliding on the unique
+    index, and a rolled back invoice gives its number back (no gaps).
+    """
+    year = year or datetime.now().year
+    key = and_(
+        InvoiceNumberCounter.tenant_id == tenant_id,
+        InvoiceNumberCounter.company_id == company_id,
+        InvoiceNumberCounter.year == year
+    )
+    increment = update(InvoiceNumberCounter).where(key).values(
+        last_number=InvoiceNumberCounter.last_number + 1
+    ).returning(InvoiceNumberCounter.last_number)
+
+    number = db.execute(increment).scalar()
+    if number is None:
+        # First invoice of the year: create the counter, continuing any legacy numbering
+        db.execute(
+            pg_insert(InvoiceNumberCounter).values(
+                tenant_id=tenant_id,
+                company_id=company_id,
+                year=year,
+                last_number=_last_issued_number(db, tenant_id, company_id, year)
+            ).on_conflict_do_nothing()
+        )
+        number = db.execute(increment).scalar()
+
+    return f"{invoice_number_prefix(tenant_id, year)}{number:06d}"
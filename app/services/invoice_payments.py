@@ -0,0 +1,140 @@
+"""
+Invoice payments for BiznesAssistant
+Applies payments with atomic UPDATE ... RETURNING and records each one in invoice_payments
+"""
+
+from collections import OrderedDict
+from datetime import datetime, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+from sqlalchemy import Integer, Numeric, and_, case, cast, column, func, insert, select, update, values
+from sqlalchemy.orm import Session
+
+from app.models.invoice import Invoice, InvoicePayment, InvoiceStatus
+from app.services.invoice_versions import bump_invoice_version
+
+
+class InvoicePaymentError(ValueError):
+    """Payments cannot be applied; nothing was written."""
+
+    def __init__(self, message: str, invoice_ids: Sequence = ()):
+        super().__init__(message)
+        self.invoice_ids = list(invoice_ids)
+
+
+class InvoicesNotFoundError(InvoicePaymentError):
+    """Some target invoices do not exist for the tenant/company."""
+
+
+def _settle(amount):
+    """SET clause adding `amount` (bind or column) to an invoice, evaluated against the locked row."""
+    new_paid = func.coalesce(Invoice.paid_amount, 0) + amount
+    new_remaining = Invoice.total_amount - new_paid
+    settled = new_remaining <= 0
+    return {
+        "paid_amount": new_paid,
+        "remaining_amount": case((settled, 0), else_=new_remaining),
+        # Literal branches make the CASE text; cast it to the column's invoice_status enum
+        "status": cast(case(
+            (settled, InvoiceStatus.PAID.value),
+            (Invoice.status == InvoiceStatus.OVERDUE, InvoiceStatus.OVERDUE.value),
+            else_=InvoiceStatus.SENT.value
+        ), Invoice.status.type),
+        "paid_date": case((settled, func.coalesce(Invoice.paid_date, func.now())), else_=Invoice.paid_date)
+    }
+
+
+RETURNED_COLUMNS = (
+    Invoice.id, Invoice.invoice_number, Invoice.paid_amount, Invoice.remaining_amount, Invoice.status
+)
+
+
+def _lock_invoices(db: Session, tenant_id: int, company_id: int, invoice_ids: Sequence[int]) -> None:
+    """Lock target rows in id order so concurrent batches cannot deadlock."""
+    found = db.execute(
+        select(Invoice.id, Invoice.status).where(
+            and_(
+                Invoice.id.in_(invoice_ids),
+                Invoice.company_id == company_id,
+                Invoice.tenant_id == tenant_id
+            )
+        ).order_by(Invoice.id).with_for_update()
+    ).all()
+
+    missing = set(invoice_ids) - {invoice_id for invoice_id, _ in found}
+    if missing:
+        raise InvoicesNotFoundError("Invoices not found", sorted(missing))
+    cancelled = [invoice_id for invoice_id, status in found if status == InvoiceStatus.CANCELLED]
+    if cancelled:
+        raise InvoicePaymentError("Cannot record payments on cancelled invoices", cancelled)
+
+
+def apply_payments(db: Session, tenant_id: int, company_id: int, payments: List[Dict[str, Any]],
+                   source: str = "manual", user_id: Optional[int] = None) -> List[Dict[str, Any]]:
+    """Apply payments (dicts with invoice_id, amount, method, reference, paid_at) in the caller's transaction.
+
+    Amounts for the same invoice are summed and applied in one UPDATE, so the
+    invoice totals never go through a read-modify-write in Python.
+    """
+    totals: "OrderedDict[int, Decimal]" = OrderedDict()
+    for payment in payments:
+        totals[payment["invoice_id"]] = totals.get(payment["invoice_id"], Decimal("0")) + Decimal(str(payment["amount"]))
+
+    _lock_invoices(db, tenant_id, company_id, list(totals))
+
+    if len(totals) == 1:
+        (invoice_id, amount), = totals.items()
+        statement = update(Invoice).where(Invoice.id == invoice_id).values(**_settle(amount))
+    else:
+        incoming = values(
+            column("invoice_id", Integer), column("amount", Numeric(15, 2)), name="incoming"
+        ).data(list(totals.items()))
+        statement = update(Invoice).where(Invoice.id == incoming.c.invoice_id).values(**_settle(incoming.c.amount))
+
+    updated = db.execute(
+        statement.returning(*RETURNED_COLUMNS),
+        execution_options={"synchronize_session": False}
+    ).all()
+
+    now = datetime.now(timezone.utc)
+    db.execute(insert(InvoicePayment), [
+        {
+            "invoice_id": payment["invoice_id"],
+            "amount": payment["amount"],
+            "method": payment.get("method"),
+            "reference": payment.get("reference"),
+            "paid_at": payment.get("paid_at") or now,
+            "source": source,
+            "created_by_id": user_id,
+            "company_id": company_id,
+            "tenant_id": tenant_id
+        }
+        for payment in payments
+    ])
+    bump_invoice_version(db, tenant_id, company_id)
+
+    return [
+        {
+            "invoice_id": invoice_id,
+            "invoice_number": invoice_number,
+            "applied_amount": float(totals[invoice_id]),
+            "paid_amount": float(paid_amount),
+            "remaining_amount": float(remaining_amount),
+            "status": status.value
+        }
+        for invoice_id, invoice_number, paid_amount, remaining_amount, status in updated
+    ]
+
+
+def resolve_invoice_numbers(db: Session, tenant_id: int, company_id: int, numbers: Sequence[str]) -> Dict[str, int]:
+    """Map invoice numbers quoted on a bank statement to ids in one query."""
+    if not numbers:
+        return {}
+    return dict(db.query(Invoice.invoice_number, Invoice.id).filter(
+        and_(
+            Invoice.invoice_number.in_(set(numbers)),
+            Invoice.company_id == company_id,
+            Invoice.tenant_id == tenant_id
+        )
+    ).all())
@@ -0,0 +1,240 @@
+"""
+Invoice PDF rendering for BiznesAssistant
+Jinja2 templates compiled once per process; HTML to PDF conversion runs in a process pool
+"""
+
+import io
+import logging
+import os
+import tempfile
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from decimal import Decimal
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from jinja2 import Environment, FileSystemLoader, TemplateNotFound, select_autoescape
+
+from app.config import settings
+from app.models.company import Company
+from app.models.invoice import Invoice
+from app.utils.cache import LRUCache
+
+TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "templates", "invoices")
+DEFAULT_TEMPLATE = "default"
+FILE_CHUNK_SIZE = 64 * 1024
+
+PDF_MEDIA_TYPE = "application/pdf"
+ZIP_MEDIA_TYPE = "application/zip"
+# Archive entry listing the documents a batch could not render
+ERRORS_ENTRY = "errors.txt"
+
+logger = logging.getLogger(__name__)
+
+
+class PDFRenderError(RuntimeError):
+    """Raised when a document cannot be rendered."""
+
+
+# Rendered PDFs keyed by (invoice id, invoice version, company version)
+_pdf_cache = LRUCache(max_entries=2048, max_bytes=settings.PDF_CACHE_MAX_BYTES)
+
+_environment: Optional[Environment] = None
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _money(value) -> str:
+    return f"{Decimal(str(value or 0)):,.2f}".replace(",", " ")
+
+
+def _get_environment() -> Environment:
+    """One Jinja2 environment per process; compiled templates stay in its cache."""
+    global _environment
+    if _environment is None:
+        _environment = Environment(
+            loader=FileSystemLoader(TEMPLATE_DIR),
+            autoescape=select_autoescape(["html"]),
+            auto_reload=False,
+            cache_size=-1
+        )
+        _environment.filters["money"] = _money
+    return _environment
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        # A pool whose worker died rejects every new job; replace it
+        if _pool is None or _pool._broken:
+            _pool = ProcessPoolExecutor(max_workers=settings.PDF_RENDER_WORKERS)
+        return _pool
+
+
+def render_html(template_name: str, context: Dict[str, Any]) -> str:
+    environment = _get_environment()
+    try:
+        template = environment.get_template(f"{template_name}.html")
+    except TemplateNotFound:
+        template = environment.get_template(f"{DEFAULT_TEMPLATE}.html")
+    return template.render(**context)
+
+
+def render_pdf(template_name: str, context: Dict[str, Any]) -> bytes:
+    """Render one document to PDF bytes. Runs inside a pool worker."""
+    try:
+        from xhtml2pdf import pisa
+    except ImportError as e:
+        raise PDFRenderError("PDF rendering requires the xhtml2pdf package") from e
+
+    output = io.BytesIO()
+    result = pisa.CreatePDF(render_html(template_name, context), dest=output, encoding="utf-8")
+    if result.err:
+        raise PDFRenderError(f"Failed to render template '{template_name}'")
+    return output.getvalue()
+
+
+def _version(value) -> Optional[str]:
+    return value.isoformat() if value is not None else None
+
+
+def cache_key(invoice: Invoice, company: Optional[Company]) -> Tuple:
+    return (
+        invoice.id,
+        _version(invoice.updated_at or invoice.created_at),
+        _version((company.updated_at or company.created_at) if company else None)
+    )
+
+
+def invoice_context(invoice: Invoice, company: Optional[Company]) -> Dict[str, Any]:
+    """Plain, picklable template context for one invoice."""
+    return {
+        "company": {
+            "name": company.name if company else "",
+            "tax_id": company.tax_id if company else None,
+            "address": company.address if company else None,
+            "phone": company.phone if company else None,
+            "email": company.email if company else None,
+            "bank_name": company.bank_name if company else None,
+            "bank_account": company.bank_account if company else None,
+            "mfo": company.mfo if company else None
+        },
+        "invoice": {
+            "invoice_number": invoice.invoice_number,
+            "status": invoice.status.value if invoice.status else None,
+            "customer_name": invoice.customer_name,
+            "customer_tax_id": invoice.customer_tax_id,
+            "customer_address": invoice.customer_address,
+            "customer_phone": invoice.customer_phone,
+            "customer_email": invoice.customer_email,
+            "issue_date": invoice.issue_date.date().isoformat() if invoice.issue_date else None,
+            "due_date": invoice.due_date.date().isoformat() if invoice.due_date else None,
+            "subtotal": invoice.subtotal,
+            "vat_amount": invoice.vat_amount,
+            "total_amount": invoice.total_amount,
+            "paid_amount": invoice.paid_amount,
+            "remaining_amount": invoice.remaining_amount,
+            "notes": invoice.notes,
+            "terms": invoice.terms
+        },
+        "items": [
+            {
+                "description": item.description,
+                "quantity": item.quantity,
+                "unit_price": item.unit_price,
+                "discount": item.discount,
+                "line_total": item.line_total
+            }
+            for item in invoice.items
+        ]
+    }
+
+
+def _wait_for_pdf(future: Future, filename: str) -> bytes:
+    """The rendered PDF; any failure in the worker (bad template data, a crash) becomes PDFRenderError."""
+    try:
+        return future.result(timeout=settings.PDF_RENDER_TIMEOUT)
+    except FutureTimeoutError as e:
+        future.cancel()
+        raise PDFRenderError(f"Rendering {filename} timed out after {settings.PDF_RENDER_TIMEOUT}s") from e
+    except PDFRenderError:
+        raise
+    except Exception as e:
+        raise PDFRenderError(f"Rendering {filename} failed: {type(e).__name__}: {e}") from e
+
+
+def render_invoice_pdf(invoice: Invoice, company: Optional[Company]) -> bytes:
+    """PDF for one invoice, served from cache while the invoice is unchanged."""
+    key = cache_key(invoice, company)
+    pdf = _pdf_cache.get(key)
+    if pdf is None:
+        future = _get_pool().submit(render_pdf, invoice.template_name or DEFAULT_TEMPLATE,
+                                    invoice_context(invoice, company))
+        pdf = _wait_for_pdf(future, f"{invoice.invoice_number}.pdf")
+        _pdf_cache.set(key, pdf)
+    return pdf
+
+
+def prepare_batch(invoices: Iterable[Invoice], company: Optional[Company]) -> List[Tuple]:
+    """Snapshot everything the zip writer needs so it never touches the session."""
+    return [
+        (f"{invoice.invoice_number}.pdf", cache_key(invoice, company),
+         invoice.template_name or DEFAULT_TEMPLATE, invoice_context(invoice, company))
+        for invoice in invoices
+    ]
+
+
+def _render_batch(jobs: List[Tuple], concurrency: int) -> Iterator[Tuple[str, bytes]]:
+    """Yield (filename, pdf) in order, with at most `concurrency` renders in flight.
+
+    A document that fails or times out is left out and listed in a final
+    errors.txt entry, so the rest of the archive is still delivered.
+    """
+    in_flight = deque()
+    errors: List[str] = []
+
+    def _resolve(entry) -> Optional[Tuple[str, bytes]]:
+        filename, key, result = entry
+        if isinstance(result, Future):
+            try:
+                result = _wait_for_pdf(result, filename)
+            except PDFRenderError as e:
+                logger.warning("invoice_pdf.batch_render_failed", extra={"document": filename, "error": str(e)})
+                errors.append(f"{filename}: {e}")
+                return None
+            _pdf_cache.set(key, result)
+        return filename, result
+
+    for filename, key, template_name, context in jobs:
+        pdf = _pdf_cache.get(key)
+        result = pdf if pdf is not None else _get_pool().submit(render_pdf, template_name, context)
+        in_flight.append((filename, key, result))
+        while len(in_flight) >= concurrency:
+            rendered = _resolve(in_flight.popleft())
+            if rendered:
+                yield rendered
+
+    while in_flight:
+        rendered = _resolve(in_flight.popleft())
+        if rendered:
+            yield rendered
+
+    if errors:
+        yield ERRORS_ENTRY, ("\n".join(errors) + "\n").encode("utf-8")
+
+
+def iter_invoice_zip(jobs: List[Tuple], concurrency: int) -> Iterator[bytes]:
+    """Build the archive on disk and stream it back in chunks."""
+    with tempfile.TemporaryFile() as output:
+        # PDFs are already compressed, store them as-is
+        with zipfile.ZipFile(output, "w", zipfile.ZIP_STORED) as archive:
+            for filename, pdf in _render_batch(jobs, concurrency):
+                archive.writestr(filename, pdf)
+
+        output.seek(0)
+        while True:
+            chunk = output.read(FILE_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
@@ -0,0 +1,55 @@
+"""
+Invoice pricing for BiznesAssistant
+Computes line totals and invoice totals in one pass over the items
+"""
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Iterable
+
+from app.config import settings
+
+CENT = Decimal("0.01")
+HUNDRED = Decimal("100")
+
+
+def _decimal(value) -> Decimal:
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def line_total_for(item) -> Decimal:
+    """Client-provided line_total/total_price wins, otherwise quantity * price less discount."""
+    if getattr(item, "line_total", None) is not None:
+        line_total = _decimal(item.line_total)
+    elif getattr(item, "total_price", None) is not None:
+        line_total = _decimal(item.total_price)
+    else:
+        line_total = _decimal(item.quantity) * _decimal(item.unit_price)
+        if item.discount:
+            line_total *= (Decimal("1") - _decimal(item.discount) / HUNDRED)
+    return line_total.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+def price_invoice(items: Iterable) -> Dict[str, Any]:
+    """Price every item once and return the rows ready for a bulk insert plus the totals."""
+    lines = []
+    subtotal = Decimal("0")
+    for item in items:
+        line_total = line_total_for(item)
+        lines.append({
+            "description": item.description,
+            "quantity": item.quantity,
+            "unit_price": item.unit_price,
+            "discount": item.discount,
+            "vat_rate": item.vat_rate,
+            "line_total": line_total
+        })
+        subtotal += line_total
+
+    # Invoice VAT is charged on the subtotal at the standard rate
+    vat_amount = (subtotal * _decimal(settings.VAT_RATE)).quantize(CENT, rounding=ROUND_HALF_UP)
+    return {
+        "lines": lines,
+        "subtotal": subtotal,
+        "vat_amount": vat_amount,
+        "total_amount": subtotal + vat_amount
+    }
@@ -0,0 +1,73 @@
+"""
+Invoice summary for BiznesAssistant
+One GROUP BY status pass, cached per company invoice version
+"""
+
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from sqlalchemy import and_, func
+from sqlalchemy.orm import Session
+
+from app.models.invoice import Invoice, InvoiceStatus
+from app.services.invoice_aging import overdue_filter
+from app.services.invoice_versions import get_invoice_version
+from app.utils.cache import LRUCache
+
+_summary_cache = LRUCache(max_entries=4096)
+
+
+def compute_invoice_summary(db: Session, tenant_id: int, company_id: int,
+                            start_date: Optional[date] = None, end_date: Optional[date] = None,
+                            today: Optional[date] = None) -> Dict[str, Any]:
+    """Counts and amounts per status plus the overdue count, from a single scan."""
+    query = db.query(
+        Invoice.status,
+        func.count(Invoice.id),
+        func.sum(Invoice.total_amount),
+        func.sum(Invoice.paid_amount),
+        func.sum(Invoice.remaining_amount),
+        func.count(Invoice.id).filter(overdue_filter(today))
+    ).filter(
+        and_(
+            Invoice.company_id == company_id,
+            Invoice.tenant_id == tenant_id
+        )
+    )
+
+    if start_date:
+        query = query.filter(Invoice.issue_date >= start_date)
+
+    if end_date:
+        query = query.filter(Invoice.issue_date < end_date + timedelta(days=1))
+
+    invoices_by_status = []
+    total_invoiced = total_paid = total_outstanding = 0
+    overdue_invoices = 0
+    for status, count, invoiced, paid, remaining, overdue in query.group_by(Invoice.status).all():
+        invoices_by_status.append({"status": status.value, "count": count})
+        total_invoiced += invoiced or 0
+        total_paid += paid or 0
+        if status != InvoiceStatus.PAID:
+            total_outstanding += remaining or 0
+        overdue_invoices += overdue or 0
+
+    return {
+        "invoices_by_status": invoices_by_status,
+        "total_invoiced": float(total_invoiced),
+        "total_paid": float(total_paid),
+        "total_outstanding": float(total_outstanding),
+        "overdue_invoices": overdue_invoices
+    }
+
+
+def get_cached_invoice_summary(db: Session, tenant_id: int, company_id: int,
+                               start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, Any]:
+    """Summary reused until an invoice of the company changes or the day rolls over."""
+    today = datetime.now(timezone.utc).date()
+    key = (tenant_id, company_id, get_invoice_version(db, company_id), start_date, end_date, today)
+    summary = _summary_cache.get(key)
+    if summary is None:
+        summary = compute_invoice_summary(db, tenant_id, company_id, start_date, end_date, today)
+        _summary_cache.set(key, summary)
+    return summary
@@ -0,0 +1,37 @@
+"""
+Invoice versioning for BiznesAssistant
+A per-company counter bumped with every invoice write, used as a cache key
+"""
+
+from typing import Iterable, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.invoice import InvoiceVersion
+
+
+def bump_invoice_versions(db: Session, companies: Iterable[Tuple[int, int]]) -> None:
+    """Invalidate cached invoice aggregates for (tenant_id, company_id) pairs.
+
+    Runs inside the caller's transaction, so readers see the new version
+    together with the invoice change.
+    """
+    rows = [{"tenant_id": tenant_id, "company_id": company_id, "version": 1}
+            for tenant_id, company_id in sorted(set(companies))]
+    if not rows:
+        return
+    statement = pg_insert(InvoiceVersion).values(rows)
+    db.execute(statement.on_conflict_do_update(
+        index_elements=[InvoiceVersion.company_id],
+        set_={"version": InvoiceVersion.version + 1, "updated_at": func.now()}
+    ))
+
+
+def bump_invoice_version(db: Session, tenant_id: int, company_id: int) -> None:
+    bump_invoice_versions(db, [(tenant_id, company_id)])
+
+
+def get_invoice_version(db: Session, company_id: int) -> int:
+    return db.query(InvoiceVersion.version).filter(InvoiceVersion.company_id == company_id).scalar() or 0
@@ -14,6 +14,7 @@ from app.models.lead import Lead, LeadStatus
 from app.models.deal import Deal, DealStatus
 from app.models.kpi import KPI, KPICategory, KPIPeriod
 from app.models.user import User
+from app.services.invoice_aging import overdue_filter
 
 class KPIPopulator:
     """Service to populate KPI data from business operations"""
@@ -219,8 +220,7 @@ class KPIPopulator:
         overdue_invoices = self.db.query(func.count(Invoice.id)).filter(
             Invoice.tenant_id == self.tenant_id,
             Invoice.company_id == self.company_id,
-            Invoice.status == InvoiceStatus.SENT,
-            Invoice.due_date < datetime.utcnow().date()
+            overdue_filter()
         ).scalar() or 0
         
         return {
@@ -14,6 +14,7 @@ from app.models.lead import Lead, LeadStatus
 from app.models.deal import Deal, DealStatus
 from app.models.user import User, UserRole
 from app.schemas.kpi import KPIResponse, KPITrendResponse, ForecastResponse
+from app.services.pipeline_analytics import lead_conversion_summary
 
 class KPIService:
     
@@ -457,13 +458,7 @@ class KPIService:
     
     def _get_lead_conversion(self, company_id: int) -> Dict[str, Any]:
         """Get lead conversion data."""
-        # Mock data - in real implementation, query from leads and deals tables
-        return {
-            "totalLeads": 124,
-            "convertedLeads": 43,
-            "conversionRate": 34.7,
-            "pipelineValue": 2850000  # UZS
-        }
+        return lead_conversion_summary(self.db, company_id, self.tenant_id)
     
     def _get_invoice_summary(self, company_id: int) -> Dict[str, Any]:
         """Get invoice summary data."""
@@ -0,0 +1,182 @@
+"""
+Ledger service for BiznesAssistant
+Running balances from monthly checkpoints plus a window function over one page
+"""
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import and_, case, extract, func, or_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.models.accounting_rollup import LedgerCheckpoint
+from app.models.transaction import Transaction, TransactionType
+
+
+def _month_start(value: date) -> date:
+    return date(value.year, value.month, 1)
+
+
+def _next_month(value: date) -> date:
+    return date(value.year + value.month // 12, value.month % 12 + 1, 1)
+
+
+class LedgerService:
+    """Reads the ledger of one company page by page"""
+
+    def __init__(self, db: Session, tenant_id: int, company_id: int):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.company_id = company_id
+        self.signed_amount = case(
+            (Transaction.type == TransactionType.INCOME, Transaction.amount),
+            else_=-Transaction.amount
+        )
+
+    def _base_filter(self):
+        return and_(
+            Transaction.company_id == self.company_id,
+            Transaction.tenant_id == self.tenant_id
+        )
+
+    def checkpoint_for(self, day: date) -> Tuple[date, Decimal]:
+        """Opening balance of the month containing `day`, creating missing checkpoints on the way."""
+        target = _month_start(day)
+
+        nearest = self.db.query(LedgerCheckpoint).filter(
+            and_(
+                LedgerCheckpoint.company_id == self.company_id,
+                LedgerCheckpoint.month <= target
+            )
+        ).order_by(LedgerCheckpoint.month.desc()).first()
+
+        if nearest is not None and nearest.month == target:
+            return nearest.month, nearest.opening_balance
+
+        # Monthly net movement between the nearest checkpoint and the target month
+        year = extract("year", Transaction.date)
+        month = extract("month", Transaction.date)
+        movements = self.db.query(year, month, func.sum(self.signed_amount)).filter(
+            self._base_filter(),
+            Transaction.date < target
+        )
+        if nearest is not None:
+            movements = movements.filter(Transaction.date >= nearest.month)
+        movements = {
+            date(int(y), int(m), 1): total or Decimal("0")
+            for y, m, total in movements.group_by(year, month).all()
+        }
+
+        if nearest is None:
+            if not movements:
+                return target, Decimal("0")
+            cursor, balance = min(movements), Decimal("0")
+        else:
+            cursor, balance = nearest.month, nearest.opening_balance
+
+        # One checkpoint per month, empty months included, so the next lookup is exact
+        checkpoints = []
+        while cursor < target:
+            balance += movements.get(cursor, Decimal("0"))
+            cursor = _next_month(cursor)
+            checkpoints.append({
+                "month": cursor,
+                "opening_balance": balance,
+                "company_id": self.company_id,
+                "tenant_id": self.tenant_id
+            })
+        # Concurrent readers rebuilding the same months compute identical values; the first write wins
+        self.db.execute(pg_insert(LedgerCheckpoint).values(checkpoints).on_conflict_do_nothing(
+            index_elements=[LedgerCheckpoint.company_id, LedgerCheckpoint.month]
+        ))
+        self.db.commit()
+
+        return target, balance
+
+    def balance_before(self, start_date: Optional[date], after_date: Optional[datetime],
+                       after_id: Optional[int]) -> Decimal:
+        """Balance of everything preceding the page: checkpoint + at most one month of rows."""
+        if after_date is not None:
+            month, balance = self.checkpoint_for(after_date.date())
+            preceding = or_(
+                Transaction.date < after_date,
+                and_(Transaction.date == after_date, Transaction.id <= after_id)
+            )
+        elif start_date is not None:
+            month, balance = self.checkpoint_for(start_date)
+            preceding = Transaction.date < start_date
+        else:
+            return Decimal("0")
+
+        partial = self.db.query(func.sum(self.signed_amount)).filter(
+            self._base_filter(),
+            Transaction.date >= month,
+            preceding
+        ).scalar()
+        return balance + (partial or Decimal("0"))
+
+    def get_page(self, start_date: Optional[date] = None, end_date: Optional[date] = None,
+                 after_date: Optional[datetime] = None, after_id: Optional[int] = None,
+                 limit: int = 100) -> Dict[str, Any]:
+        """One page of ledger entries ordered by (date, id) with running balances."""
+        opening_balance = self.balance_before(start_date, after_date, after_id)
+
+        running = func.sum(self.signed_amount).over(
+            order_by=(Transaction.date, Transaction.id),
+            rows=(None, 0)
+        )
+        query = self.db.query(
+            Transaction.id,
+            Transaction.date,
+            Transaction.type,
+            Transaction.category,
+            Transaction.description,
+            Transaction.reference_number,
+            Transaction.amount,
+            self.signed_amount,
+            running
+        ).filter(self._base_filter())
+
+        if after_date is not None:
+            query = query.filter(
+                or_(
+                    Transaction.date > after_date,
+                    and_(Transaction.date == after_date, Transaction.id > after_id)
+                )
+            )
+        elif start_date is not None:
+            query = query.filter(Transaction.date >= start_date)
+
+        if end_date is not None:
+            query = query.filter(Transaction.date < end_date + timedelta(days=1))
+
+        rows = query.order_by(Transaction.date, Transaction.id).limit(limit + 1).all()
+        has_more = len(rows) > limit
+        rows = rows[:limit]
+
+        entries = []
+        for id_, date_, type_, category, description, reference_number, amount, signed, cumulative in rows:
+            entries.append({
+                "id": id_,
+                "date": date_,
+                "type": type_.value,
+                "category": category.value,
+                "description": description,
+                "reference_number": reference_number,
+                "amount": float(amount),
+                "signed_amount": float(signed),
+                "balance": float(opening_balance + cumulative)
+            })
+
+        next_cursor = None
+        if has_more and entries:
+            next_cursor = {"after_date": entries[-1]["date"], "after_id": entries[-1]["id"]}
+
+        return {
+            "opening_balance": float(opening_balance),
+            "closing_balance": entries[-1]["balance"] if entries else float(opening_balance),
+            "entries": entries,
+            "next_cursor": next_cursor
+        }
@@ -0,0 +1,167 @@
+"""
+Payment event consumer for BiznesAssistant
+Applies pending payment_events to invoices in batches, claimed with FOR UPDATE SKIP LOCKED
+
+Run with: python -m app.services.payment_consumer
+"""
+
+import logging
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.invoice import Invoice
+from app.models.payment_event import PaymentEvent, PaymentEventStatus
+from app.services.invoice_payments import InvoicePaymentError, apply_payments
+
+logger = logging.getLogger(__name__)
+
+
+class PaymentEventConsumer:
+    """Moves PENDING inbox rows to APPLIED (or FAILED) and updates the invoices they pay"""
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: Optional[int] = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.PAYMENT_CONSUMER_BATCH_SIZE
+
+    def run_batch(self) -> Dict[str, int]:
+        """Claim one batch of pending events and apply them, one savepoint per company and provider.
+
+        Events that cannot be applied are marked FAILED on their own; the rest of
+        their group is retried without them and the rest of the batch still commits.
+        A group that hits a transient error (deadlock, lost lock) stays PENDING for the next pass.
+        """
+        db = self.session_factory()
+        try:
+            events: List[PaymentEvent] = db.query(PaymentEvent).filter(
+                PaymentEvent.status == PaymentEventStatus.PENDING.value
+            ).order_by(PaymentEvent.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+            if not events:
+                db.rollback()
+                return {"claimed": 0, "applied": 0, "failed": 0, "retried": 0}
+
+            owners = {
+                invoice_id: (tenant_id, company_id)
+                for invoice_id, tenant_id, company_id in db.query(
+                    Invoice.id, Invoice.tenant_id, Invoice.company_id
+                ).filter(Invoice.id.in_({event.invoice_id for event in events if event.invoice_id})).all()
+            }
+
+            now = datetime.now(timezone.utc)
+            groups: Dict[Tuple[int, int, str], List[PaymentEvent]] = defaultdict(list)
+            for event in events:
+                owner = owners.get(event.invoice_id)
+                if owner is None:
+                    self._fail(event, "Invoice not found", now)
+                else:
+                    groups[owner + (event.provider,)].append(event)
+
+            # Companies in a fixed order, so concurrent consumers lock their invoices in the same order
+            for (tenant_id, company_id, provider) in sorted(groups):
+                self._apply_group(db, tenant_id, company_id, provider, groups[(tenant_id, company_id, provider)], now)
+
+            statuses = Counter(event.status for event in events)
+            result = {
+                "claimed": len(events),
+                "applied": statuses[PaymentEventStatus.APPLIED.value],
+                "failed": statuses[PaymentEventStatus.FAILED.value],
+                "retried": statuses[PaymentEventStatus.PENDING.value]
+            }
+            db.commit()
+            logger.info("payments.batch_done", extra=result)
+            return result
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _apply_group(self, db: Session, tenant_id: int, company_id: int, provider: str,
+                     group: List[PaymentEvent], now: datetime):
+        """Apply a group in one savepoint, failing only the events at fault."""
+        try:
+            with db.begin_nested():
+                apply_payments(db, tenant_id, company_id, [
+                    {
+                        "invoice_id": event.invoice_id,
+                        "amount": event.amount,
+                        "method": event.provider,
+                        "reference": event.provider_transaction_id,
+                        "paid_at": event.paid_at
+                    }
+                    for event in group
+                ], source=provider)
+        except InvoicePaymentError as e:
+            rejected, error = set(e.invoice_ids), str(e)
+        except (IntegrityError, DataError) as e:
+            invoice_ids = sorted({event.invoice_id for event in group})
+            if len(invoice_ids) > 1:
+                # The culprit is unknown; retry invoice by invoice so it only fails its own events
+                for invoice_id in invoice_ids:
+                    self._apply_group(db, tenant_id, company_id, provider,
+                                      [event for event in group if event.invoice_id == invoice_id], now)
+                return
+            logger.exception("payments.apply_error", extra={"company_id": company_id, "invoice_ids": invoice_ids})
+            rejected, error = set(invoice_ids), str(e)
+        except Exception:
+            # Not the payment's fault: the savepoint is gone and the events stay PENDING for the next pass
+            logger.exception(
+                "payments.apply_retry",
+                extra={"company_id": company_id, "invoice_ids": sorted({event.invoice_id for event in group})}
+            )
+            return
+        else:
+            for event in group:
+                event.status = PaymentEventStatus.APPLIED.value
+                event.processed_at = now
+            return
+
+        failing = [event for event in group if event.invoice_id in rejected] or group
+        logger.warning(
+            "payments.apply_failed",
+            extra={"company_id": company_id, "invoice_ids": sorted({event.invoice_id for event in failing}), "error": error}
+        )
+        for event in failing:
+            self._fail(event, error, now)
+        remaining = [event for event in group if event not in failing]
+        if remaining:
+            self._apply_group(db, tenant_id, company_id, provider, remaining, now)
+
+    @staticmethod
+    def _fail(event: PaymentEvent, error: str, now: datetime):
+        event.status = PaymentEventStatus.FAILED.value
+        event.error = error
+        event.processed_at = now
+
+    def run_until_idle(self) -> int:
+        """Drain all pending events; returns how many were applied."""
+        total = 0
+        while True:
+            result = self.run_batch()
+            total += result["applied"]
+            # Retried events are still pending; leave them for the next poll instead of spinning on them
+            if result["claimed"] < self.batch_size or result["retried"]:
+                return total
+
+    def run_forever(self):
+        logger.info("payments.consumer_started", extra={"batch_size": self.batch_size})
+        while True:
+            try:
+                self.run_until_idle()
+            except Exception:
+                logger.exception("payments.batch_failed")
+            time.sleep(settings.PAYMENT_CONSUMER_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    from app.logging_config import setup_logging
+
+    setup_logging()
+    PaymentEventConsumer(SessionLocal).run_forever()
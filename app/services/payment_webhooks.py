@@ -0,0 +1,378 @@
+"""
+Click and Payme webhook handling for BiznesAssistant
+Verifies provider requests and writes settled transactions to the payment_events inbox.
+Invoices are updated later by the consumer (app.services.payment_consumer), so each
+webhook costs at most one indexed lookup and one insert.
+"""
+
+import base64
+import hashlib
+import hmac
+from datetime import datetime, timezone
+from decimal import Decimal, InvalidOperation
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from sqlalchemy import and_, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.payment_event import PaymentEvent, PaymentEventStatus, PaymentProvider
+
+# Click SHOP API error codes
+CLICK_OK = 0
+CLICK_SIGN_FAILED = -1
+CLICK_WRONG_AMOUNT = -2
+CLICK_ACTION_NOT_FOUND = -3
+CLICK_ALREADY_PAID = -4
+CLICK_INVOICE_NOT_FOUND = -5
+CLICK_BAD_REQUEST = -8
+CLICK_CANCELLED = -9
+
+CLICK_PREPARE = "0"
+CLICK_COMPLETE = "1"
+
+# Payme Merchant API error codes
+PAYME_WRONG_AMOUNT = -31001
+PAYME_TRANSACTION_NOT_FOUND = -31003
+PAYME_CANNOT_CANCEL = -31007
+PAYME_CANNOT_PERFORM = -31008
+PAYME_INVOICE_NOT_FOUND = -31050
+PAYME_INVALID_REQUEST = -32600
+PAYME_METHOD_NOT_FOUND = -32601
+PAYME_UNAUTHORIZED = -32504
+
+# Payme transaction states
+PAYME_CREATED = 1
+PAYME_PERFORMED = 2
+PAYME_CANCELLED = -1
+
+PAYME_LOGIN = "Paycom"
+
+_PAYABLE_STATUSES = (InvoiceStatus.DRAFT, InvoiceStatus.SENT, InvoiceStatus.OVERDUE)
+
+
+class PaymeError(Exception):
+    """JSON-RPC error returned to Payme with HTTP 200."""
+
+    def __init__(self, code: int, message: str, data: Optional[str] = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.data = data
+
+    def as_rpc(self) -> Dict[str, Any]:
+        error = {"code": self.code, "message": {"ru": self.message, "uz": self.message, "en": self.message}}
+        if self.data:
+            error["data"] = self.data
+        return error
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _to_millis(moment: Optional[datetime]) -> int:
+    return int(moment.timestamp() * 1000) if moment else 0
+
+
+def _parse_int(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _payable_invoice(db: Session, invoice_id: Optional[int], amount: Decimal) -> Tuple[Optional[Invoice], Optional[str]]:
+    """Invoice row if it can take `amount`, otherwise the reason it cannot ('not_found', 'paid', 'cancelled', 'amount')."""
+    if invoice_id is None:
+        return None, "not_found"
+    row = db.query(Invoice.id, Invoice.status, Invoice.remaining_amount).filter(Invoice.id == invoice_id).first()
+    if row is None:
+        return None, "not_found"
+    if row.status == InvoiceStatus.PAID:
+        return row, "paid"
+    if row.status not in _PAYABLE_STATUSES:
+        return row, "cancelled"
+    if amount <= 0 or amount > (row.remaining_amount or 0):
+        return row, "amount"
+    return row, None
+
+
+def record_payment_event(db: Session, provider: PaymentProvider, transaction_id: str, invoice_id: Optional[int],
+                         amount: Decimal, payload: Dict[str, Any], status: PaymentEventStatus,
+                         paid_at: Optional[datetime] = None) -> int:
+    """Insert an inbox row once per provider transaction; returns the row id, new or existing."""
+    inserted = db.execute(
+        pg_insert(PaymentEvent).values(
+            provider=provider.value,
+            provider_transaction_id=transaction_id,
+            invoice_id=invoice_id,
+            amount=amount,
+            paid_at=paid_at,
+            payload=payload,
+            status=status.value
+        ).on_conflict_do_nothing(
+            index_elements=[PaymentEvent.provider, PaymentEvent.provider_transaction_id]
+        ).returning(PaymentEvent.id)
+    ).scalar()
+    if inserted is not None:
+        return inserted
+    return db.query(PaymentEvent.id).filter(
+        and_(
+            PaymentEvent.provider == provider.value,
+            PaymentEvent.provider_transaction_id == transaction_id
+        )
+    ).scalar()
+
+
+# Click SHOP API (prepare/complete)
+
+def click_signature(params: Mapping[str, str], secret_key: str) -> str:
+    """md5 over the raw request fields, in the order Click documents."""
+    parts = [
+        params.get("click_trans_id", ""),
+        params.get("service_id", ""),
+        secret_key,
+        params.get("merchant_trans_id", "")
+    ]
+    if params.get("action") == CLICK_COMPLETE:
+        parts.append(params.get("merchant_prepare_id", ""))
+    parts += [params.get("amount", ""), params.get("action", ""), params.get("sign_time", "")]
+    return hashlib.md5("".join(parts).encode("utf-8")).hexdigest()
+
+
+def _click_response(params: Mapping[str, str], error: int, note: str, **extra) -> Dict[str, Any]:
+    return {
+        "click_trans_id": params.get("click_trans_id"),
+        "merchant_trans_id": params.get("merchant_trans_id"),
+        **extra,
+        "error": error,
+        "error_note": note
+    }
+
+
+def _click_check(params: Mapping[str, str]) -> Tuple[Optional[int], Optional[Decimal], Optional[Dict[str, Any]]]:
+    """Shared validation for prepare and complete; returns (invoice_id, amount, error_response)."""
+    expected = click_signature(params, settings.CLICK_SECRET_KEY or "")
+    if (not settings.CLICK_SECRET_KEY
+            or params.get("service_id") != settings.CLICK_SERVICE_ID
+            or not hmac.compare_digest(expected, params.get("sign_string", ""))):
+        return None, None, _click_response(params, CLICK_SIGN_FAILED, "SIGN CHECK FAILED")
+
+    try:
+        amount = Decimal(params.get("amount", ""))
+    except InvalidOperation:
+        return None, None, _click_response(params, CLICK_BAD_REQUEST, "Error in request from click")
+
+    invoice_id = _parse_int(params.get("merchant_trans_id"))
+    return invoice_id, amount, None
+
+
+def handle_click_prepare(db: Session, params: Mapping[str, str]) -> Dict[str, Any]:
+    invoice_id, amount, error = _click_check(params)
+    if error:
+        return error
+    if params.get("action") != CLICK_PREPARE:
+        return _click_response(params, CLICK_ACTION_NOT_FOUND, "Action not found")
+
+    _, reason = _payable_invoice(db, invoice_id, amount)
+    if reason == "not_found":
+        return _click_response(params, CLICK_INVOICE_NOT_FOUND, "Invoice not found")
+    if reason == "paid":
+        return _click_response(params, CLICK_ALREADY_PAID, "Already paid")
+    if reason == "cancelled":
+        return _click_response(params, CLICK_CANCELLED, "Transaction cancelled")
+    if reason == "amount":
+        return _click_response(params, CLICK_WRONG_AMOUNT, "Incorrect parameter amount")
+
+    return _click_response(params, CLICK_OK, "Success", merchant_prepare_id=invoice_id)
+
+
+def handle_click_complete(db: Session, params: Mapping[str, str]) -> Dict[str, Any]:
+    invoice_id, amount, error = _click_check(params)
+    if error:
+        return error
+    if params.get("action") != CLICK_COMPLETE:
+        return _click_response(params, CLICK_ACTION_NOT_FOUND, "Action not found")
+    if _parse_int(params.get("merchant_prepare_id")) != invoice_id or invoice_id is None:
+        return _click_response(params, CLICK_INVOICE_NOT_FOUND, "Invoice not found")
+
+    # Click reports a failed or cancelled payment with a negative error; nothing to record
+    if (_parse_int(params.get("error")) or 0) < 0:
+        return _click_response(params, CLICK_CANCELLED, "Transaction cancelled")
+
+    event_id = record_payment_event(
+        db, PaymentProvider.CLICK, params["click_trans_id"], invoice_id, amount,
+        dict(params), PaymentEventStatus.PENDING, paid_at=_now()
+    )
+    db.commit()
+    return _click_response(params, CLICK_OK, "Success", merchant_confirm_id=event_id)
+
+
+# Payme Merchant API (JSON-RPC)
+
+def verify_payme_authorization(header: Optional[str]) -> bool:
+    """Basic auth with login 'Paycom' and the merchant key as password."""
+    if not settings.PAYME_SECRET_KEY or not header or not header.startswith("Basic "):
+        return False
+    expected = base64.b64encode(f"{PAYME_LOGIN}:{settings.PAYME_SECRET_KEY}".encode("utf-8")).decode("ascii")
+    return hmac.compare_digest(header[len("Basic "):].strip(), expected)
+
+
+def _payme_amount(params: Mapping[str, Any]) -> Decimal:
+    """Payme sends tiyin."""
+    try:
+        return (Decimal(str(params["amount"])) / 100).quantize(Decimal("0.01"))
+    except (KeyError, InvalidOperation):
+        raise PaymeError(PAYME_WRONG_AMOUNT, "Incorrect amount")
+
+
+def _payme_check(db: Session, params: Mapping[str, Any]) -> Tuple[int, Decimal]:
+    amount = _payme_amount(params)
+    invoice_id = _parse_int((params.get("account") or {}).get("invoice_id"))
+    _, reason = _payable_invoice(db, invoice_id, amount)
+    if reason == "amount":
+        raise PaymeError(PAYME_WRONG_AMOUNT, "Incorrect amount")
+    if reason is not None:
+        raise PaymeError(PAYME_INVOICE_NOT_FOUND, "Invoice not found or not payable", "invoice_id")
+    return invoice_id, amount
+
+
+def _payme_event(db: Session, params: Mapping[str, Any], lock: bool = False) -> PaymentEvent:
+    query = db.query(PaymentEvent).filter(
+        and_(
+            PaymentEvent.provider == PaymentProvider.PAYME.value,
+            PaymentEvent.provider_transaction_id == str(params.get("id"))
+        )
+    )
+    event = (query.with_for_update() if lock else query).first()
+    if event is None:
+        raise PaymeError(PAYME_TRANSACTION_NOT_FOUND, "Transaction not found")
+    return event
+
+
+def _payme_state(event: PaymentEvent) -> int:
+    if event.status == PaymentEventStatus.RESERVED.value:
+        return PAYME_CREATED
+    if event.status == PaymentEventStatus.CANCELLED.value:
+        return PAYME_CANCELLED
+    return PAYME_PERFORMED
+
+
+def _payme_transaction(event: PaymentEvent) -> Dict[str, Any]:
+    return {
+        "create_time": _to_millis(event.received_at),
+        "perform_time": _to_millis(event.paid_at),
+        "cancel_time": _to_millis(event.processed_at) if event.status == PaymentEventStatus.CANCELLED.value else 0,
+        "transaction": str(event.id),
+        "state": _payme_state(event),
+        "reason": None
+    }
+
+
+def _payme_check_perform(db: Session, params: Mapping[str, Any]) -> Dict[str, Any]:
+    _payme_check(db, params)
+    return {"allow": True}
+
+
+def _payme_create(db: Session, params: Mapping[str, Any]) -> Dict[str, Any]:
+    invoice_id, amount = _payme_check(db, params)
+    record_payment_event(
+        db, PaymentProvider.PAYME, str(params.get("id")), invoice_id, amount,
+        dict(params), PaymentEventStatus.RESERVED
+    )
+    db.commit()
+    event = _payme_event(db, params)
+    if event.status == PaymentEventStatus.CANCELLED.value:
+        raise PaymeError(PAYME_CANNOT_PERFORM, "Transaction cancelled")
+    result = _payme_transaction(event)
+    return {"create_time": result["create_time"], "transaction": result["transaction"], "state": result["state"]}
+
+
+def _payme_perform(db: Session, params: Mapping[str, Any]) -> Dict[str, Any]:
+    # Single conditional UPDATE: a retried perform finds the row already pending and changes nothing
+    db.execute(
+        update(PaymentEvent).where(
+            and_(
+                PaymentEvent.provider == PaymentProvider.PAYME.value,
+                PaymentEvent.provider_transaction_id == str(params.get("id")),
+                PaymentEvent.status == PaymentEventStatus.RESERVED.value
+            )
+        ).values(status=PaymentEventStatus.PENDING.value, paid_at=_now()),
+        execution_options={"synchronize_session": False}
+    )
+    db.commit()
+    event = _payme_event(db, params)
+    if event.status == PaymentEventStatus.CANCELLED.value:
+        raise PaymeError(PAYME_CANNOT_PERFORM, "Transaction cancelled")
+    result = _payme_transaction(event)
+    return {"transaction": result["transaction"], "perform_time": result["perform_time"], "state": result["state"]}
+
+
+def _payme_cancel(db: Session, params: Mapping[str, Any]) -> Dict[str, Any]:
+    event = _payme_event(db, params, lock=True)
+    if event.status == PaymentEventStatus.RESERVED.value:
+        event.status = PaymentEventStatus.CANCELLED.value
+        event.processed_at = _now()
+    elif event.status != PaymentEventStatus.CANCELLED.value:
+        # Refunds of applied payments are handled manually
+        db.rollback()
+        raise PaymeError(PAYME_CANNOT_CANCEL, "Payment already performed")
+    db.commit()
+    return {"transaction": str(event.id), "cancel_time": _to_millis(event.processed_at), "state": PAYME_CANCELLED}
+
+
+def _payme_statement(db: Session, params: Mapping[str, Any]) -> Dict[str, Any]:
+    try:
+        start = datetime.fromtimestamp(int(params["from"]) / 1000, tz=timezone.utc)
+        end = datetime.fromtimestamp(int(params["to"]) / 1000, tz=timezone.utc)
+    except (KeyError, TypeError, ValueError):
+        raise PaymeError(PAYME_INVALID_REQUEST, "Invalid period")
+
+    events = db.query(PaymentEvent).filter(
+        and_(
+            PaymentEvent.provider == PaymentProvider.PAYME.value,
+            PaymentEvent.received_at >= start,
+            PaymentEvent.received_at <= end
+        )
+    ).order_by(PaymentEvent.received_at).all()
+    return {
+        "transactions": [
+            {
+                "id": event.provider_transaction_id,
+                "time": (event.payload or {}).get("time"),
+                "amount": int(event.amount * 100),
+                "account": (event.payload or {}).get("account"),
+                **_payme_transaction(event)
+            }
+            for event in events
+        ]
+    }
+
+
+PAYME_METHODS = {
+    "CheckPerformTransaction": _payme_check_perform,
+    "CreateTransaction": _payme_create,
+    "PerformTransaction": _payme_perform,
+    "CancelTransaction": _payme_cancel,
+    "CheckTransaction": lambda db, params: _payme_transaction(_payme_event(db, params)),
+    "GetStatement": _payme_statement
+}
+
+
+def handle_payme(db: Session, body: Mapping[str, Any], authorization: Optional[str]) -> Dict[str, Any]:
+    """Dispatch one Payme JSON-RPC call; errors are returned in the body as the protocol requires."""
+    request_id = body.get("id") if isinstance(body, Mapping) else None
+    try:
+        if not verify_payme_authorization(authorization):
+            raise PaymeError(PAYME_UNAUTHORIZED, "Insufficient privileges")
+        if not isinstance(body, Mapping) or not isinstance(body.get("params"), Mapping):
+            raise PaymeError(PAYME_INVALID_REQUEST, "Invalid JSON-RPC request")
+        method = PAYME_METHODS.get(body.get("method"))
+        if method is None:
+            raise PaymeError(PAYME_METHOD_NOT_FOUND, "Method not found", body.get("method"))
+        return {"jsonrpc": "2.0", "id": request_id, "result": method(db, body["params"])}
+    except PaymeError as e:
+        return {"jsonrpc": "2.0", "id": request_id, "error": e.as_rpc()}
@@ -0,0 +1,249 @@
+"""
+Sales pipeline analytics for BiznesAssistant
+Stage transitions of deals and leads are appended to deal_stage_history; funnel conversion and
+time-in-stage are computed with window functions over that history
+"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import and_, case, extract, func, insert, select
+from sqlalchemy.orm import Session
+
+from app.models.deal import Deal, DealStageHistory, DealStatus, PipelineEntityType
+from app.models.lead import Lead, LeadStatus
+from app.services.crm_versions import get_crm_version
+from app.utils.cache import LRUCache
+
+# Ordered open stages, then the winning stage; the losing stage is terminal and outside the funnel
+PIPELINES = {
+    PipelineEntityType.DEAL: {
+        "model": Deal,
+        "value": Deal.deal_value,
+        "stages": [DealStatus.PROSPECTING, DealStatus.QUALIFICATION, DealStatus.PROPOSAL,
+                   DealStatus.NEGOTIATION, DealStatus.CLOSED_WON],
+        "lost": DealStatus.CLOSED_LOST,
+    },
+    PipelineEntityType.LEAD: {
+        "model": Lead,
+        "value": Lead.estimated_value,
+        "stages": [LeadStatus.NEW, LeadStatus.CONTACTED, LeadStatus.QUALIFIED, LeadStatus.CONVERTED],
+        "lost": LeadStatus.LOST,
+    },
+}
+
+_analytics_cache = LRUCache(max_entries=1024)
+
+
+def _status_value(status) -> Optional[str]:
+    return status.value if status is not None else None
+
+
+def record_stage_change(db: Session, entity_type: PipelineEntityType, entity, from_status=None,
+                        user_id: Optional[int] = None) -> None:
+    """Append a history row if the deal or lead entered a new stage; from_status is None on creation."""
+    if entity.status is None or entity.status == from_status:
+        return
+    db.add(DealStageHistory(
+        entity_type=entity_type.value,
+        entity_id=entity.id,
+        from_status=_status_value(from_status),
+        to_status=entity.status.value,
+        value=getattr(entity, PIPELINES[entity_type]["value"].key),
+        probability=entity.probability,
+        changed_by_id=user_id,
+        company_id=entity.company_id,
+        tenant_id=entity.tenant_id
+    ))
+
+
+def record_initial_stages(db: Session, entity_type: PipelineEntityType, rows: List[Dict[str, Any]],
+                          user_id: Optional[int] = None) -> None:
+    """Bulk variant of record_stage_change for freshly inserted rows (id, status, value, probability, company_id, tenant_id)."""
+    records = [
+        {
+            "entity_type": entity_type.value,
+            "entity_id": row["id"],
+            "from_status": None,
+            "to_status": row["status"].value,
+            "value": row["value"],
+            "probability": row["probability"],
+            "changed_by_id": user_id,
+            "company_id": row["company_id"],
+            "tenant_id": row["tenant_id"]
+        }
+        for row in rows if row["status"] is not None
+    ]
+    if records:
+        db.execute(insert(DealStageHistory), records)
+
+
+def _stints(tenant_id: int, company_id: int, entity_type: PipelineEntityType,
+            start_date: Optional[date], end_date: Optional[date]):
+    """One row per stage stay, with when it ended and when the entity entered the pipeline."""
+    history = select(
+        DealStageHistory.entity_id,
+        DealStageHistory.to_status.label("stage"),
+        DealStageHistory.changed_at,
+        func.lead(DealStageHistory.changed_at).over(
+            partition_by=DealStageHistory.entity_id,
+            order_by=(DealStageHistory.changed_at, DealStageHistory.id)
+        ).label("left_at"),
+        func.min(DealStageHistory.changed_at).over(partition_by=DealStageHistory.entity_id).label("entered_at")
+    ).where(
+        and_(
+            DealStageHistory.company_id == company_id,
+            DealStageHistory.tenant_id == tenant_id,
+            DealStageHistory.entity_type == entity_type.value
+        )
+    ).subquery()
+
+    # Cohort: entities that entered the pipeline within the period
+    conditions = []
+    if start_date:
+        conditions.append(history.c.entered_at >= start_date)
+    if end_date:
+        conditions.append(history.c.entered_at < end_date + timedelta(days=1))
+    return history, conditions
+
+
+def _funnel(db: Session, history, conditions, stages: List) -> List[Dict[str, Any]]:
+    rank = case({stage.value: position for position, stage in enumerate(stages, start=1)}, value=history.c.stage)
+    furthest = select(
+        history.c.entity_id,
+        func.max(rank).label("furthest")
+    ).where(and_(*conditions)).group_by(history.c.entity_id).subquery()
+    per_rank = select(
+        furthest.c.furthest,
+        func.count().label("entities")
+    ).where(furthest.c.furthest.isnot(None)).group_by(furthest.c.furthest).subquery()
+    # An entity that got to stage N also passed every earlier stage
+    reached = select(
+        per_rank.c.furthest,
+        func.sum(per_rank.c.entities).over(order_by=per_rank.c.furthest.desc()).label("reached")
+    )
+    reached_by_rank = {position: int(count) for position, count in db.execute(reached)}
+
+    funnel = []
+    for position, stage in enumerate(stages, start=1):
+        entered = max((count for rank_, count in reached_by_rank.items() if rank_ >= position), default=0)
+        funnel.append({"stage": stage.value, "entered": entered})
+    for current, following in zip(funnel, funnel[1:]):
+        current["converted"] = following["entered"]
+        current["conversion_rate"] = round(following["entered"] / current["entered"] * 100, 2) if current["entered"] else 0.0
+    return funnel
+
+
+def _time_in_stage(db: Session, history, conditions) -> List[Dict[str, Any]]:
+    seconds = extract("epoch", history.c.left_at - history.c.changed_at)
+    rows = db.execute(
+        select(
+            history.c.stage,
+            func.count().label("stays"),
+            func.avg(seconds).label("avg_seconds")
+        ).where(and_(history.c.left_at.isnot(None), *conditions)).group_by(history.c.stage)
+    )
+    return [
+        {"stage": stage, "completed_stays": stays, "avg_days": round(float(avg_seconds or 0) / 86400, 2)}
+        for stage, stays, avg_seconds in rows
+    ]
+
+
+def _weighted_pipeline(db: Session, tenant_id: int, company_id: int, pipeline: Dict[str, Any]) -> Dict[str, Any]:
+    model, value = pipeline["model"], pipeline["value"]
+    open_stages = pipeline["stages"][:-1]
+    rows = db.query(
+        model.status,
+        func.count(model.id),
+        func.sum(value),
+        func.sum(value * func.coalesce(model.probability, 0) / 100)
+    ).filter(
+        and_(
+            model.company_id == company_id,
+            model.tenant_id == tenant_id,
+            model.status.in_(open_stages)
+        )
+    ).group_by(model.status).all()
+
+    by_stage = {status: (count, total, weighted) for status, count, total, weighted in rows}
+    stages = []
+    for stage in open_stages:
+        count, total, weighted = by_stage.get(stage, (0, 0, 0))
+        stages.append({
+            "stage": stage.value,
+            "count": count,
+            "value": float(total or 0),
+            "weighted_value": round(float(weighted or 0), 2)
+        })
+    return {
+        "open": sum(stage["count"] for stage in stages),
+        "total_value": sum(stage["value"] for stage in stages),
+        "weighted_value": round(sum(stage["weighted_value"] for stage in stages), 2),
+        "by_stage": stages
+    }
+
+
+def compute_pipeline_analytics(db: Session, tenant_id: int, company_id: int,
+                               entity_type: PipelineEntityType = PipelineEntityType.DEAL,
+                               start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, Any]:
+    """Funnel conversion and time-in-stage for the cohort entering in the period, plus the weighted open pipeline."""
+    pipeline = PIPELINES[entity_type]
+    history, conditions = _stints(tenant_id, company_id, entity_type, start_date, end_date)
+    funnel = _funnel(db, history, conditions, pipeline["stages"])
+
+    lost = db.execute(
+        select(func.count(func.distinct(history.c.entity_id))).where(
+            and_(history.c.stage == pipeline["lost"].value, *conditions)
+        )
+    ).scalar() or 0
+    entered = funnel[0]["entered"]
+    won = funnel[-1]["entered"]
+
+    return {
+        "entity_type": entity_type.value,
+        "funnel": funnel,
+        "won": won,
+        "lost": lost,
+        "overall_conversion_rate": round(won / entered * 100, 2) if entered else 0.0,
+        "time_in_stage": _time_in_stage(db, history, conditions),
+        "pipeline": _weighted_pipeline(db, tenant_id, company_id, pipeline)
+    }
+
+
+def get_cached_pipeline_analytics(db: Session, tenant_id: int, company_id: int,
+                                  entity_type: PipelineEntityType = PipelineEntityType.DEAL,
+                                  start_date: Optional[date] = None, end_date: Optional[date] = None) -> Dict[str, Any]:
+    """Analytics reused until a CRM record of the company changes."""
+    key = (tenant_id, company_id, get_crm_version(db, company_id), entity_type, start_date, end_date)
+    analytics = _analytics_cache.get(key)
+    if analytics is None:
+        analytics = compute_pipeline_analytics(db, tenant_id, company_id, entity_type, start_date, end_date)
+        _analytics_cache.set(key, analytics)
+    return analytics
+
+
+def lead_conversion_summary(db: Session, company_id: int, tenant_id: Optional[int] = None) -> Dict[str, Any]:
+    """Lead totals and the probability-weighted value of open deals, for dashboard widgets."""
+    leads = db.query(
+        func.count(Lead.id),
+        func.count(Lead.id).filter(Lead.status == LeadStatus.CONVERTED)
+    ).filter(Lead.company_id == company_id)
+    deals = db.query(
+        func.sum(Deal.deal_value * func.coalesce(Deal.probability, 0) / 100)
+    ).filter(
+        and_(
+            Deal.company_id == company_id,
+            Deal.status.notin_([DealStatus.CLOSED_WON, DealStatus.CLOSED_LOST])
+        )
+    )
+    if tenant_id:
+        leads = leads.filter(Lead.tenant_id == tenant_id)
+        deals = deals.filter(Deal.tenant_id == tenant_id)
+
+    total, converted = leads.one()
+    return {
+        "totalLeads": total,
+        "convertedLeads": converted,
+        "conversionRate": round(converted / total * 100, 1) if total else 0.0,
+        "pipelineValue": float(deals.scalar() or 0)
+    }
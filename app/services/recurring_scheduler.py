@@ -0,0 +1,155 @@
+"""
+Recurring template scheduler for BiznesAssistant
+Claims due schedules with FOR UPDATE SKIP LOCKED so any number of workers can run side by side
+
+Run with: python -m app.services.recurring_scheduler
+"""
+
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import and_
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.template import Template, RecurringSchedule
+from app.services.template_service import TemplateDataError, materialize_template, next_occurrence
+
+logger = logging.getLogger(__name__)
+
+
+def _due(now: datetime):
+    """Active schedules of recurring templates whose next execution has come."""
+    return and_(
+        RecurringSchedule.is_active.is_(True),
+        RecurringSchedule.next_execution_date <= now,
+        Template.is_recurring.is_(True)
+    )
+
+
+class RecurringScheduler:
+    """Executes due RecurringSchedule rows in batches"""
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: Optional[int] = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.SCHEDULER_BATCH_SIZE
+
+    def run_batch(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Claim one batch of due schedules and execute it one company at a time.
+
+        Claimed rows are locked, so concurrent workers skip them. Companies run in
+        (tenant_id, company_id) order and commit one by one, so every worker takes the
+        per-company counter, version and rollup rows in the same order and holds them
+        only while that company runs. Each company's schedules are locked again before
+        they run, skipping rows another worker has claimed or advanced since.
+        Each schedule runs in its own savepoint. One whose data is invalid is rolled back and
+        deactivated; one that hits any other error is rolled back and left due for the next run.
+        """
+        now = now or datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            claimed = db.query(RecurringSchedule.id, Template.tenant_id, Template.company_id).join(Template).filter(
+                _due(now)
+            ).order_by(RecurringSchedule.next_execution_date).limit(self.batch_size).with_for_update(
+                skip_locked=True, of=RecurringSchedule
+            ).all()
+
+            if not claimed:
+                db.rollback()
+                return {"claimed": 0, "created": 0, "failed": 0, "retried": 0}
+
+            by_company: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+            for schedule_id, tenant_id, company_id in sorted(claimed, key=lambda row: (row[1], row[2], row[0])):
+                by_company[(tenant_id, company_id)].append(schedule_id)
+
+            created = failed = retried = 0
+            for schedule_ids in by_company.values():
+                schedules: List[RecurringSchedule] = db.query(RecurringSchedule).join(Template).filter(
+                    and_(RecurringSchedule.id.in_(schedule_ids), _due(now))
+                ).order_by(RecurringSchedule.id).with_for_update(skip_locked=True, of=RecurringSchedule).all()
+                templates = {
+                    template.id: template
+                    for template in db.query(Template).filter(
+                        Template.id.in_({schedule.template_id for schedule in schedules})
+                    ).all()
+                }
+
+                for schedule in schedules:
+                    template = templates[schedule.template_id]
+                    # One savepoint per schedule: a bad template must not take the company down with it
+                    savepoint = db.begin_nested()
+                    try:
+                        occurrences = self._due_occurrences(schedule, template, now)
+                        created_ids = materialize_template(db, template, occurrences)
+                        schedule.last_execution_date = occurrences[-1]
+                        schedule.next_execution_date = next_occurrence(
+                            occurrences[-1], template.recurring_interval, template.recurring_day
+                        )
+                        savepoint.commit()
+                    except (TemplateDataError, IntegrityError, DataError):
+                        # Bad data will not fix itself; drop this schedule's rows and stop retrying until the template is edited
+                        savepoint.rollback()
+                        logger.exception("recurring.template_invalid", extra={"schedule_id": schedule.id})
+                        schedule.is_active = False
+                        failed += 1
+                        continue
+                    except Exception:
+                        # Deadlock, lock timeout and the like: keep the schedule due so the next run retries it
+                        savepoint.rollback()
+                        logger.exception("recurring.schedule_retry", extra={"schedule_id": schedule.id})
+                        retried += 1
+                        continue
+                    created += len(created_ids)
+
+                db.commit()
+
+            logger.info(
+                "recurring.batch_done",
+                extra={"claimed": len(claimed), "created_rows": created, "failed": failed, "retried": retried}
+            )
+            return {"claimed": len(claimed), "created": created, "failed": failed, "retried": retried}
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _due_occurrences(self, schedule: RecurringSchedule, template: Template, now: datetime) -> List[datetime]:
+        """Every missed execution up to now, so downtime does not drop periods."""
+        occurrences = []
+        current = schedule.next_execution_date
+        while current <= now and len(occurrences) < settings.SCHEDULER_MAX_CATCH_UP:
+            occurrences.append(current)
+            current = next_occurrence(current, template.recurring_interval, template.recurring_day)
+        return occurrences
+
+    def run_until_idle(self, now: Optional[datetime] = None) -> int:
+        """Drain all due schedules; returns how many rows were created."""
+        total = 0
+        while True:
+            result = self.run_batch(now)
+            total += result["created"]
+            # Retried schedules are still due; leave them for the next poll instead of spinning on them
+            if result["claimed"] < self.batch_size or result["retried"]:
+                return total
+
+    def run_forever(self):
+        logger.info("recurring.scheduler_started", extra={"batch_size": self.batch_size})
+        while True:
+            try:
+                self.run_until_idle()
+            except Exception:
+                logger.exception("recurring.batch_failed")
+            time.sleep(settings.SCHEDULER_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    from app.logging_config import setup_logging
+
+    setup_logging()
+    RecurringScheduler(SessionLocal).run_forever()
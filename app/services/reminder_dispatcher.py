@@ -0,0 +1,221 @@
+"""
+Activity reminder dispatcher for BiznesAssistant
+Claims due reminders with FOR UPDATE SKIP LOCKED and marks the whole batch sent with a single UPDATE,
+then sends one digest per user over Telegram or email after the claim has committed
+
+Run with: python -m app.services.reminder_dispatcher
+"""
+
+import logging
+import smtplib
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from sqlalchemy import and_, update
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.activity import Activity, ActivityStatus
+from app.models.user import User
+from app.services.email_service import EmailService, email_service
+from app.services.telegram_service import TelegramService, telegram_service
+
+logger = logging.getLogger(__name__)
+
+# Reminders of finished activities are marked sent without being delivered
+SKIPPED_STATUSES = (ActivityStatus.COMPLETED, ActivityStatus.CANCELLED)
+
+
+def telegram_text(reminders: List[Dict[str, Any]]) -> str:
+    lines = [f"⏰ {len(reminders)} upcoming activit{'y' if len(reminders) == 1 else 'ies'}:"]
+    for reminder in reminders:
+        when = reminder["scheduled_date"].strftime(" - %d.%m.%Y %H:%M") if reminder["scheduled_date"] else ""
+        lines.append(f"• {reminder['title']} ({reminder['type']}){when}")
+    return "\n".join(lines)
+
+
+class _SMTPConnections:
+    """One SMTP connection per sender thread, opened on first use and reused for every digest"""
+
+    def __init__(self, email: EmailService, timeout: float):
+        self.email = email
+        self.timeout = timeout
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._opened: List[smtplib.SMTP] = []
+
+    def get(self) -> Optional[smtplib.SMTP]:
+        server = getattr(self._local, "server", None)
+        if server is None:
+            server = self.email.open_smtp(self.timeout)
+            self._local.server = server
+            if server is not None:
+                with self._lock:
+                    self._opened.append(server)
+        return server
+
+    def discard(self):
+        server, self._local.server = getattr(self._local, "server", None), None
+        if server is not None:
+            _close_quietly(server)
+
+    def close(self):
+        for server in self._opened:
+            _close_quietly(server)
+
+
+def _close_quietly(server: smtplib.SMTP):
+    try:
+        server.quit()
+    except (smtplib.SMTPException, OSError):
+        server.close()
+
+
+class ReminderDispatcher:
+    """Delivers Activity.reminder_date notifications in batches"""
+
+    def __init__(self, session_factory: Callable[[], Session], batch_size: Optional[int] = None,
+                 email: Optional[EmailService] = None, telegram: Optional[TelegramService] = None,
+                 concurrency: Optional[int] = None):
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+        self.email = email or email_service
+        self.telegram = telegram or telegram_service
+        self.concurrency = concurrency or settings.REMINDER_SEND_CONCURRENCY
+
+    def run_batch(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Claim one batch of due reminders and mark it sent in one short transaction, then deliver it.
+
+        Claimed rows are locked only for the claim, so concurrent dispatchers skip them
+        and no lock or pooled connection is held across network I/O.
+        Each reminder is attempted once: a failed delivery is logged, not retried,
+        so an unreachable mail server cannot stall the queue.
+        """
+        now = now or datetime.now(timezone.utc)
+        db = self.session_factory()
+        try:
+            claimed = db.query(
+                Activity.id,
+                Activity.title,
+                Activity.type,
+                Activity.status,
+                Activity.scheduled_date,
+                Activity.user_id
+            ).filter(
+                and_(
+                    Activity.reminder_sent.is_(False),
+                    Activity.reminder_date <= now
+                )
+            ).order_by(Activity.reminder_date, Activity.id).limit(self.batch_size).with_for_update(skip_locked=True).all()
+
+            if not claimed:
+                db.rollback()
+                return {"claimed": 0, "sent": 0, "failed": 0, "skipped": 0}
+
+            by_user: Dict[int, List[Dict[str, Any]]] = defaultdict(list)
+            skipped = 0
+            for row in claimed:
+                if row.status in SKIPPED_STATUSES:
+                    skipped += 1
+                    continue
+                by_user[row.user_id].append({
+                    "id": row.id,
+                    "title": row.title,
+                    "type": row.type.value,
+                    "scheduled_date": row.scheduled_date
+                })
+
+            users = {
+                user.id: user
+                for user in db.query(User.id, User.full_name, User.email, User.telegram_chat_id).filter(
+                    User.id.in_(by_user.keys())
+                ).all()
+            } if by_user else {}
+
+            db.execute(
+                update(Activity).where(Activity.id.in_([row.id for row in claimed])).values(reminder_sent=True),
+                execution_options={"synchronize_session": False}
+            )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+        sent = failed = 0
+        for user_id, delivered in self._deliver(by_user, users):
+            if delivered:
+                sent += len(by_user[user_id])
+            else:
+                failed += len(by_user[user_id])
+                logger.warning("reminders.send_failed", extra={"user_id": user_id, "reminders": len(by_user[user_id])})
+
+        logger.info("reminders.batch_done", extra={"claimed": len(claimed), "sent": sent, "failed": failed, "skipped": skipped})
+        return {"claimed": len(claimed), "sent": sent, "failed": failed, "skipped": skipped}
+
+    def _deliver(self, by_user: Dict[int, List[Dict[str, Any]]], users: Dict[int, Any]):
+        """Yield (user_id, delivered) with up to `concurrency` digests in flight."""
+        if not by_user:
+            return
+        smtp = _SMTPConnections(self.email, settings.REMINDER_SEND_TIMEOUT)
+        try:
+            with httpx.Client(timeout=settings.REMINDER_SEND_TIMEOUT) as client, \
+                    ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+                futures = {
+                    user_id: pool.submit(self._send_digest, users.get(user_id), reminders, client, smtp)
+                    for user_id, reminders in by_user.items()
+                }
+                for user_id, future in futures.items():
+                    yield user_id, future.result()
+        finally:
+            smtp.close()
+
+    def _send_digest(self, user, reminders: List[Dict[str, Any]], client: httpx.Client,
+                     smtp: "_SMTPConnections") -> bool:
+        if user is None:
+            return False
+        if user.telegram_chat_id and self.telegram.enabled:
+            if self.telegram.send_message(user.telegram_chat_id, telegram_text(reminders), client):
+                return True
+        try:
+            server = smtp.get()
+        except (smtplib.SMTPException, OSError) as e:
+            logger.warning("reminders.smtp_connect_failed", extra={"user_id": user.id, "error": str(e)})
+            return False
+        if self.email.send_activity_reminders(user.email, user.full_name, reminders, server):
+            return True
+        # The connection may be what failed; the next digest on this thread reconnects
+        smtp.discard()
+        return False
+
+    def run_until_idle(self, now: Optional[datetime] = None) -> int:
+        """Drain all due reminders; returns how many were delivered."""
+        total = 0
+        while True:
+            result = self.run_batch(now)
+            total += result["sent"]
+            if result["claimed"] < self.batch_size:
+                return total
+
+    def run_forever(self):
+        logger.info("reminders.dispatcher_started", extra={"batch_size": self.batch_size})
+        while True:
+            try:
+                self.run_until_idle()
+            except Exception:
+                logger.exception("reminders.batch_failed")
+            time.sleep(settings.REMINDER_POLL_SECONDS)
+
+
+if __name__ == "__main__":
+    from app.database import SessionLocal
+    from app.logging_config import setup_logging
+
+    setup_logging()
+    ReminderDispatcher(SessionLocal).run_forever()
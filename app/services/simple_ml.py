@@ -141,7 +141,7 @@ class SimpleMLService:
         Calculate customer payment reliability score
         Based on payment history and patterns
         """
-        # Get customer's invoice history (match by customer_name since no customer_id field)
+        # Get customer's invoice history through the indexed contact link
         customer = self.db.query(Contact).filter(
             and_(
                 Contact.id == customer_id,
@@ -161,7 +161,7 @@ class SimpleMLService:
         
         invoices = self.db.query(Invoice).filter(
             and_(
-                Invoice.customer_name == customer.name,
+                Invoice.contact_id == customer.id,
                 Invoice.tenant_id == self.tenant_id
             )
         ).all()
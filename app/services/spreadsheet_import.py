@@ -0,0 +1,116 @@
+"""
+Spreadsheet import base for BiznesAssistant
+Streams CSV/XLSX uploads as pandas chunks with bounded memory and keeps a bounded error report
+"""
+
+from typing import Any, BinaryIO, Dict, Iterator, List
+
+import pandas as pd
+from openpyxl import load_workbook
+
+CHUNK_SIZE = 5000
+MAX_REPORTED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    """Raised when an uploaded file cannot be read as the expected sheet."""
+
+
+class SpreadsheetImportService:
+    """Chunked CSV/XLSX reading shared by the bulk importers; subclasses declare their columns"""
+
+    REQUIRED_COLUMNS: List[str] = []
+    OPTIONAL_COLUMNS: List[str] = []
+
+    def _new_report(self, dry_run: bool) -> Dict[str, Any]:
+        return {
+            "total_rows": 0,
+            "imported": 0,
+            "failed": 0,
+            "errors": [],
+            "errors_truncated": False,
+            "dry_run": dry_run
+        }
+
+    def _collect_errors(self, report: Dict[str, Any], errors: List[Dict[str, Any]]):
+        """Keep the error report bounded no matter how bad the file is."""
+        room = MAX_REPORTED_ERRORS - len(report["errors"])
+        if len(errors) > room:
+            report["errors_truncated"] = True
+        report["errors"].extend(sorted(errors, key=lambda e: e["row"])[:max(room, 0)])
+
+    def _iter_chunks(self, file: BinaryIO, filename: str) -> Iterator[tuple]:
+        """Yield (DataFrame, first spreadsheet row number) pairs."""
+        name = (filename or "").lower()
+        if name.endswith(".csv"):
+            yield from self._iter_csv_chunks(file)
+        elif name.endswith(".xlsx"):
+            yield from self._iter_xlsx_chunks(file)
+        else:
+            raise ImportFormatError("Only .csv and .xlsx files are supported")
+
+    def _iter_csv_chunks(self, file: BinaryIO) -> Iterator[tuple]:
+        first_row = 2  # row 1 is the header
+        try:
+            reader = pd.read_csv(file, dtype=str, keep_default_na=False, chunksize=CHUNK_SIZE, encoding="utf-8-sig")
+            for chunk in reader:
+                yield self._normalize_columns(chunk), first_row
+                first_row += len(chunk)
+        except (pd.errors.EmptyDataError, pd.errors.ParserError, UnicodeDecodeError) as e:
+            raise ImportFormatError(f"Unable to read CSV file: {str(e)}")
+
+    def _iter_xlsx_chunks(self, file: BinaryIO) -> Iterator[tuple]:
+        try:
+            workbook = load_workbook(file, read_only=True, data_only=True)
+        except Exception as e:
+            raise ImportFormatError(f"Unable to read XLSX file: {str(e)}")
+
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            if header is None:
+                raise ImportFormatError("The spreadsheet is empty")
+            columns = ["" if value is None else str(value) for value in header]
+
+            first_row = 2
+            buffer = []
+            for values in rows:
+                buffer.append(values[:len(columns)])
+                if len(buffer) == CHUNK_SIZE:
+                    yield self._normalize_columns(pd.DataFrame(buffer, columns=columns, dtype=object)), first_row
+                    first_row += len(buffer)
+                    buffer = []
+            if buffer:
+                yield self._normalize_columns(pd.DataFrame(buffer, columns=columns, dtype=object)), first_row
+        finally:
+            workbook.close()
+
+    def _normalize_columns(self, chunk: pd.DataFrame) -> pd.DataFrame:
+        chunk.columns = [str(column).strip().lower().replace(" ", "_") for column in chunk.columns]
+        missing = [column for column in self.REQUIRED_COLUMNS if column not in chunk.columns]
+        if missing:
+            raise ImportFormatError(f"Missing required columns: {', '.join(missing)}")
+        for column in self.OPTIONAL_COLUMNS:
+            if column not in chunk.columns:
+                chunk[column] = None
+        return chunk.reset_index(drop=True)
+
+    def _text_columns(self, chunk: pd.DataFrame) -> Dict[str, pd.Series]:
+        return {
+            column: chunk[column].fillna("").astype(str).str.strip()
+            for column in self.REQUIRED_COLUMNS + self.OPTIONAL_COLUMNS
+        }
+
+    def _row_errors(self, checks: List[tuple], index: pd.Index, first_row: int) -> tuple:
+        """Combine (mask, message) checks into an invalid mask and per-row error entries."""
+        invalid = pd.Series(False, index=index)
+        for mask, _ in checks:
+            invalid |= mask
+
+        errors = []
+        for position in invalid[invalid].index:
+            errors.append({
+                "row": first_row + int(position),
+                "errors": [message for mask, message in checks if mask.iat[position]]
+            })
+        return invalid, errors
@@ -0,0 +1,54 @@
+"""
+Uzbekistan tax calculations for BiznesAssistant
+Single source of the VAT and income tax formulas used by accounting
+"""
+
+from typing import List, Tuple
+
+import pandas as pd
+
+from app.config import settings
+from app.models.transaction import TransactionType
+
+
+def calculate_transaction_taxes(amount, vat_included: bool, transaction_type) -> Tuple[float, float]:
+    """Return (vat_amount, tax_amount) for a single transaction."""
+    amount = float(amount)
+
+    # VAT is taken out of the gross amount when included
+    vat_amount = amount * settings.VAT_RATE if vat_included else 0.0
+    net_amount = amount - vat_amount
+
+    # Simplified SME income tax, only charged on income
+    if transaction_type == TransactionType.INCOME or transaction_type == TransactionType.INCOME.value:
+        tax_amount = net_amount * settings.INCOME_TAX_RATE
+    else:
+        tax_amount = 0.0
+
+    return round(vat_amount, 2), round(tax_amount, 2)
+
+
+def calculate_transaction_taxes_frame(amount: pd.Series, vat_included: pd.Series, is_income: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Vectorized variant of calculate_transaction_taxes for a whole chunk of rows."""
+    amount = amount.astype(float)
+    vat_amount = amount.where(vat_included.astype(bool), 0.0) * settings.VAT_RATE
+    net_amount = amount - vat_amount
+    tax_amount = net_amount.where(is_income.astype(bool), 0.0) * settings.INCOME_TAX_RATE
+    return vat_amount.round(2), tax_amount.round(2)
+
+
+def calculate_transaction_taxes_many(rows: List[Tuple]) -> List[Tuple[float, float]]:
+    """Run the vectorized formula once over a list of (amount, vat_included, type) tuples."""
+    if not rows:
+        return []
+
+    amounts, vat_flags, types = zip(*rows)
+    is_income = pd.Series([
+        t == TransactionType.INCOME or t == TransactionType.INCOME.value for t in types
+    ])
+    vat_amount, tax_amount = calculate_transaction_taxes_frame(
+        pd.Series(amounts, dtype=object).astype(float),
+        pd.Series(vat_flags, dtype=bool),
+        is_income
+    )
+    return list(zip(vat_amount.tolist(), tax_amount.tolist()))
@@ -0,0 +1,42 @@
+"""
+Telegram bot messaging for BiznesAssistant
+Sends plain-text notifications through the Bot API sendMessage method
+"""
+
+import logging
+from typing import Optional
+
+import httpx
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TelegramService:
+    """Thin Bot API client; callers may pass a shared httpx.Client to reuse connections"""
+
+    def __init__(self, token: Optional[str] = None):
+        self.token = token or settings.TELEGRAM_BOT_TOKEN
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.token)
+
+    def send_message(self, chat_id: str, text: str, client: Optional[httpx.Client] = None) -> bool:
+        if not self.enabled:
+            return False
+        url = f"{settings.TELEGRAM_API_URL}/bot{self.token}/sendMessage"
+        try:
+            if client is None:
+                response = httpx.post(url, json={"chat_id": chat_id, "text": text}, timeout=settings.REMINDER_SEND_TIMEOUT)
+            else:
+                response = client.post(url, json={"chat_id": chat_id, "text": text})
+            response.raise_for_status()
+            return True
+        except httpx.HTTPError as e:
+            logger.warning("telegram.send_failed", extra={"chat_id": chat_id, "error": str(e)})
+            return False
+
+
+telegram_service = TelegramService()
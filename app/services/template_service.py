@@ -0,0 +1,155 @@
+"""
+Template materialization for BiznesAssistant
+Turns transaction/invoice templates into real rows with bulk inserts
+"""
+
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence
+
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.invoice import Invoice, InvoiceItem
+from app.models.template import Template, TemplateType, RecurringInterval
+from app.models.transaction import Transaction, TransactionType, TransactionCategory
+from app.schemas.invoice import InvoiceCreate
+from app.services.accounting_rollup import mark_rollups_stale
+from app.services.invoice_numbering import allocate_invoice_number
+from app.services.invoice_pricing import price_invoice
+from app.services.invoice_versions import bump_invoice_version
+from app.services.tax_service import calculate_transaction_taxes_many
+
+DEFAULT_DUE_DAYS = 30
+
+# InvoiceCreate fields the backend computes itself
+_INVOICE_COMPUTED_FIELDS = {"items", "subtotal", "vat_amount", "total_amount", "remaining_amount", "paid_amount", "status"}
+
+
+class TemplateDataError(ValueError):
+    """Template data cannot be turned into a transaction or invoice."""
+
+
+def next_occurrence(current: datetime, interval: str, recurring_day: Optional[int] = None) -> datetime:
+    """Following execution time; monthly/yearly schedules stay pinned to recurring_day."""
+    interval = RecurringInterval(interval)
+    if interval == RecurringInterval.DAILY:
+        return current + timedelta(days=1)
+    if interval == RecurringInterval.WEEKLY:
+        return current + timedelta(weeks=1)
+    # relativedelta clamps day=31 to the last day of shorter months
+    day = recurring_day or current.day
+    if interval == RecurringInterval.MONTHLY:
+        return current + relativedelta(months=1, day=day)
+    return current + relativedelta(years=1, day=day)
+
+
+def first_occurrence(interval: str, recurring_day: Optional[int] = None, today: Optional[date] = None) -> datetime:
+    """First execution time on or after today (midnight UTC)."""
+    today = today or datetime.now(timezone.utc).date()
+    start = datetime.combine(today, time.min, tzinfo=timezone.utc)
+    interval = RecurringInterval(interval)
+
+    if interval == RecurringInterval.WEEKLY and recurring_day is not None:
+        return start + timedelta(days=(recurring_day - today.weekday()) % 7)
+    if interval in (RecurringInterval.MONTHLY, RecurringInterval.YEARLY) and recurring_day:
+        candidate = start + relativedelta(day=recurring_day)
+        if candidate < start:
+            candidate = next_occurrence(candidate, interval.value, recurring_day)
+        return candidate
+    return start
+
+
+def _transaction_rows(template: Template, data: Dict[str, Any], occurrences: Sequence[datetime]) -> List[Dict]:
+    try:
+        amount = Decimal(str(data["amount"]))
+        transaction_type = TransactionType(data["type"])
+        category = TransactionCategory(data["category"])
+    except (KeyError, ValueError, ArithmeticError) as e:
+        raise TemplateDataError(f"Template {template.id}: invalid transaction data ({e})") from e
+
+    vat_included = bool(data.get("vat_included", True))
+    vat_amount, tax_amount = calculate_transaction_taxes_many([(amount, vat_included, transaction_type)])[0]
+
+    return [
+        {
+            "amount": amount,
+            "type": transaction_type,
+            "category": category,
+            "description": data.get("description") or f"From template: {template.name}",
+            "date": occurrence,
+            "vat_included": vat_included,
+            "vat_amount": vat_amount,
+            "tax_amount": tax_amount,
+            "reference_number": data.get("reference_number"),
+            "contact_id": data.get("contact_id"),
+            "user_id": template.created_by,
+            "company_id": template.company_id,
+            "tenant_id": template.tenant_id
+        }
+        for occurrence in occurrences
+    ]
+
+
+def _invoice_payloads(template: Template, data: Dict[str, Any], occurrences: Sequence[datetime]) -> List[InvoiceCreate]:
+    due_days = int(data.get("due_days", DEFAULT_DUE_DAYS))
+    fields = {key: value for key, value in data.items() if key not in ("due_days", "issue_date", "due_date")}
+    try:
+        return [
+            InvoiceCreate(**fields, issue_date=occurrence, due_date=occurrence + timedelta(days=due_days))
+            for occurrence in occurrences
+        ]
+    except ValueError as e:
+        raise TemplateDataError(f"Template {template.id}: invalid invoice data ({e})") from e
+
+
+def materialize_template(db: Session, template: Template, occurrences: Sequence[datetime],
+                         data: Optional[Dict[str, Any]] = None) -> List[int]:
+    """Create one transaction or invoice per occurrence inside the caller's transaction.
+
+    Returns the ids of the created rows. Raises TemplateDataError before
+    writing anything if the template data is unusable.
+    """
+    if not occurrences:
+        return []
+    data = data if data is not None else (template.data or {})
+
+    if template.type == TemplateType.TRANSACTION.value:
+        rows = _transaction_rows(template, data, occurrences)
+        ids = list(db.scalars(insert(Transaction).returning(Transaction.id, sort_by_parameter_order=True), rows))
+        mark_rollups_stale(db, template.company_id, occurrences)
+        return ids
+
+    if template.type == TemplateType.INVOICE.value:
+        payloads = _invoice_payloads(template, data, occurrences)
+        pricings = [price_invoice(payload.items) for payload in payloads]
+
+        invoice_rows = []
+        for payload, pricing in zip(payloads, pricings):
+            invoice_rows.append({
+                **payload.dict(exclude=_INVOICE_COMPUTED_FIELDS),
+                "invoice_number": allocate_invoice_number(
+                    db, template.tenant_id, template.company_id, payload.issue_date.year
+                ),
+                "subtotal": pricing["subtotal"],
+                "vat_amount": pricing["vat_amount"],
+                "total_amount": pricing["total_amount"],
+                "remaining_amount": pricing["total_amount"],
+                "created_by_id": template.created_by,
+                "company_id": template.company_id,
+                "tenant_id": template.tenant_id
+            })
+        ids = list(db.scalars(insert(Invoice).returning(Invoice.id, sort_by_parameter_order=True), invoice_rows))
+
+        item_rows = [
+            {**line, "invoice_id": invoice_id}
+            for invoice_id, pricing in zip(ids, pricings)
+            for line in pricing["lines"]
+        ]
+        if item_rows:
+            db.execute(insert(InvoiceItem), item_rows)
+        bump_invoice_version(db, template.tenant_id, template.company_id)
+        return ids
+
+    raise TemplateDataError(f"Template {template.id}: unknown template type '{template.type}'")
@@ -0,0 +1,134 @@
+"""
+Bulk transaction import for BiznesAssistant
+Streams CSV/XLSX uploads in chunks, validates them vectorized and inserts in batches
+"""
+
+from typing import Any, BinaryIO, Dict, Optional
+
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.models.transaction import Transaction, TransactionType, TransactionCategory
+from app.services.accounting_rollup import mark_rollups_stale
+from app.services.spreadsheet_import import ImportFormatError, SpreadsheetImportService
+from app.services.tax_service import calculate_transaction_taxes_frame
+
+REQUIRED_COLUMNS = ["amount", "type", "category", "date"]
+OPTIONAL_COLUMNS = ["description", "vat_included", "reference_number"]
+
+TYPE_BY_VALUE = {member.value: member for member in TransactionType}
+CATEGORY_BY_VALUE = {member.value: member for member in TransactionCategory}
+TRUE_VALUES = {"true", "1", "yes", "y", "ha"}
+FALSE_VALUES = {"false", "0", "no", "n", "yoq", "yo'q"}
+
+
+class TransactionImportService(SpreadsheetImportService):
+    """Imports transactions from spreadsheets with bounded memory"""
+
+    REQUIRED_COLUMNS = REQUIRED_COLUMNS
+    OPTIONAL_COLUMNS = OPTIONAL_COLUMNS
+
+    def __init__(self, db: Session, tenant_id: int, company_id: int, user_id: int):
+        self.db = db
+        self.tenant_id = tenant_id
+        self.company_id = company_id
+        self.user_id = user_id
+
+    def import_file(self, file: BinaryIO, filename: str, remaining_quota: Optional[int] = None,
+                    dry_run: bool = False) -> Dict[str, Any]:
+        """Import every chunk of the file and return a row-level report."""
+        report = self._new_report(dry_run)
+
+        earliest_day = None
+        for chunk, first_row in self._iter_chunks(file, filename):
+            report["total_rows"] += len(chunk)
+            records, errors = self._validate_chunk(chunk, first_row)
+
+            # Rows past the plan limit are reported, not silently dropped
+            if remaining_quota is not None:
+                allowed = max(remaining_quota - report["imported"], 0)
+                for rejected in records[allowed:]:
+                    errors.append({"row": int(rejected.pop("_row")), "errors": ["Monthly transaction limit reached"]})
+                records = records[:allowed]
+
+            for record in records:
+                record.pop("_row")
+
+            if records and not dry_run:
+                self.db.execute(insert(Transaction), records)
+                chunk_earliest = min(record["date"] for record in records).date()
+                if earliest_day is None or chunk_earliest < earliest_day:
+                    earliest_day = chunk_earliest
+
+            report["imported"] += len(records)
+            report["failed"] += len(errors)
+            self._collect_errors(report, errors)
+
+        if dry_run:
+            self.db.rollback()
+        else:
+            mark_rollups_stale(self.db, self.company_id, [earliest_day])
+            self.db.commit()
+
+        return report
+
+    def _validate_chunk(self, chunk: pd.DataFrame, first_row: int) -> tuple:
+        """Validate a chunk column-wise; return (insertable records, row errors)."""
+        text = self._text_columns(chunk)
+
+        amount = pd.to_numeric(
+            text["amount"].str.replace(" ", "", regex=False).str.replace(",", ".", regex=False),
+            errors="coerce"
+        )
+        type_value = text["type"].str.lower()
+        category_value = text["category"].str.lower()
+        date = self._parse_dates(chunk["date"])
+        vat_text = text["vat_included"].str.lower()
+        vat_included = ~vat_text.isin(FALSE_VALUES)
+
+        checks = [
+            (amount.isna() | (amount <= 0), "amount must be a positive number"),
+            (~type_value.isin(TYPE_BY_VALUE.keys()), f"type must be one of: {', '.join(TYPE_BY_VALUE)}"),
+            (~category_value.isin(CATEGORY_BY_VALUE.keys()), "unknown category"),
+            (date.isna(), "date is missing or invalid"),
+            (~(vat_text.eq("") | vat_text.isin(TRUE_VALUES) | vat_text.isin(FALSE_VALUES)), "vat_included must be true or false"),
+        ]
+
+        invalid, errors = self._row_errors(checks, chunk.index, first_row)
+
+        valid = ~invalid
+        if not valid.any():
+            return [], errors
+
+        is_income = type_value.eq(TransactionType.INCOME.value)
+        vat_amount, tax_amount = calculate_transaction_taxes_frame(amount, vat_included, is_income)
+
+        frame = pd.DataFrame({
+            "_row": chunk.index + first_row,
+            "amount": amount.round(2),
+            "type": type_value.map(TYPE_BY_VALUE),
+            "category": category_value.map(CATEGORY_BY_VALUE),
+            "description": text["description"].replace("", None),
+            "date": pd.Series(date.dt.to_pydatetime(), index=chunk.index, dtype=object),
+            "vat_included": vat_included,
+            "vat_amount": vat_amount,
+            "tax_amount": tax_amount,
+            "reference_number": text["reference_number"].replace("", None),
+        }, index=chunk.index)[valid]
+        frame["user_id"] = self.user_id
+        frame["company_id"] = self.company_id
+        frame["tenant_id"] = self.tenant_id
+
+        records = frame.astype(object).where(frame.notna(), None).to_dict("records")
+        return records, errors
+
+    def _parse_dates(self, column: pd.Series) -> pd.Series:
+        """Parse ISO dates first, then the dd.mm.yyyy format common in local spreadsheets."""
+        parsed = pd.to_datetime(column, errors="coerce", format="ISO8601", utc=True)
+        missing = parsed.isna() & column.notna()
+        if missing.any():
+            parsed[missing] = pd.to_datetime(
+                column[missing].astype(str).str.strip(), errors="coerce", format="%d.%m.%Y", utc=True
+            )
+        return parsed
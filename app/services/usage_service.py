@@ -114,6 +114,15 @@ class UsageService:
         
         return status
     
+    def get_remaining_quota(self, company_id: int, subscription_tier: str, resource: str) -> Optional[int]:
+        """Get how many more items of a resource can be created this month (None if unlimited)."""
+        limit = self.get_plan_limits(subscription_tier)[resource]
+        if limit == -1:
+            return None
+
+        current = self.get_current_usage(company_id)[resource]
+        return max(limit - current, 0)
+
     def get_usage_percentage(self, current: int, limit: int) -> float:
         """Get usage as percentage of limit."""
         if limit == -1:  # Unlimited
@@ -11,9 +11,17 @@ CREATE EXTENSION IF NOT EXISTS "btree_gin";
 -- ================================================================
 -- CORE SCHEMA FIXES (Clean Slate)
 -- ================================================================
+DROP TABLE IF EXISTS transaction_daily_rollups CASCADE;
+DROP TABLE IF EXISTS accounting_rollup_states CASCADE;
+DROP TABLE IF EXISTS ledger_checkpoints CASCADE;
 DROP TABLE IF EXISTS task_comments CASCADE;
 DROP TABLE IF EXISTS recurring_schedules CASCADE;
+DROP TABLE IF EXISTS payment_events CASCADE;
+DROP TABLE IF EXISTS invoice_payments CASCADE;
 DROP TABLE IF EXISTS invoice_items CASCADE;
+DROP TABLE IF EXISTS invoice_number_counters CASCADE;
+DROP TABLE IF EXISTS invoice_versions CASCADE;
+DROP TABLE IF EXISTS crm_versions CASCADE;
 DROP TABLE IF EXISTS kpi_alerts CASCADE;
 DROP TABLE IF EXISTS kpi_trends CASCADE;
 DROP TABLE IF EXISTS kpis CASCADE;
@@ -21,9 +29,11 @@ DROP TABLE IF EXISTS tasks CASCADE;
 DROP TABLE IF EXISTS templates CASCADE;
 DROP TABLE IF EXISTS transactions CASCADE;
 DROP TABLE IF EXISTS invoices CASCADE;
+DROP TABLE IF EXISTS deal_stage_history CASCADE;
 DROP TABLE IF EXISTS activities CASCADE;
 DROP TABLE IF EXISTS deals CASCADE;
 DROP TABLE IF EXISTS leads CASCADE;
+DROP TABLE IF EXISTS search_index CASCADE;
 DROP TABLE IF EXISTS contacts CASCADE;
 DROP TABLE IF EXISTS app_users CASCADE;
 DROP TABLE IF EXISTS companies CASCADE;
@@ -86,6 +96,7 @@ CREATE TABLE app_users (
     is_active BOOLEAN DEFAULT TRUE,
     is_verified BOOLEAN DEFAULT FALSE,
     language VARCHAR DEFAULT 'uz',
+    telegram_chat_id VARCHAR,
     email_verification_token VARCHAR,
     email_verification_expires TIMESTAMPTZ,
     password_reset_token VARCHAR,
@@ -124,6 +135,10 @@ CREATE TABLE contacts (
     facebook VARCHAR,
     linkedin VARCHAR,
     
+    -- Search fields, maintained by the contacts_search_fields trigger
+    search_text TEXT,
+    phone_digits VARCHAR,
+    
     -- Foreign keys
     assigned_user_id INTEGER REFERENCES app_users(id),
     company_id INTEGER REFERENCES companies(id),
@@ -215,6 +230,24 @@ CREATE TABLE deals (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Deal stage history: append-only pipeline stage transitions of deals and leads
+CREATE TABLE deal_stage_history (
+    id SERIAL PRIMARY KEY,
+    entity_type VARCHAR(20) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    from_status VARCHAR(30),
+    to_status VARCHAR(30) NOT NULL,
+    value NUMERIC(15,2),
+    probability NUMERIC(5,2),
+    
+    -- Foreign keys
+    changed_by_id INTEGER REFERENCES app_users(id),
+    company_id INTEGER REFERENCES companies(id) NOT NULL,
+    tenant_id INTEGER REFERENCES tenants(id) NOT NULL,
+    
+    changed_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
 -- Activities
 CREATE TABLE activities (
     id SERIAL PRIMARY KEY,
@@ -245,6 +278,7 @@ CREATE TABLE activities (
     -- Foreign keys
     user_id INTEGER REFERENCES app_users(id),
     company_id INTEGER REFERENCES companies(id),
+    tenant_id INTEGER REFERENCES tenants(id) NOT NULL,
     
     -- Related entities (can be null)
     contact_id INTEGER REFERENCES contacts(id),
@@ -332,6 +366,70 @@ CREATE TABLE invoice_items (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Invoice payments: one row per payment received, append-only
+CREATE TABLE invoice_payments (
+    id SERIAL PRIMARY KEY,
+    amount NUMERIC(15,2) NOT NULL,
+    paid_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    method VARCHAR,
+    reference VARCHAR,
+    source VARCHAR(20) NOT NULL DEFAULT 'manual',
+    
+    -- Foreign keys
+    invoice_id INTEGER REFERENCES invoices(id) ON DELETE CASCADE NOT NULL,
+    created_by_id INTEGER REFERENCES app_users(id),
+    company_id INTEGER REFERENCES companies(id) NOT NULL,
+    tenant_id INTEGER REFERENCES tenants(id) NOT NULL,
+    
+    created_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Payment events: Click/Payme webhook inbox, one row per provider transaction
+CREATE TABLE payment_events (
+    id SERIAL PRIMARY KEY,
+    provider VARCHAR(20) NOT NULL,
+    provider_transaction_id VARCHAR(64) NOT NULL,
+    invoice_id INTEGER,
+    amount NUMERIC(15,2) NOT NULL,
+    paid_at TIMESTAMPTZ,
+    payload JSONB NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    error TEXT,
+    
+    received_at TIMESTAMPTZ DEFAULT NOW(),
+    processed_at TIMESTAMPTZ,
+    CONSTRAINT uq_payment_events_provider_transaction UNIQUE (provider, provider_transaction_id)
+);
+
+-- Invoice number counters: last issued number per tenant, company and year
+CREATE TABLE invoice_number_counters (
+    tenant_id INTEGER REFERENCES tenants(id) NOT NULL,
+    company_id INTEGER REFERENCES companies(id) NOT NULL,
+    year INTEGER NOT NULL,
+    last_number INTEGER NOT NULL DEFAULT 0,
+    
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (tenant_id, company_id, year)
+);
+
+-- Invoice versions: bumped on every invoice write, keys cached invoice aggregates
+CREATE TABLE invoice_versions (
+    company_id INTEGER PRIMARY KEY REFERENCES companies(id),
+    tenant_id INTEGER REFERENCES tenants(id) NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- CRM versions: bumped on every contact, lead, deal and activity write, keys cached CRM aggregates
+CREATE TABLE crm_versions (
+    company_id INTEGER PRIMARY KEY REFERENCES companies(id),
+    tenant_id INTEGER REFERENCES tenants(id) NOT NULL,
+    version BIGINT NOT NULL DEFAULT 0,
+    
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
 -- Transactions
 CREATE TABLE transactions (
     id SERIAL PRIMARY KEY,
@@ -360,6 +458,47 @@ CREATE TABLE transactions (
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Daily transaction rollups (pre-aggregated totals for summaries)
+CREATE TABLE transaction_daily_rollups (
+    id SERIAL PRIMARY KEY,
+    day DATE NOT NULL,
+    type VARCHAR NOT NULL,
+    category VARCHAR NOT NULL,
+    transaction_count INTEGER NOT NULL DEFAULT 0,
+    amount_total NUMERIC(15,2) NOT NULL DEFAULT 0,
+    vat_total NUMERIC(15,2) NOT NULL DEFAULT 0,
+    tax_total NUMERIC(15,2) NOT NULL DEFAULT 0,
+    
+    -- Foreign keys
+    company_id INTEGER REFERENCES companies(id) NOT NULL,
+    tenant_id INTEGER REFERENCES tenants(id) NOT NULL,
+    
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT uq_transaction_daily_rollup UNIQUE (company_id, day, type, category)
+);
+
+-- Rollup watermark: rollups are complete up to and including rolled_up_through
+CREATE TABLE accounting_rollup_states (
+    company_id INTEGER PRIMARY KEY REFERENCES companies(id),
+    tenant_id INTEGER REFERENCES tenants(id) NOT NULL,
+    rolled_up_through DATE,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- Ledger checkpoints: running balance of everything dated before each month
+CREATE TABLE ledger_checkpoints (
+    id SERIAL PRIMARY KEY,
+    month DATE NOT NULL,
+    opening_balance NUMERIC(18,2) NOT NULL DEFAULT 0,
+    
+    -- Foreign keys
+    company_id INTEGER REFERENCES companies(id) NOT NULL,
+    tenant_id INTEGER REFERENCES tenants(id) NOT NULL,
+    
+    created_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT uq_ledger_checkpoint UNIQUE (company_id, month)
+);
+
 -- ================================================================
 -- TASK MANAGEMENT MODULE
 -- ================================================================
@@ -386,6 +525,11 @@ CREATE TABLE tasks (
     tenant_id INTEGER REFERENCES tenants(id),
     company_id INTEGER REFERENCES companies(id),
     
+    -- Related CRM entities (can be null)
+    contact_id INTEGER REFERENCES contacts(id),
+    lead_id INTEGER REFERENCES leads(id),
+    deal_id INTEGER REFERENCES deals(id),
+    
     created_at TIMESTAMPTZ DEFAULT NOW(),
     updated_at TIMESTAMPTZ DEFAULT NOW()
 );
@@ -483,6 +627,23 @@ CREATE TABLE kpi_alerts (
     created_at TIMESTAMPTZ DEFAULT NOW()
 );
 
+-- Global search index: one row per contact, lead, deal, invoice and task, written by search_index_sync
+CREATE TABLE search_index (
+    id SERIAL PRIMARY KEY,
+    entity_type VARCHAR(20) NOT NULL,
+    entity_id INTEGER NOT NULL,
+    title VARCHAR NOT NULL,
+    subtitle VARCHAR,
+    search_text TEXT NOT NULL,
+    
+    -- Foreign keys
+    company_id INTEGER REFERENCES companies(id) NOT NULL,
+    tenant_id INTEGER REFERENCES tenants(id) NOT NULL,
+    
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    CONSTRAINT uq_search_index_entity UNIQUE (entity_type, entity_id)
+);
+
 -- ================================================================
 -- INDEXES FOR PERFORMANCE
 -- ================================================================
@@ -499,28 +660,64 @@ CREATE INDEX idx_app_users_tenant ON app_users(tenant_id);
 -- CRM tables
 CREATE INDEX idx_contacts_company ON contacts(company_id);
 CREATE INDEX idx_contacts_tenant ON contacts(tenant_id);
+CREATE INDEX idx_contacts_search_trgm ON contacts USING GIN (company_id, search_text gin_trgm_ops);
+CREATE INDEX idx_contacts_phone_trgm ON contacts USING GIN (company_id, phone_digits gin_trgm_ops);
+CREATE INDEX idx_contacts_search_prefix ON contacts(company_id, search_text text_pattern_ops);
+CREATE INDEX idx_contacts_tax_id_digits ON contacts(company_id, (regexp_replace(tax_id, '\D', '', 'g')));
+CREATE INDEX idx_contacts_email ON contacts(company_id, lower(email));
+CREATE INDEX idx_contacts_name ON contacts(company_id, lower(name));
+CREATE INDEX idx_contacts_phone_digits ON contacts(company_id, phone_digits);
+CREATE INDEX idx_search_index_trgm ON search_index USING GIN (company_id, search_text gin_trgm_ops);
+CREATE INDEX idx_search_index_prefix ON search_index(company_id, search_text text_pattern_ops);
 CREATE INDEX idx_leads_company ON leads(company_id);
 CREATE INDEX idx_leads_tenant ON leads(tenant_id);
+CREATE INDEX idx_leads_contact_email ON leads(company_id, lower(contact_email));
+CREATE INDEX idx_leads_contact_phone ON leads(company_id, contact_phone);
+CREATE INDEX idx_leads_contact ON leads(contact_id, created_at DESC) WHERE contact_id IS NOT NULL;
 CREATE INDEX idx_deals_company ON deals(company_id);
 CREATE INDEX idx_deals_tenant ON deals(tenant_id);
+CREATE INDEX idx_deals_contact ON deals(contact_id, created_at DESC) WHERE contact_id IS NOT NULL;
+CREATE INDEX idx_deal_stage_history_entity ON deal_stage_history(company_id, entity_type, entity_id, changed_at);
 CREATE INDEX idx_activities_company ON activities(company_id);
 CREATE INDEX idx_activities_user ON activities(user_id);
+CREATE INDEX idx_activities_tenant ON activities(tenant_id);
+CREATE INDEX idx_activities_contact_created ON activities(contact_id, created_at DESC) WHERE contact_id IS NOT NULL;
+CREATE INDEX idx_activities_lead_created ON activities(lead_id, created_at DESC) WHERE lead_id IS NOT NULL;
+CREATE INDEX idx_activities_deal_created ON activities(deal_id, created_at DESC) WHERE deal_id IS NOT NULL;
+-- Unsent reminders only: the reminder dispatcher's claim query
+CREATE INDEX idx_activities_reminder_due ON activities(reminder_date, id) WHERE reminder_sent IS FALSE AND reminder_date IS NOT NULL;
 
 -- Accounting tables
 CREATE INDEX idx_invoices_company ON invoices(company_id);
 CREATE INDEX idx_invoices_tenant ON invoices(tenant_id);
+CREATE INDEX idx_invoices_contact ON invoices(contact_id, created_at DESC);
+CREATE INDEX idx_invoices_unlinked ON invoices(company_id, id) WHERE contact_id IS NULL;
+-- Open receivables only: aging report and overdue job
+CREATE INDEX idx_invoices_unpaid_due ON invoices(company_id, due_date) WHERE status IN ('sent', 'overdue');
+CREATE INDEX idx_invoice_payments_invoice ON invoice_payments(invoice_id, paid_at);
+CREATE INDEX idx_payment_events_pending ON payment_events(id) WHERE status = 'pending';
+CREATE INDEX idx_payment_events_received ON payment_events(provider, received_at);
 CREATE INDEX idx_transactions_company ON transactions(company_id);
 CREATE INDEX idx_transactions_tenant ON transactions(tenant_id);
 CREATE INDEX idx_transactions_date ON transactions(date);
+CREATE INDEX idx_transactions_company_date ON transactions(company_id, date, id);
+CREATE INDEX idx_transactions_contact ON transactions(contact_id);
+CREATE INDEX idx_transactions_invoice ON transactions(invoice_id);
 
 -- Task tables
 CREATE INDEX idx_tasks_company ON tasks(company_id);
 CREATE INDEX idx_tasks_tenant ON tasks(tenant_id);
 CREATE INDEX idx_tasks_assigned_to ON tasks(assigned_to);
+CREATE INDEX idx_tasks_board ON tasks(tenant_id, company_id, status, due_date, id);
+CREATE INDEX idx_tasks_contact_created ON tasks(contact_id, created_at DESC) WHERE contact_id IS NOT NULL;
+CREATE INDEX idx_tasks_lead_created ON tasks(lead_id, created_at DESC) WHERE lead_id IS NOT NULL;
+CREATE INDEX idx_tasks_deal_created ON tasks(deal_id, created_at DESC) WHERE deal_id IS NOT NULL;
 
 -- Template tables
 CREATE INDEX idx_templates_company ON templates(company_id);
 CREATE INDEX idx_templates_tenant ON templates(tenant_id);
+-- Scheduler claim query: active schedules ordered by due time
+CREATE INDEX idx_recurring_schedules_due ON recurring_schedules(next_execution_date) WHERE is_active;
 
 -- KPI tables
 CREATE INDEX idx_kpis_company ON kpis(company_id);
@@ -552,6 +749,79 @@ CREATE TRIGGER update_transactions_updated_at BEFORE UPDATE ON transactions FOR
 CREATE TRIGGER update_tasks_updated_at BEFORE UPDATE ON tasks FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 CREATE TRIGGER update_templates_updated_at BEFORE UPDATE ON templates FOR EACH ROW EXECUTE FUNCTION update_updated_at_column();
 
+-- Contact search fields (app/services/contact_search.py normalizes queries the same way)
+CREATE OR REPLACE FUNCTION contacts_search_fields()
+RETURNS TRIGGER AS $$
+BEGIN
+    NEW.phone_digits = NULLIF(regexp_replace(COALESCE(NEW.phone, ''), '\D', '', 'g'), '');
+    NEW.search_text = lower(regexp_replace(
+        concat_ws(' ', NEW.name, NEW.company_name, NEW.email, NEW.phone_digits), '\s+', ' ', 'g'
+    ));
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER contacts_search_fields BEFORE INSERT OR UPDATE OF name, company_name, email, phone ON contacts FOR EACH ROW EXECUTE FUNCTION contacts_search_fields();
+
+-- Global search index (app/services/global_search.py); TG_ARGV[0] is the entity type
+CREATE OR REPLACE FUNCTION search_index_sync()
+RETURNS TRIGGER AS $$
+DECLARE
+    entry_title TEXT;
+    entry_subtitle TEXT;
+    entry_text TEXT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        DELETE FROM search_index WHERE entity_type = TG_ARGV[0] AND entity_id = OLD.id;
+        RETURN OLD;
+    END IF;
+
+    IF TG_ARGV[0] = 'contact' THEN
+        entry_title := NEW.name;
+        entry_subtitle := concat_ws(' · ', NEW.company_name, NEW.email, NEW.phone);
+        entry_text := NEW.search_text;
+    ELSIF TG_ARGV[0] = 'lead' THEN
+        entry_title := NEW.title;
+        entry_subtitle := concat_ws(' · ', NEW.contact_name, NEW.company_name);
+        entry_text := concat_ws(' ', NEW.title, NEW.contact_name, NEW.company_name, NEW.contact_email,
+                                regexp_replace(COALESCE(NEW.contact_phone, ''), '\D', '', 'g'));
+    ELSIF TG_ARGV[0] = 'deal' THEN
+        entry_title := NEW.title;
+        entry_subtitle := concat_ws(' · ', NEW.primary_contact, NEW.company_name);
+        entry_text := concat_ws(' ', NEW.title, NEW.primary_contact, NEW.company_name, NEW.contact_email,
+                                regexp_replace(COALESCE(NEW.contact_phone, ''), '\D', '', 'g'));
+    ELSIF TG_ARGV[0] = 'invoice' THEN
+        entry_title := NEW.invoice_number;
+        entry_subtitle := NEW.customer_name;
+        entry_text := concat_ws(' ', NEW.invoice_number, NEW.customer_name, NEW.customer_email, NEW.customer_tax_id,
+                                regexp_replace(COALESCE(NEW.customer_phone, ''), '\D', '', 'g'));
+    ELSE
+        entry_title := NEW.title;
+        entry_subtitle := NEW.status;
+        entry_text := NEW.title;
+    END IF;
+
+    INSERT INTO search_index (entity_type, entity_id, title, subtitle, search_text, company_id, tenant_id, updated_at)
+    VALUES (
+        TG_ARGV[0], NEW.id, entry_title, NULLIF(entry_subtitle, ''),
+        lower(regexp_replace(trim(COALESCE(entry_text, '')), '\s+', ' ', 'g')),
+        NEW.company_id, NEW.tenant_id, NOW()
+    )
+    ON CONFLICT (entity_type, entity_id) DO UPDATE SET
+        title = EXCLUDED.title,
+        subtitle = EXCLUDED.subtitle,
+        search_text = EXCLUDED.search_text,
+        updated_at = EXCLUDED.updated_at;
+    RETURN NEW;
+END;
+$$ language 'plpgsql';
+
+CREATE TRIGGER contacts_search_index AFTER INSERT OR DELETE OR UPDATE OF name, company_name, email, phone ON contacts FOR EACH ROW EXECUTE FUNCTION search_index_sync('contact');
+CREATE TRIGGER leads_search_index AFTER INSERT OR DELETE OR UPDATE OF title, contact_name, company_name, contact_email, contact_phone ON leads FOR EACH ROW EXECUTE FUNCTION search_index_sync('lead');
+CREATE TRIGGER deals_search_index AFTER INSERT OR DELETE OR UPDATE OF title, primary_contact, company_name, contact_email, contact_phone ON deals FOR EACH ROW EXECUTE FUNCTION search_index_sync('deal');
+CREATE TRIGGER invoices_search_index AFTER INSERT OR DELETE OR UPDATE OF invoice_number, customer_name, customer_email, customer_tax_id, customer_phone ON invoices FOR EACH ROW EXECUTE FUNCTION search_index_sync('invoice');
+CREATE TRIGGER tasks_search_index AFTER INSERT OR DELETE OR UPDATE OF title, status ON tasks FOR EACH ROW EXECUTE FUNCTION search_index_sync('task');
+
 -- ================================================================
 -- SAMPLE DATA (for testing)
 -- ================================================================
@@ -0,0 +1,108 @@
+"""
+Shared fixtures for the BiznesAssistant test suite
+Route and query-count tests run on in-memory sqlite. Postgres tests run against TEST_DATABASE_URL,
+rebuilt from supabase_migration.sql before each test, and are skipped when it is not set
+"""
+
+import os
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import close_all_sessions, sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.database import get_db
+from app.main import app
+from app.utils.auth import get_current_active_user, get_current_tenant
+
+MIGRATION_PATH = Path(__file__).resolve().parent.parent / "supabase_migration.sql"
+
+TENANT_ID = 1
+COMPANY_ID = 1
+
+
+@compiles(UUID, "sqlite")
+def _sqlite_uuid(type_, compiler, **kw):
+    # app_users.supabase_auth_id; sqlite has no UUID type
+    return "CHAR(36)"
+
+
+class QueryCounter:
+    """Counts statements an engine sends to the database"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+
+    def _count(self, *args):
+        self.count += 1
+
+    def __enter__(self):
+        event.listen(self.engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, "before_cursor_execute", self._count)
+
+
+@pytest.fixture
+def sqlite_engine():
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def sqlite_sessions(sqlite_engine):
+    return sessionmaker(autocommit=False, autoflush=False, bind=sqlite_engine)
+
+
+@pytest.fixture
+def client(sqlite_sessions):
+    """API client on the sqlite database, authenticated as user 1 of company 1."""
+    def get_test_db():
+        db = sqlite_sessions()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_current_active_user] = lambda: SimpleNamespace(id=1, company_id=COMPANY_ID)
+    app.dependency_overrides[get_current_tenant] = lambda: TENANT_ID
+    yield TestClient(app, base_url="http://localhost")
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def pg_engine():
+    """Engine on a freshly migrated database seeded with tenant 1, company 1 and user 1."""
+    url = os.environ.get("TEST_DATABASE_URL")
+    if not url:
+        pytest.skip("TEST_DATABASE_URL is not set")
+
+    engine = create_engine(url, pool_size=20)
+    connection = engine.raw_connection()
+    try:
+        # Whole script in one driver call, DO/$$ function bodies included
+        with connection.cursor() as cursor:
+            cursor.execute(MIGRATION_PATH.read_text())
+        connection.commit()
+    finally:
+        connection.close()
+
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def pg_sessions(pg_engine):
+    """Session factory bound to the migrated Postgres database."""
+    yield sessionmaker(autocommit=False, autoflush=False, bind=pg_engine)
+    # A failed assertion skips the test's db.close(); an open transaction would block the next migration
+    close_all_sessions()
@@ -0,0 +1,202 @@
+"""
+Contact dedup: blocking, scoring and grouping in memory; merging and INN resolution against Postgres
+"""
+
+from types import SimpleNamespace
+
+from sqlalchemy import func, select, text
+
+from app.models.activity import Activity
+from app.models.contact import Contact
+from app.models.deal import Deal
+from app.models.invoice import Invoice
+from app.models.lead import Lead
+from app.models.task import Task
+from app.models.transaction import Transaction
+from app.services import contact_dedup
+from app.services.contact_dedup import (
+    DEFAULT_MIN_SCORE, MAX_BLOCK_SIZE, TAX_ID_DIGITS, ContactIndex, find_duplicate_contacts, merge_contacts, name_similarity,
+    resolve_contact_id
+)
+from tests.conftest import COMPANY_ID, TENANT_ID
+
+# Tables merge_contacts repoints, as (name in its result, model)
+REFERENCING = (("invoices", Invoice), ("transactions", Transaction), ("leads", Lead),
+               ("deals", Deal), ("activities", Activity), ("tasks", Task))
+
+
+def _row(contact_id: int, name: str, tax_id=None, phone=None, email=None) -> SimpleNamespace:
+    return SimpleNamespace(id=contact_id, name=name, tax_id=tax_id, phone=phone, email=email)
+
+
+def _duplicates(monkeypatch, rows, **kwargs):
+    monkeypatch.setattr(contact_dedup, "_company_contacts", lambda db, tenant_id, company_id: rows)
+    return find_duplicate_contacts(None, TENANT_ID, COMPANY_ID, **kwargs)
+
+
+def test_name_similarity_ignores_legal_forms_case_and_word_order():
+    assert name_similarity("OOO Alfa Trade", "alfa trade MChJ") == 1.0
+    assert name_similarity("ООО Alfa-Trade", "Trade, Alfa") == 1.0
+    assert name_similarity("Alfa Trade", "Beta Stroy") < 0.5
+    assert name_similarity("OOO", "Alfa") == 0.0
+
+
+def test_index_resolves_on_the_strongest_unambiguous_key():
+    index = ContactIndex([
+        _row(1, "Alfa", tax_id="123456789", phone="+998 90 123 45 67"),
+        _row(2, "Beta", phone="90 123-45-67"),
+        _row(3, "Gamma", email="info@gamma.uz"),
+    ])
+
+    assert index.resolve(tax_id="123 456 789", phone="901234567") == 1
+    # The phone is shared, so it is ambiguous; the email still decides
+    assert index.resolve(phone="901234567", email="INFO@gamma.uz") == 3
+    assert index.resolve(phone="901234567") is None
+    assert index.resolve(name="GAMMA") == 3
+
+
+def test_placeholder_keys_shared_by_too_many_contacts_are_not_blocked():
+    rows = [_row(contact_id, "Alfa", tax_id="000000000") for contact_id in range(1, MAX_BLOCK_SIZE + 2)]
+    assert ContactIndex(rows).candidate_pairs() == {}
+    assert ContactIndex(rows[:2]).candidate_pairs() == {(1, 2): ["tax_id"]}
+
+
+def test_duplicates_are_scored_and_grouped_transitively(monkeypatch):
+    groups = _duplicates(monkeypatch, [
+        _row(1, "Alfa Trade", tax_id="123456789"),
+        _row(2, "OOO Alfa Trade", tax_id="123 456 789", email="b@alfa.uz"),
+        _row(3, "Alfa Trade MChJ", email="B@alfa.uz"),
+        # A shared phone alone, with unrelated names, stays below the default score
+        _row(4, "Bobur Aliyev", phone="901234567"),
+        _row(5, "Dilnoza Rashidova", phone="+998901234567"),
+    ])
+
+    [group] = groups
+    assert group["primary_id"] == 1
+    assert group["contact_ids"] == [1, 2, 3]
+    assert group["score"] == 1.0
+    assert [(pair["contact_ids"], pair["score"], pair["matched_on"]) for pair in group["pairs"]] == [
+        ([1, 2], 1.0, ["tax_id"]),
+        ([2, 3], 0.85, ["email"]),
+    ]
+
+
+def test_min_score_controls_weak_matches(monkeypatch):
+    rows = [_row(1, "Bobur Aliyev", phone="901234567"), _row(2, "Dilnoza Rashidova", phone="901234567")]
+    [group] = _duplicates(monkeypatch, rows, min_score=0.3)
+    assert group["pairs"][0]["matched_on"] == ["phone"]
+    assert 0.35 < group["score"] < DEFAULT_MIN_SCORE
+
+
+def _contact(db, name: str, tax_id=None, phone=None, email=None, company_id: int = COMPANY_ID) -> int:
+    contact = Contact(
+        name=name,
+        tax_id=tax_id,
+        phone=phone,
+        email=email,
+        assigned_user_id=1,
+        company_id=company_id,
+        tenant_id=TENANT_ID
+    )
+    db.add(contact)
+    db.flush()
+    return contact.id
+
+
+def test_formatted_stored_inn_resolves(pg_sessions):
+    db = pg_sessions()
+    contact_id = _contact(db, "OOO Alfa", tax_id="123 456 789")
+    _contact(db, "OOO Beta", tax_id="987-654-321")
+
+    assert resolve_contact_id(db, TENANT_ID, COMPANY_ID, tax_id="123456789", name="Someone else") == contact_id
+    assert resolve_contact_id(db, TENANT_ID, COMPANY_ID, tax_id="123-456-789") == contact_id
+    assert resolve_contact_id(db, TENANT_ID, COMPANY_ID, tax_id="111111111") is None
+    db.close()
+
+
+def test_inn_lookup_uses_digits_index(pg_sessions):
+    db = pg_sessions()
+    for number in range(200):
+        _contact(db, f"Contact {number}", tax_id=f"{100000000 + number:09d}")
+    db.execute(text("ANALYZE contacts"))
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+
+    query = select(Contact.id).where(Contact.company_id == COMPANY_ID, TAX_ID_DIGITS == "100000042")
+    compiled = query.compile(dialect=db.bind.dialect)
+    plan = db.connection().exec_driver_sql(f"EXPLAIN {compiled}", compiled.params).scalars().all()
+
+    assert any("idx_contacts_tax_id_digits" in line for line in plan)
+    db.close()
+
+
+def _reference(db, contact_id: int):
+    """One row in every table that points at a contact."""
+    params = {"contact_id": contact_id, "company_id": COMPANY_ID, "tenant_id": TENANT_ID}
+    db.execute(text(
+        "INSERT INTO invoices (invoice_number, customer_name, issue_date, due_date, subtotal, total_amount, "
+        "remaining_amount, created_by_id, contact_id, company_id, tenant_id) VALUES ('INV-T1-2026-000001', "
+        "'Alfa', now(), now(), 100, 100, 100, 1, :contact_id, :company_id, :tenant_id)"
+    ), params)
+    db.execute(text(
+        "INSERT INTO transactions (amount, type, category, date, user_id, contact_id, company_id, tenant_id) "
+        "VALUES (100, 'income', 'sales', now(), 1, :contact_id, :company_id, :tenant_id)"
+    ), params)
+    for table in ("leads", "deals", "tasks"):
+        db.execute(text(
+            f"INSERT INTO {table} (title, contact_id, company_id, tenant_id) VALUES ('Alfa', :contact_id, :company_id, :tenant_id)"
+        ), params)
+    db.execute(text(
+        "INSERT INTO activities (title, type, user_id, contact_id, company_id, tenant_id) "
+        "VALUES ('Call', 'call', 1, :contact_id, :company_id, :tenant_id)"
+    ), params)
+
+
+def test_merge_repoints_references_and_fills_blanks(pg_sessions):
+    db = pg_sessions()
+    primary = _contact(db, "Alfa Trade", tax_id="123456789")
+    duplicate = _contact(db, "OOO Alfa Trade", phone="+998901234567", email="info@alfa.uz")
+    _reference(db, duplicate)
+    db.commit()
+
+    result = merge_contacts(db, TENANT_ID, COMPANY_ID, primary, [duplicate, primary])
+    db.commit()
+
+    assert result == {"merged": 1, **{name: 1 for name, _ in REFERENCING}}
+    for _, model in REFERENCING:
+        assert db.query(model.contact_id).scalar() == primary
+    db.expire_all()
+    merged = db.get(Contact, primary)
+    assert (merged.name, merged.tax_id, merged.phone, merged.email) == (
+        "Alfa Trade", "123456789", "+998901234567", "info@alfa.uz"
+    )
+    assert db.get(Contact, duplicate) is None
+    db.close()
+
+
+def test_merge_refuses_contacts_of_another_company(pg_sessions):
+    db = pg_sessions()
+    db.execute(text(
+        "INSERT INTO companies (id, name, tax_id, company_code, tenant_id) VALUES (2, 'Second LLC', '987654321', 'TEST002', 1)"
+    ))
+    primary = _contact(db, "Alfa Trade")
+    foreign = _contact(db, "Alfa Trade", company_id=2)
+    db.commit()
+
+    assert merge_contacts(db, TENANT_ID, COMPANY_ID, primary, [foreign]) is None
+    db.rollback()
+    assert db.query(func.count(Contact.id)).scalar() == 2
+    db.close()
+
+
+def test_merge_route_returns_404_for_a_foreign_contact(client, sqlite_engine, sqlite_sessions):
+    Contact.__table__.create(sqlite_engine)
+    db = sqlite_sessions()
+    primary = _contact(db, "Alfa Trade")
+    foreign = _contact(db, "Alfa Trade", company_id=2)
+    db.commit()
+    db.close()
+
+    response = client.post(f"/api/crm/contacts/{primary}/merge", json={"duplicate_ids": [foreign]})
+
+    assert response.status_code == 404
+    assert response.json()["detail"] == "Contact not found"
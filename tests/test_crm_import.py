@@ -0,0 +1,105 @@
+"""
+Contact import: column-wise validation, row error reports and duplicate detection across chunks
+"""
+
+import io
+
+import pandas as pd
+
+from app.models.contact import Contact, ContactType
+from app.services import spreadsheet_import
+from app.services.crm_import import ContactImportService
+
+TENANT_ID = 1
+COMPANY_ID = 1
+
+
+def _service(db=None) -> ContactImportService:
+    return ContactImportService(db, TENANT_ID, COMPANY_ID, 1)
+
+
+def _chunk(rows) -> pd.DataFrame:
+    service = _service()
+    return service._normalize_columns(pd.DataFrame(rows, dtype=object))
+
+
+def _csv(rows) -> io.BytesIO:
+    return io.BytesIO(pd.DataFrame(rows).to_csv(index=False).encode("utf-8"))
+
+
+def test_validate_chunk_normalizes_keys():
+    frame, checks = _service()._validate_chunk(_chunk([
+        {"name": "OOO Alfa", "phone": "90 123-45-67", "email": " Info@Alfa.UZ ", "tax_id": "123 456 789", "type": ""},
+        {"name": "Beta", "phone": "+998 (91) 765 43 21", "email": "", "tax_id": "", "type": "Supplier"},
+    ]))
+
+    assert list(frame["phone"]) == ["+998901234567", "+998917654321"]
+    assert list(frame["_phone_key"]) == ["901234567", "917654321"]
+    assert frame.loc[0, "email"] == "info@alfa.uz"
+    assert frame.loc[0, "tax_id"] == frame.loc[0, "_tax_id_key"] == "123456789"
+    assert frame.loc[1, ["email", "tax_id", "_tax_id_key"]].isna().all()
+    assert list(frame["type"]) == [ContactType.CUSTOMER, ContactType.SUPPLIER]
+    assert not any(mask.any() for mask, _ in checks)
+
+
+def test_row_errors_reports_every_failed_check():
+    service = _service()
+    chunk = _chunk([
+        {"name": "Valid", "phone": "901234567", "tax_id": "123456789"},
+        {"name": "", "phone": "12", "tax_id": "1234"},
+        {"name": "Bad email", "email": "not-an-email", "type": "vendor"},
+    ])
+    _, checks = service._validate_chunk(chunk)
+
+    invalid, errors = service._row_errors(checks, chunk.index, first_row=2)
+
+    assert list(invalid) == [False, True, True]
+    assert errors == [
+        {"row": 3, "errors": [
+            "name is required",
+            "phone must have 7-15 digits",
+            "tax_id must be a 9-digit INN or 14-digit PINFL",
+        ]},
+        {"row": 4, "errors": [
+            "email is invalid",
+            "type must be one of: " + ", ".join(member.value for member in ContactType),
+        ]},
+    ]
+
+
+def test_duplicates_across_chunks_are_rejected(pg_sessions, monkeypatch):
+    monkeypatch.setattr(spreadsheet_import, "CHUNK_SIZE", 2)
+    db = pg_sessions()
+    rows = [
+        {"name": "Alfa", "tax_id": "123456789"},
+        {"name": "Beta", "phone": "901234567"},
+        {"name": "Alfa again", "tax_id": "123-456-789"},
+        {"name": "Beta again", "phone": "+998 90 123 45 67"},
+        {"name": "Gamma", "email": "gamma@example.uz"},
+    ]
+
+    report = _service(db).import_file(_csv(rows), "contacts.csv", dry_run=True)
+
+    assert (report["total_rows"], report["imported"], report["failed"]) == (5, 3, 2)
+    assert report["errors"] == [
+        {"row": 4, "errors": ["tax_id duplicates an earlier row"]},
+        {"row": 5, "errors": ["phone duplicates an earlier row"]},
+    ]
+    assert db.query(Contact).count() == 0
+    db.close()
+
+
+def test_formatted_stored_inn_counts_as_existing(pg_sessions):
+    db = pg_sessions()
+    db.add(Contact(name="Alfa", tax_id="123 456 789", assigned_user_id=1, company_id=COMPANY_ID, tenant_id=TENANT_ID))
+    db.commit()
+
+    report = _service(db).import_file(_csv([
+        {"name": "Alfa", "tax_id": "123456789"},
+        {"name": "Beta", "tax_id": "987654321"},
+    ]), "contacts.csv")
+
+    assert (report["imported"], report["failed"]) == (1, 1)
+    assert report["errors"] == [{"row": 2, "errors": ["tax_id already exists"]}]
+    assert db.query(Contact).count() == 2
+    db.close()
@@ -0,0 +1,74 @@
+"""
+Date-range filters: end_date includes the whole end day on every list and export
+"""
+
+import csv
+import io
+from datetime import datetime
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.invoice import Invoice
+from app.models.transaction import Transaction, TransactionCategory, TransactionType
+from tests.conftest import COMPANY_ID, TENANT_ID
+
+# Start of the range, afternoon of the end day, first minute after it
+MOMENTS = [datetime(2026, 3, 1), datetime(2026, 3, 31, 15, 30), datetime(2026, 4, 1, 0, 1)]
+RANGE = {"start_date": "2026-03-01", "end_date": "2026-03-31"}
+
+
+@pytest.fixture
+def dated_rows(sqlite_engine, sqlite_sessions):
+    for model in (Invoice, Transaction):
+        model.__table__.create(sqlite_engine)
+
+    db = sqlite_sessions()
+    db.execute(insert(Invoice), [
+        {
+            "invoice_number": f"INV-T{TENANT_ID}-2026-{index:06d}",
+            "customer_name": f"Customer {index}",
+            "issue_date": moment,
+            "due_date": moment,
+            "subtotal": 100,
+            "total_amount": 100,
+            "remaining_amount": 100,
+            "created_by_id": 1,
+            "company_id": COMPANY_ID,
+            "tenant_id": TENANT_ID
+        }
+        for index, moment in enumerate(MOMENTS, start=1)
+    ])
+    db.execute(insert(Transaction), [
+        {
+            "amount": 100,
+            "type": TransactionType.INCOME,
+            "category": TransactionCategory.SALES,
+            "date": moment,
+            "user_id": 1,
+            "company_id": COMPANY_ID,
+            "tenant_id": TENANT_ID
+        }
+        for moment in MOMENTS
+    ])
+    db.commit()
+    db.close()
+
+
+def _csv_rows(response):
+    return list(csv.DictReader(io.StringIO(response.text)))
+
+
+@pytest.mark.parametrize("path", ["/api/export/invoices", "/api/export/transactions"])
+def test_export_includes_whole_end_day(client, dated_rows, path):
+    response = client.get(path, params=RANGE)
+
+    assert response.status_code == 200
+    assert len(_csv_rows(response)) == 2
+
+
+def test_invoice_list_includes_whole_end_day(client, dated_rows):
+    response = client.get("/api/invoices/", params={**RANGE, "view": "summary"})
+
+    assert response.status_code == 200
+    assert sorted(invoice["customer_name"] for invoice in response.json()) == ["Customer 1", "Customer 2"]
@@ -0,0 +1,77 @@
+"""
+Invoice numbering under concurrency: parallel creates get unique, gapless numbers
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+from sqlalchemy import select
+
+from app.models.invoice import Invoice
+from app.routes.invoices import create_invoice
+from app.schemas.invoice import InvoiceCreate
+from app.services.invoice_numbering import allocate_invoice_number, invoice_number_prefix
+
+TENANT_ID = 1
+COMPANY_ID = 1
+WORKERS = 8
+CREATES = 400
+# One abandoned reservation per four creates, spread through the run
+ABANDONED_EVERY = 4
+
+# The seeded admin of supabase_migration.sql
+CURRENT_USER = SimpleNamespace(id=1, company_id=COMPANY_ID)
+
+
+def _payload(index: int) -> InvoiceCreate:
+    return InvoiceCreate(
+        customer_name=f"Customer {index}",
+        issue_date=date.today(),
+        due_date=date.today() + timedelta(days=30),
+        items=[{"description": "Service", "quantity": 1, "unit_price": 100}]
+    )
+
+
+def test_parallel_creates_get_unique_gapless_numbers(pg_sessions):
+    start = threading.Barrier(WORKERS)
+
+    def create(index: int) -> str:
+        db = pg_sessions()
+        try:
+            if index < WORKERS:
+                start.wait()
+            return create_invoice(_payload(index), db, CURRENT_USER, TENANT_ID).invoice_number
+        finally:
+            db.close()
+
+    def abandon(index: int) -> None:
+        # Reserve a number and roll back, as a failed create does
+        db = pg_sessions()
+        try:
+            allocate_invoice_number(db, TENANT_ID, COMPANY_ID)
+            db.rollback()
+        finally:
+            db.close()
+
+    with ThreadPoolExecutor(max_workers=WORKERS) as pool:
+        futures, abandoned = [], []
+        for index in range(CREATES):
+            futures.append(pool.submit(create, index))
+            if index % ABANDONED_EVERY == ABANDONED_EVERY - 1:
+                abandoned.append(pool.submit(abandon, index))
+        returned = [future.result() for future in futures]
+        for future in abandoned:
+            future.result()
+
+    db = pg_sessions()
+    try:
+        stored = db.scalars(select(Invoice.invoice_number).where(Invoice.company_id == COMPANY_ID)).all()
+    finally:
+        db.close()
+
+    prefix = invoice_number_prefix(TENANT_ID, date.today().year)
+    assert sorted(returned) == sorted(stored)
+    assert len(set(stored)) == CREATES
+    assert sorted(int(number[len(prefix):]) for number in stored) == list(range(1, CREATES + 1))
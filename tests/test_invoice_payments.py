@@ -0,0 +1,83 @@
+"""
+Invoice payments against Postgres: settling updates the invoice_status enum column in place
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from app.models.invoice import Invoice, InvoicePayment, InvoiceStatus
+from app.services.invoice_payments import InvoicePaymentError, apply_payments
+
+TENANT_ID = 1
+COMPANY_ID = 1
+
+
+def _invoice(db, number: int, status: InvoiceStatus = InvoiceStatus.SENT, total: int = 100) -> int:
+    issue_date = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    invoice = Invoice(
+        invoice_number=f"INV-T{TENANT_ID}-2026-{number:06d}",
+        status=status,
+        customer_name=f"Customer {number}",
+        issue_date=issue_date,
+        due_date=issue_date + timedelta(days=30),
+        subtotal=total,
+        total_amount=total,
+        paid_amount=0,
+        remaining_amount=total,
+        created_by_id=1,
+        company_id=COMPANY_ID,
+        tenant_id=TENANT_ID
+    )
+    db.add(invoice)
+    db.flush()
+    return invoice.id
+
+
+def _payment(invoice_id: int, amount) -> dict:
+    return {"invoice_id": invoice_id, "amount": Decimal(str(amount)), "method": "bank_transfer", "reference": None}
+
+
+def test_single_invoice_payment_settles_status(pg_sessions):
+    db = pg_sessions()
+    invoice_id = _invoice(db, 1)
+
+    [result] = apply_payments(db, TENANT_ID, COMPANY_ID, [_payment(invoice_id, 100)])
+    db.commit()
+
+    assert result["status"] == InvoiceStatus.PAID.value
+    invoice = db.get(Invoice, invoice_id)
+    assert invoice.status == InvoiceStatus.PAID
+    assert invoice.remaining_amount == 0
+    assert invoice.paid_date is not None
+    db.close()
+
+
+def test_multi_invoice_payment_keeps_partial_and_overdue_statuses(pg_sessions):
+    db = pg_sessions()
+    paid = _invoice(db, 1)
+    partial = _invoice(db, 2)
+    overdue = _invoice(db, 3, status=InvoiceStatus.OVERDUE)
+
+    results = apply_payments(db, TENANT_ID, COMPANY_ID, [
+        _payment(paid, 60), _payment(paid, 40), _payment(partial, 30), _payment(overdue, 10)
+    ])
+    db.commit()
+
+    statuses = {result["invoice_id"]: result["status"] for result in results}
+    assert statuses == {paid: "paid", partial: "sent", overdue: "overdue"}
+    assert db.get(Invoice, partial).remaining_amount == Decimal("70.00")
+    assert db.query(InvoicePayment).count() == 4
+    db.close()
+
+
+def test_cancelled_invoice_rejects_payment(pg_sessions):
+    db = pg_sessions()
+    cancelled = _invoice(db, 1, status=InvoiceStatus.CANCELLED)
+
+    with pytest.raises(InvoicePaymentError) as error:
+        apply_payments(db, TENANT_ID, COMPANY_ID, [_payment(cancelled, 10)])
+    assert error.value.invoice_ids == [cancelled]
+    db.rollback()
+    db.close()
@@ -0,0 +1,78 @@
+"""
+Invoice PDF rendering: slow or failing documents surface as PDFRenderError instead of breaking the response
+"""
+
+import io
+import threading
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+import pytest
+
+from app.config import settings
+from app.services import invoice_pdf
+
+
+@pytest.fixture
+def slow_renderer(monkeypatch):
+    """Renders in threads; "slow" never finishes within the timeout, "broken" and "crash" fail in the worker."""
+    release = threading.Event()
+
+    def render_pdf(template_name, context):
+        if template_name == "slow":
+            release.wait(5)
+        if template_name == "broken":
+            return context["missing"]
+        if template_name == "crash":
+            raise BrokenProcessPool("A process in the process pool was terminated abruptly")
+        return f"%PDF {context['number']}".encode()
+
+    pool = ThreadPoolExecutor(max_workers=2)
+    monkeypatch.setattr(invoice_pdf, "render_pdf", render_pdf)
+    monkeypatch.setattr(invoice_pdf, "_get_pool", lambda: pool)
+    monkeypatch.setattr(settings, "PDF_RENDER_TIMEOUT", 0.2)
+    yield
+    release.set()
+    pool.shutdown()
+
+
+def _job(number: int, template_name: str = "default"):
+    return (f"INV-{number}.pdf", ("test", number), template_name, {"number": number})
+
+
+def test_batch_marks_timed_out_documents_and_keeps_going(slow_renderer):
+    jobs = [_job(1), _job(2, "slow"), _job(3)]
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(invoice_pdf.iter_invoice_zip(jobs, concurrency=2))))
+
+    assert archive.namelist() == ["INV-1.pdf", "INV-3.pdf", "errors.txt"]
+    assert archive.read("INV-3.pdf") == b"%PDF 3"
+    assert archive.read("errors.txt").startswith(b"INV-2.pdf: Rendering INV-2.pdf timed out")
+
+
+def test_batch_lists_worker_failures_and_keeps_going(slow_renderer):
+    # Numbers no other test renders, so nothing comes from the PDF cache
+    jobs = [_job(11, "broken"), _job(12), _job(13, "crash"), _job(14)]
+    archive = zipfile.ZipFile(io.BytesIO(b"".join(invoice_pdf.iter_invoice_zip(jobs, concurrency=2))))
+
+    assert archive.namelist() == ["INV-12.pdf", "INV-14.pdf", "errors.txt"]
+    errors = archive.read("errors.txt").decode().splitlines()
+    assert errors[0] == "INV-11.pdf: Rendering INV-11.pdf failed: KeyError: 'missing'"
+    assert errors[1].startswith("INV-13.pdf: Rendering INV-13.pdf failed: BrokenProcessPool")
+
+
+def test_broken_pool_is_replaced(monkeypatch):
+    broken = SimpleNamespace(_broken="A child process terminated abruptly")
+    monkeypatch.setattr(invoice_pdf, "_pool", broken)
+
+    pool = invoice_pdf._get_pool()
+
+    assert isinstance(pool, ProcessPoolExecutor)
+    pool.shutdown()
+
+
+def test_single_render_timeout_raises_pdf_render_error(slow_renderer):
+    future = invoice_pdf._get_pool().submit(invoice_pdf.render_pdf, "slow", {"number": 1})
+    with pytest.raises(invoice_pdf.PDFRenderError):
+        invoice_pdf._wait_for_pdf(future, "INV-1.pdf")
@@ -0,0 +1,63 @@
+"""
+Query counts of the invoice list: constant per view, whatever the page size
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import insert
+
+from app.models.invoice import Invoice, InvoiceItem
+from tests.conftest import COMPANY_ID, TENANT_ID, QueryCounter
+
+INVOICES = 60
+ITEMS_PER_INVOICE = 3
+
+
+@pytest.fixture
+def invoices(sqlite_engine, sqlite_sessions):
+    for model in (Invoice, InvoiceItem):
+        model.__table__.create(sqlite_engine)
+
+    db = sqlite_sessions()
+    issue_date = datetime(2026, 1, 1)
+    db.execute(insert(Invoice), [
+        {
+            "id": index,
+            "invoice_number": f"INV-T{TENANT_ID}-2026-{index:06d}",
+            "customer_name": f"Customer {index}",
+            "issue_date": issue_date,
+            "due_date": issue_date + timedelta(days=30),
+            "subtotal": 300,
+            "total_amount": 336,
+            "remaining_amount": 336,
+            "created_by_id": 1,
+            "company_id": COMPANY_ID,
+            "tenant_id": TENANT_ID
+        }
+        for index in range(1, INVOICES + 1)
+    ])
+    db.execute(insert(InvoiceItem), [
+        {"invoice_id": index, "description": "Service", "quantity": 1, "unit_price": 100, "line_total": 100}
+        for index in range(1, INVOICES + 1) for _ in range(ITEMS_PER_INVOICE)
+    ])
+    db.commit()
+    db.close()
+
+
+@pytest.mark.parametrize("view, expected_queries", [("summary", 1), ("full", 2)])
+def test_invoice_list_query_count_is_constant(client, sqlite_engine, invoices, view, expected_queries):
+    counts = {}
+    for limit in (5, 50):
+        with QueryCounter(sqlite_engine) as queries:
+            response = client.get("/api/invoices/", params={"view": view, "limit": limit})
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        counts[limit] = queries.count
+
+    assert counts[5] == counts[50] == expected_queries
+
+
+def test_full_view_includes_items(client, invoices):
+    response = client.get("/api/invoices/", params={"view": "full", "limit": 5})
+    assert all(len(invoice["items"]) == ITEMS_PER_INVOICE for invoice in response.json())
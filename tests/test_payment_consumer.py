@@ -0,0 +1,149 @@
+"""
+Payment webhooks and consumer end to end, driven by the fake Click and Payme clients
+"""
+
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+from app.config import settings
+from app.models.invoice import Invoice, InvoiceStatus
+from app.models.payment_event import PaymentEvent, PaymentEventStatus, PaymentProvider
+from app.services.fake_payment_provider import FakeClick, FakePayme
+from app.services import payment_consumer
+from app.services.payment_consumer import PaymentEventConsumer
+from app.services.payment_webhooks import (
+    CLICK_OK, handle_click_complete, handle_click_prepare, handle_payme, record_payment_event
+)
+
+TENANT_ID = 1
+COMPANY_ID = 1
+
+
+@pytest.fixture(autouse=True)
+def merchant_settings(monkeypatch):
+    monkeypatch.setattr(settings, "CLICK_SECRET_KEY", "click-secret")
+    monkeypatch.setattr(settings, "CLICK_SERVICE_ID", "1001")
+    monkeypatch.setattr(settings, "PAYME_SECRET_KEY", "payme-secret")
+
+
+def _invoice(db, number: int, total="100.00", paid="0") -> int:
+    issue_date = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    invoice = Invoice(
+        invoice_number=f"INV-T{TENANT_ID}-2026-{number:06d}",
+        status=InvoiceStatus.SENT,
+        customer_name=f"Customer {number}",
+        issue_date=issue_date,
+        due_date=issue_date + timedelta(days=30),
+        subtotal=Decimal(total),
+        total_amount=Decimal(total),
+        paid_amount=Decimal(paid),
+        remaining_amount=Decimal(total) - Decimal(paid),
+        created_by_id=1,
+        company_id=COMPANY_ID,
+        tenant_id=TENANT_ID
+    )
+    db.add(invoice)
+    db.commit()
+    return invoice.id
+
+
+def _click_pay(db, invoice_id: int, amount: str):
+    click = FakeClick()
+    prepared = click.prepare(invoice_id, Decimal(amount))
+    prepare = handle_click_prepare(db, prepared)
+    assert prepare["error"] == CLICK_OK
+    complete = handle_click_complete(db, click.complete(prepared, prepare["merchant_prepare_id"]))
+    assert complete["error"] == CLICK_OK
+
+
+def _payme_pay(db, invoice_id: int, amount: str):
+    payme = FakePayme()
+    body, headers = payme.create(invoice_id, Decimal(amount))
+    assert "result" in handle_payme(db, body, headers["Authorization"])
+    body, headers = payme.perform(body["params"]["id"])
+    assert handle_payme(db, body, headers["Authorization"])["result"]["state"] == 2
+
+
+def _events(db):
+    db.expire_all()
+    return {event.invoice_id: event for event in db.query(PaymentEvent).all()}
+
+
+def test_consumer_applies_click_and_payme_payments(pg_sessions):
+    db = pg_sessions()
+    paid = _invoice(db, 1)
+    partial = _invoice(db, 2)
+    _click_pay(db, paid, "100.00")
+    _payme_pay(db, partial, "40.00")
+
+    consumer = PaymentEventConsumer(pg_sessions)
+    assert consumer.run_batch() == {"claimed": 2, "applied": 2, "failed": 0, "retried": 0}
+    assert consumer.run_batch() == {"claimed": 0, "applied": 0, "failed": 0, "retried": 0}
+
+    db.expire_all()
+    assert db.get(Invoice, paid).status == InvoiceStatus.PAID
+    assert db.get(Invoice, partial).remaining_amount == Decimal("60.00")
+    assert {event.status for event in _events(db).values()} == {PaymentEventStatus.APPLIED.value}
+    db.close()
+
+
+def test_bad_events_fail_alone_and_the_rest_of_the_group_applies(pg_sessions):
+    db = pg_sessions()
+    good = _invoice(db, 1)
+    cancelled = _invoice(db, 2)
+    # Paying 1.00 more overflows NUMERIC(15,2): a database error, not an InvoicePaymentError
+    overflowing = _invoice(db, 3, total="9999999999999.99", paid="9999999999999.00")
+    also_good = _invoice(db, 4)
+
+    _click_pay(db, good, "100.00")
+    _click_pay(db, cancelled, "50.00")
+    record_payment_event(db, PaymentProvider.CLICK, "overflow-1", overflowing, Decimal("1.00"),
+                         {"test": True}, PaymentEventStatus.PENDING, paid_at=datetime.now(timezone.utc))
+    _click_pay(db, also_good, "25.00")
+    # Cancelled after Click completed: the consumer must reject it
+    db.get(Invoice, cancelled).status = InvoiceStatus.CANCELLED
+    db.commit()
+
+    result = PaymentEventConsumer(pg_sessions).run_batch()
+
+    assert result == {"claimed": 4, "applied": 2, "failed": 2, "retried": 0}
+    events = _events(db)
+    assert events[good].status == events[also_good].status == PaymentEventStatus.APPLIED.value
+    assert events[cancelled].status == PaymentEventStatus.FAILED.value
+    assert "cancelled" in events[cancelled].error
+    assert events[overflowing].status == PaymentEventStatus.FAILED.value
+    assert db.get(Invoice, good).status == InvoiceStatus.PAID
+    assert db.get(Invoice, also_good).remaining_amount == Decimal("75.00")
+    assert db.get(Invoice, overflowing).paid_amount == Decimal("9999999999999.00")
+    # Failed events are final, so the next poll has nothing to claim
+    assert PaymentEventConsumer(pg_sessions).run_batch()["claimed"] == 0
+    db.close()
+
+
+def test_transient_error_leaves_events_pending(pg_sessions, monkeypatch):
+    db = pg_sessions()
+    by_click = _invoice(db, 1)
+    by_payme = _invoice(db, 2)
+    _click_pay(db, by_click, "100.00")
+    _payme_pay(db, by_payme, "40.00")
+
+    apply_payments = payment_consumer.apply_payments
+
+    def deadlock_on_payme(session, tenant_id, company_id, payments, source="manual", user_id=None):
+        if source == PaymentProvider.PAYME.value:
+            raise OperationalError("UPDATE invoices", {}, Exception("deadlock detected"))
+        return apply_payments(session, tenant_id, company_id, payments, source=source, user_id=user_id)
+
+    monkeypatch.setattr(payment_consumer, "apply_payments", deadlock_on_payme)
+    assert PaymentEventConsumer(pg_sessions).run_batch() == {"claimed": 2, "applied": 1, "failed": 0, "retried": 1}
+    assert _events(db)[by_payme].status == PaymentEventStatus.PENDING.value
+    assert db.get(Invoice, by_payme).remaining_amount == Decimal("100.00")
+
+    monkeypatch.setattr(payment_consumer, "apply_payments", apply_payments)
+    assert PaymentEventConsumer(pg_sessions).run_batch() == {"claimed": 1, "applied": 1, "failed": 0, "retried": 0}
+    db.expire_all()
+    assert db.get(Invoice, by_payme).remaining_amount == Decimal("60.00")
+    db.close()
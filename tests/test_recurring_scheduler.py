@@ -0,0 +1,112 @@
+"""
+Recurring scheduler: a schedule whose rows the database rejects is isolated from the rest of the batch
+"""
+
+from datetime import datetime, timezone
+
+from sqlalchemy import func, text
+from sqlalchemy.exc import OperationalError
+
+from app.models.invoice import Invoice
+from app.models.template import RecurringSchedule, Template
+from app.models.transaction import Transaction
+from app.services import recurring_scheduler
+from app.services.recurring_scheduler import RecurringScheduler
+
+NOW = datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+
+def _schedule(db, name, template_type, data, interval, next_execution_date, company_id=1):
+    template = Template(name=name, type=template_type, data=data, is_recurring=True, recurring_interval=interval,
+                        created_by=1, tenant_id=1, company_id=company_id)
+    db.add(template)
+    db.flush()
+    schedule = RecurringSchedule(template_id=template.id, next_execution_date=next_execution_date)
+    db.add(schedule)
+    db.flush()
+    return schedule.id
+
+
+def test_database_error_only_fails_its_own_schedule(pg_sessions):
+    db = pg_sessions()
+    rent = _schedule(db, "rent", "transaction", {"amount": 100, "type": "expense", "category": "rent"},
+                     "monthly", datetime(2026, 8, 1, tzinfo=timezone.utc))
+    # Invoice for a contact that does not exist: the insert violates the contacts foreign key
+    broken = _schedule(db, "broken", "invoice",
+                       {"customer_name": "Ghost", "contact_id": 999999,
+                        "items": [{"description": "Service", "quantity": 1, "unit_price": 10}]},
+                       "weekly", datetime(2026, 9, 1, tzinfo=timezone.utc))
+    invoice = _schedule(db, "retainer", "invoice",
+                        {"customer_name": "Client", "items": [{"description": "Service", "quantity": 1, "unit_price": 10}]},
+                        "monthly", datetime(2026, 9, 15, tzinfo=timezone.utc))
+    db.commit()
+
+    result = RecurringScheduler(pg_sessions).run_batch(NOW)
+
+    assert result == {"claimed": 3, "created": 4, "failed": 1, "retried": 0}
+    schedules = {schedule.id: schedule for schedule in db.query(RecurringSchedule).all()}
+    assert schedules[broken].is_active is False
+    assert schedules[broken].last_execution_date is None
+    assert schedules[rent].is_active and schedules[rent].next_execution_date == datetime(2026, 11, 1, tzinfo=timezone.utc)
+    assert schedules[invoice].is_active and schedules[invoice].last_execution_date == datetime(2026, 9, 15, tzinfo=timezone.utc)
+    assert db.query(func.count(Transaction.id)).scalar() == 3
+    # Only the good invoice survived, and the rolled back one gave its number back
+    assert [number for (number,) in db.query(Invoice.invoice_number)] == ["INV-T1-2026-000001"]
+    db.close()
+
+
+def test_transient_error_leaves_schedule_due(pg_sessions, monkeypatch):
+    db = pg_sessions()
+    rent = _schedule(db, "rent", "transaction", {"amount": 100, "type": "expense", "category": "rent"},
+                     "monthly", datetime(2026, 9, 1, tzinfo=timezone.utc))
+    fees = _schedule(db, "fees", "transaction", {"amount": 5, "type": "expense", "category": "utilities"},
+                     "monthly", datetime(2026, 9, 5, tzinfo=timezone.utc))
+    db.commit()
+
+    materialize = recurring_scheduler.materialize_template
+
+    def deadlock_on_rent(session, template, occurrences):
+        if template.name == "rent":
+            raise OperationalError("INSERT INTO transactions", {}, Exception("deadlock detected"))
+        return materialize(session, template, occurrences)
+
+    monkeypatch.setattr(recurring_scheduler, "materialize_template", deadlock_on_rent)
+    result = RecurringScheduler(pg_sessions).run_batch(NOW)
+
+    assert result == {"claimed": 2, "created": 1, "failed": 0, "retried": 1}
+    schedule = db.get(RecurringSchedule, rent)
+    assert schedule.is_active and schedule.last_execution_date is None
+    assert schedule.next_execution_date == datetime(2026, 9, 1, tzinfo=timezone.utc)
+    assert db.get(RecurringSchedule, fees).last_execution_date == datetime(2026, 9, 5, tzinfo=timezone.utc)
+    db.close()
+
+
+def test_companies_run_in_order_and_commit_one_by_one(pg_sessions, monkeypatch):
+    db = pg_sessions()
+    db.execute(text(
+        "INSERT INTO companies (id, name, tax_id, company_code, tenant_id) VALUES (2, 'Second LLC', '987654321', 'TEST002', 1)"
+    ))
+    rent = {"amount": 100, "type": "expense", "category": "rent"}
+    # Company 2 falls due first, so claim order alone would run it first
+    _schedule(db, "rent 2", "transaction", rent, "monthly", datetime(2026, 9, 1, tzinfo=timezone.utc), company_id=2)
+    _schedule(db, "rent 1a", "transaction", rent, "monthly", datetime(2026, 9, 10, tzinfo=timezone.utc))
+    _schedule(db, "rent 1b", "transaction", rent, "monthly", datetime(2026, 9, 20, tzinfo=timezone.utc))
+    db.commit()
+
+    materialize = recurring_scheduler.materialize_template
+    calls = []
+
+    def recording(session, template, occurrences):
+        # Rows of companies that already ran are visible to other connections
+        observer = pg_sessions()
+        committed = observer.query(func.count(Transaction.id)).scalar()
+        observer.close()
+        calls.append((template.company_id, committed))
+        return materialize(session, template, occurrences)
+
+    monkeypatch.setattr(recurring_scheduler, "materialize_template", recording)
+    result = RecurringScheduler(pg_sessions).run_batch(NOW)
+
+    assert result == {"claimed": 3, "created": 4, "failed": 0, "retried": 0}
+    assert calls == [(1, 0), (1, 0), (2, 2)]
+    db.close()
@@ -0,0 +1,114 @@
+"""
+Reminder dispatcher: the claim commits before delivery, and email digests share one SMTP connection per thread
+"""
+
+import smtplib
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import func, text
+
+from app.config import settings
+from app.models.activity import Activity, ActivityStatus, ActivityType
+from app.services.email_service import EmailService
+from app.services.reminder_dispatcher import ReminderDispatcher
+from app.services.telegram_service import TelegramService
+from tests.conftest import COMPANY_ID, TENANT_ID
+
+NOW = datetime(2026, 10, 1, 9, tzinfo=timezone.utc)
+
+
+class FakeSMTP:
+    def __init__(self, email: "FakeEmail"):
+        self.email = email
+        self.sent = []
+        self.closed = False
+
+    def send_message(self, msg):
+        if msg["To"] in self.email.disconnect_on:
+            self.email.disconnect_on.remove(msg["To"])
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.email.observe()
+        self.sent.append(msg["To"])
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class FakeEmail(EmailService):
+    def __init__(self, sessions, disconnect_on=()):
+        super().__init__()
+        self.sessions = sessions
+        self.disconnect_on = set(disconnect_on)
+        self.opened = []
+        self.unsent_during_delivery = []
+
+    def open_smtp(self, timeout=None):
+        server = FakeSMTP(self)
+        self.opened.append((server, timeout))
+        return server
+
+    def observe(self):
+        # What another connection sees while the digest goes out
+        db = self.sessions()
+        self.unsent_during_delivery.append(
+            db.query(func.count(Activity.id)).filter(Activity.reminder_sent.is_(False)).scalar()
+        )
+        db.close()
+
+
+@pytest.fixture
+def reminders(pg_sessions, monkeypatch):
+    monkeypatch.setattr(settings, "TELEGRAM_BOT_TOKEN", None)
+    db = pg_sessions()
+    db.execute(text(
+        "INSERT INTO app_users (id, email, username, full_name, hashed_password, tenant_id, company_id) "
+        "VALUES (2, 'second@testcompany.uz', 'second', 'Second User', 'x', 1, 1)"
+    ))
+    for index, user_id in enumerate((1, 1, 2), start=1):
+        db.add(Activity(
+            title=f"Call {index}",
+            type=ActivityType.CALL,
+            status=ActivityStatus.PENDING,
+            scheduled_date=NOW + timedelta(hours=1),
+            reminder_date=NOW - timedelta(minutes=10 - index),
+            user_id=user_id,
+            company_id=COMPANY_ID,
+            tenant_id=TENANT_ID
+        ))
+        # One row per INSERT: the batched form casts to a native activitytype enum the schema does not have
+        db.flush()
+    db.commit()
+    db.close()
+
+
+def _dispatcher(pg_sessions, email):
+    return ReminderDispatcher(pg_sessions, email=email, telegram=TelegramService(), concurrency=1)
+
+
+def test_claim_commits_before_delivery_over_one_connection(pg_sessions, reminders):
+    email = FakeEmail(pg_sessions)
+
+    result = _dispatcher(pg_sessions, email).run_batch(NOW)
+
+    assert result == {"claimed": 3, "sent": 3, "failed": 0, "skipped": 0}
+    assert email.unsent_during_delivery == [0, 0]
+    [(server, timeout)] = email.opened
+    assert timeout == settings.REMINDER_SEND_TIMEOUT
+    assert sorted(server.sent) == ["admin@testcompany.uz", "second@testcompany.uz"]
+    assert server.closed
+
+
+def test_failed_send_reconnects_for_the_next_digest(pg_sessions, reminders):
+    email = FakeEmail(pg_sessions, disconnect_on={"admin@testcompany.uz"})
+
+    result = _dispatcher(pg_sessions, email).run_batch(NOW)
+
+    # Each reminder is attempted once: the failed digest is not retried
+    assert result == {"claimed": 3, "sent": 1, "failed": 2, "skipped": 0}
+    assert len(email.opened) == 2
+    assert email.opened[1][0].sent == ["second@testcompany.uz"]
+    assert all(server.closed for server, _ in email.opened)
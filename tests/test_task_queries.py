@@ -0,0 +1,79 @@
+"""
+Query counts of the task routes: users come with the tasks, not one lookup per task
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import Depends
+from sqlalchemy import insert
+
+from app.database import get_db
+from app.main import app
+from app.models.task import Task
+from app.models.user import User
+from app.utils.auth import get_current_active_user
+from tests.conftest import COMPANY_ID, TENANT_ID, QueryCounter
+
+TASKS = 60
+
+
+@pytest.fixture
+def tasks(sqlite_engine, sqlite_sessions):
+    for model in (User, Task):
+        model.__table__.create(sqlite_engine)
+
+    db = sqlite_sessions()
+    db.execute(insert(User), [
+        {
+            "id": index,
+            "email": f"user{index}@example.uz",
+            "username": f"user{index}",
+            "full_name": f"User {index}",
+            "hashed_password": "x",
+            "company_id": COMPANY_ID,
+            "tenant_id": TENANT_ID
+        }
+        for index in (1, 2, 3)
+    ])
+    due_date = datetime(2026, 1, 1)
+    db.execute(insert(Task), [
+        {
+            "id": index,
+            "title": f"Task {index}",
+            "assigned_to": 2 + index % 2,
+            "created_by": 1,
+            "due_date": due_date + timedelta(days=index),
+            "company_id": COMPANY_ID,
+            "tenant_id": TENANT_ID
+        }
+        for index in range(1, TASKS + 1)
+    ])
+    db.commit()
+    db.close()
+
+
+def test_task_list_query_count_is_constant(client, sqlite_engine, tasks):
+    counts = {}
+    for limit in (5, 50):
+        with QueryCounter(sqlite_engine) as queries:
+            response = client.get("/api/tasks/", params={"limit": limit})
+        assert response.status_code == 200
+        assert len(response.json()) == limit
+        counts[limit] = queries.count
+
+    assert counts[5] == counts[50] == 1
+    assert {task["assignee_name"] for task in response.json()} == {"User 2", "User 3"}
+    assert {task["creator_name"] for task in response.json()} == {"User 1"}
+
+
+def test_create_task_does_not_reload_users_after_commit(client, sqlite_engine, tasks):
+    # The real dependency loads the current user in the request's session, where the commit expires it
+    app.dependency_overrides[get_current_active_user] = lambda db=Depends(get_db): db.get(User, 1)
+    with QueryCounter(sqlite_engine) as queries:
+        response = client.post("/api/tasks/", json={"title": "Call the bank", "assigned_to": 2})
+
+    assert response.status_code == 200
+    assert (response.json()["assignee_name"], response.json()["creator_name"]) == ("User 2", "User 1")
+    # Current user, assignee check, insert, refresh of the server defaults
+    assert queries.count == 4